@@ -1,6 +1,4 @@
 from celery import shared_task
-from models.brains import Brain
-from models.settings import get_supabase_db
 from repository.files.upload_file import DocumentSerializable
 from utils.vectors import Neurons
 
@@ -9,13 +7,17 @@ from utils.vectors import Neurons
 def create_embedding_for_document(
     brain_id, doc_with_metadata, user_openai_api_key, file_sha1
 ):
-    neurons = Neurons()
-    doc = DocumentSerializable.from_json(doc_with_metadata)
-    created_vector = neurons.create_vector(doc, user_openai_api_key)
-    database = get_supabase_db()
-    database.set_file_sha_from_metadata(file_sha1)
+    create_embedding_for_documents_batch(
+        brain_id, [doc_with_metadata], user_openai_api_key, file_sha1
+    )
 
-    created_vector_id = created_vector[0]  # pyright: ignore reportPrivateUsage=none
 
-    brain = Brain(id=brain_id)  # pyright: ignore
-    brain.create_brain_vector(created_vector_id, file_sha1)
+@shared_task
+def create_embedding_for_documents_batch(
+    brain_id, docs_with_metadata, user_openai_api_key, file_sha1
+):
+    neurons = Neurons()
+    docs = [DocumentSerializable.from_json(doc) for doc in docs_with_metadata]
+    for doc in docs:
+        doc.metadata["file_sha1"] = file_sha1
+    neurons.create_vectors(brain_id, docs, user_openai_api_key)
@@ -1,6 +1,5 @@
 import asyncio
 import nest_asyncio
-import io
 import os
 
 from celery import Celery
@@ -10,11 +9,12 @@ from fastapi import UploadFile
 from models.databases.supabase.notifications import NotificationUpdatableProperties
 from models.files import File
 from models.notifications import NotificationsStatusEnum
-from models.settings import get_supabase_client
 from parsers.github import process_github
+from parsers.website import process_website
 from repository.brain.update_brain_last_update_time import (
     update_brain_last_update_time,
 )
+from repository.files.download_file import download_file_from_storage
 from repository.notification.update_notification import update_notification_by_id
 from repository.onboarding.remove_onboarding_more_than_x_days import (
     remove_onboarding_more_than_x_days,
@@ -67,51 +67,52 @@ def process_file_and_notify(
     brain_id,
     openai_api_key,
     notification_id=None,
+    incremental=False,
 ):
-    supabase_client = get_supabase_client()
     tmp_file_name = "tmp-file-" + file_name
     tmp_file_name = tmp_file_name.replace("/", "_")
 
-    with open(tmp_file_name, "wb+") as f:
-        res = supabase_client.storage.from_("quivr").download(file_name)
-        f.write(res)
-        f.seek(0)
-        file_content = f.read()
-        # file_object = io.BytesIO(file_content)
-        upload_file = UploadFile(
-            file=f, filename=file_name.split("/")[-1], size=len(file_content)
-        )
-        file_instance = File(file=upload_file)
-        
-        loop = asyncio.get_event_loop()
-        message = loop.run_until_complete(
-            filter_file(
-                file=file_instance,
-                enable_summarization=enable_summarization,
-                brain_id=brain_id,
-                openai_api_key=openai_api_key,
-                original_file_name=file_original_name,
+    download_file_from_storage(file_name, tmp_file_name)
+
+    try:
+        with open(tmp_file_name, "rb") as f:
+            upload_file = UploadFile(
+                file=f,
+                filename=file_name.split("/")[-1],
+                size=os.path.getsize(tmp_file_name),
             )
-        )
-        f.close()
+            file_instance = File(file=upload_file, tmp_file_path=tmp_file_name)
+
+            loop = asyncio.get_event_loop()
+            message = loop.run_until_complete(
+                filter_file(
+                    file=file_instance,
+                    enable_summarization=enable_summarization,
+                    brain_id=brain_id,
+                    openai_api_key=openai_api_key,
+                    original_file_name=file_original_name,
+                    incremental=incremental,
+                )
+            )
+    finally:
         os.remove(tmp_file_name)
 
-        if notification_id:
-            notification_message = {
-                "status": message["type"],
-                "message": message["message"],
-                "name": file_instance.file.filename if file_instance.file else "",
-            }
-            update_notification_by_id(
-                notification_id,
-                NotificationUpdatableProperties(
-                    status=NotificationsStatusEnum.Done,
-                    message=str(notification_message),
-                ),
-            )
-        update_brain_last_update_time(brain_id)
+    if notification_id:
+        notification_message = {
+            "status": message["type"],
+            "message": message["message"],
+            "name": file_instance.file.filename if file_instance.file else "",
+        }
+        update_notification_by_id(
+            notification_id,
+            NotificationUpdatableProperties(
+                status=NotificationsStatusEnum.Done,
+                message=str(notification_message),
+            ),
+        )
+    update_brain_last_update_time(brain_id)
 
-        return True
+    return True
 
 
 @celery.task(name="process_crawl_and_notify")
@@ -121,30 +122,18 @@ def process_crawl_and_notify(
     brain_id,
     openai_api_key,
     notification_id=None,
+    crawl_options=None,
 ):
-    crawl_website = CrawlWebsite(url=crawl_website_url)
+    crawl_website = CrawlWebsite(url=crawl_website_url, **(crawl_options or {}))
 
     if not crawl_website.checkGithub():
-        file_path, file_name = crawl_website.process()
-
-        with open(file_path, "rb") as f:
-            file_content = f.read()
-
-        # Create a file-like object in memory using BytesIO
-        file_object = io.BytesIO(file_content)
-        upload_file = UploadFile(
-            file=file_object, filename=file_name, size=len(file_content)
-        )
-        file_instance = File(file=upload_file)
-
         loop = asyncio.get_event_loop()
         message = loop.run_until_complete(
-            filter_file(
-                file=file_instance,
+            process_website(
+                crawl_website=crawl_website,
                 enable_summarization=enable_summarization,
                 brain_id=brain_id,
-                openai_api_key=openai_api_key,
-                original_file_name=crawl_website_url,
+                user_openai_api_key=openai_api_key,
             )
         )
     else:
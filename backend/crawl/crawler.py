@@ -1,13 +1,25 @@
+import asyncio
 import os
-import re
-import tempfile
-import unicodedata
-from urllib.parse import urljoin
+from typing import AsyncIterator, Optional
+from urllib.parse import urldefrag, urljoin, urlsplit, urlunsplit
 
-import requests
+import aiohttp
 from bs4 import BeautifulSoup
+from logger import get_logger
 from newspaper import Article
-from pydantic import BaseModel
+from pydantic import BaseModel, PrivateAttr
+
+logger = get_logger(__name__)
+
+CRAWL_CONNECTIONS_PER_HOST = int(os.getenv("CRAWL_CONNECTIONS_PER_HOST", "4"))
+CRAWL_REQUEST_TIMEOUT = int(os.getenv("CRAWL_REQUEST_TIMEOUT", "15"))
+
+
+class CrawledPage(BaseModel):
+    url: str
+    depth: int
+    content: str
+    links: list[str] = []
 
 
 class CrawlWebsite(BaseModel):
@@ -16,69 +28,169 @@ class CrawlWebsite(BaseModel):
     depth: int = int(os.getenv("CRAWL_DEPTH", "1"))
     max_pages: int = 100
     max_time: int = 60
-
-    def _crawl(self, url):
-        try:
-            response = requests.get(url)
-            if response.status_code == 200:
-                return response.text
-            else:
-                return None
-        except Exception as e:
-            print(e)
-            raise
-
-    def extract_content(self, url):
+    # Set by crawl(): whether it reached every in-scope page within `depth`
+    # (it was not cut short by max_pages or max_time), and the URLs whose
+    # fetch failed, so that their pages are not taken as removed
+    _complete: bool = PrivateAttr(default=False)
+    _failed_urls: set = PrivateAttr(default_factory=set)
+
+    @property
+    def complete(self) -> bool:
+        return self._complete
+
+    @property
+    def failed_urls(self) -> set:
+        return self._failed_urls
+
+    def _is_in_scope(self, url):
+        """
+        Whether `url` (normalized) is on the crawled website: the same scheme
+        and host, and the crawled path or one below it
+        """
+        base = urlsplit(normalize_url(self.url))
+        parts = urlsplit(url)
+        if (parts.scheme, parts.netloc) != (base.scheme, base.netloc):
+            return False
+        if base.path == "/":
+            return True
+        return parts.path == base.path or parts.path.startswith(base.path + "/")
+
+    def _parse_page(self, url, depth, html) -> CrawledPage:
+        # The same HTML feeds both the text extraction and the link extraction
         article = Article(url)
         try:
-            article.download()
+            article.download(input_html=html)
             article.parse()
+            content = article.text
         except Exception as e:
-            print(f"Error downloading or parsing article: {e}")
-            return None
-        return article.text
-
-    def _process_recursive(self, url, depth, visited_urls):
-        if depth == 0 or url in visited_urls:
-            return ""
-
-        visited_urls.add(url)
-
-        content = self.extract_content(url)
-        raw_html = self._crawl(url)
+            logger.error(f"Error parsing article {url}: {e}")
+            content = ""
+
+        soup = BeautifulSoup(html, "html.parser")
+        links = []
+        for a in soup.find_all("a", href=True):
+            link = normalize_url(urljoin(url, a["href"]))
+            if link and self._is_in_scope(link):
+                links.append(link)
+
+        return CrawledPage(url=url, depth=depth, content=content, links=links)
+
+    async def _fetch(
+        self, session: aiohttp.ClientSession, semaphores: dict, url
+    ) -> Optional[str]:
+        host = urlsplit(url).netloc
+        semaphore = semaphores.setdefault(
+            host, asyncio.Semaphore(CRAWL_CONNECTIONS_PER_HOST)
+        )
+        async with semaphore:
+            try:
+                async with session.get(url) as response:
+                    if response.status != 200:
+                        return None
+                    if "html" not in response.headers.get("Content-Type", "html"):
+                        return None
+                    return await response.text(errors="replace")
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                logger.error(f"Error fetching {url}: {e}")
+                self._failed_urls.add(url)
+                return None
 
-        if not raw_html:
-            return content
+    async def _crawl_page(self, session, semaphores, url, depth):
+        html = await self._fetch(session, semaphores, url)
+        if not html:
+            return None
 
-        soup = BeautifulSoup(raw_html, "html.parser")
-        links = [a["href"] for a in soup.find_all("a", href=True)]
-        for link in links:
-            full_url = urljoin(url, link)
-            # Ensure we're staying on the same domain
-            if self.url in full_url:
-                content += self._process_recursive(full_url, depth - 1, visited_urls)  # type: ignore
+        loop = asyncio.get_running_loop()
+        try:
+            return await loop.run_in_executor(
+                None, self._parse_page, url, depth, html
+            )
+        except Exception as e:
+            logger.error(f"Error extracting {url}: {e}")
+            return None
 
-        return content
+    async def crawl(self) -> AsyncIterator[CrawledPage]:
+        """
+        Breadth-first crawl of the website, yielding pages as they are fetched.
+        Stops after `depth` levels, `max_pages` fetched pages or `max_time`
+        seconds, whichever comes first.
+        """
+        self._complete = False
+        self._failed_urls = set()
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.max_time
+
+        root_url = normalize_url(self.url)
+        seen_urls = {root_url}
+        frontier = [root_url]
+        pages_budget = self.max_pages
+
+        timeout = aiohttp.ClientTimeout(total=CRAWL_REQUEST_TIMEOUT)
+        connector = aiohttp.TCPConnector(limit_per_host=CRAWL_CONNECTIONS_PER_HOST)
+        async with aiohttp.ClientSession(
+            timeout=timeout, connector=connector
+        ) as session:
+            semaphores = {}
+            truncated = False
+            for depth in range(self.depth):
+                truncated = truncated or len(frontier) > pages_budget
+                frontier = frontier[:pages_budget]
+                if not frontier:
+                    break
+                pages_budget -= len(frontier)
+
+                tasks = [
+                    asyncio.ensure_future(
+                        self._crawl_page(session, semaphores, url, depth)
+                    )
+                    for url in frontier
+                ]
+                next_frontier = []
+                try:
+                    for next_page in asyncio.as_completed(
+                        tasks, timeout=max(deadline - loop.time(), 0)
+                    ):
+                        page = await next_page
+                        if page is None:
+                            continue
+
+                        for link in page.links:
+                            if link not in seen_urls:
+                                seen_urls.add(link)
+                                next_frontier.append(link)
+
+                        yield page
+                except asyncio.TimeoutError:
+                    logger.warning(f"Crawl of {self.url} stopped after {self.max_time}s")
+                    return
+                finally:
+                    for task in tasks:
+                        task.cancel()
+
+                frontier = next_frontier
+
+            self._complete = not truncated
 
-    def process(self):
-        # Extract and combine content recursively
-        visited_urls = set()
-        extracted_content = self._process_recursive(self.url, self.depth, visited_urls)
+    def checkGithub(self):
+        return "github.com" in self.url
 
-        # Create a file
-        file_name = slugify(self.url) + ".txt"
-        temp_file_path = os.path.join(tempfile.gettempdir(), file_name)
-        with open(temp_file_path, "w") as temp_file:
-            temp_file.write(extracted_content)  # type: ignore
 
-        return temp_file_path, file_name
+def normalize_url(url):
+    """
+    Normalize a URL so that equivalent links are only crawled once: drop the
+    fragment, lowercase the scheme and host, remove default ports and
+    trailing slashes. Returns an empty string for non http(s) links.
+    """
+    url, _ = urldefrag(url.strip())
+    parts = urlsplit(url)
+    scheme = parts.scheme.lower()
+    if scheme not in ("http", "https"):
+        return ""
 
-    def checkGithub(self):
-        return "github.com" in self.url
+    netloc = parts.netloc.lower()
+    if (scheme, netloc.rsplit(":", 1)[-1]) in (("http", "80"), ("https", "443")):
+        netloc = netloc.rsplit(":", 1)[0]
+    path = parts.path.rstrip("/") or "/"
 
+    return urlunsplit((scheme, netloc, path, parts.query, ""))
 
-def slugify(text):
-    text = unicodedata.normalize("NFKD", text).encode("ascii", "ignore").decode("utf-8")
-    text = re.sub(r"[^\w\s-]", "", text).strip().lower()
-    text = re.sub(r"[-\s]+", "-", text)
-    return text
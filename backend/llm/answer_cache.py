@@ -0,0 +1,114 @@
+import re
+import threading
+import time
+from collections import deque
+from typing import Iterator, List, Optional, Tuple
+
+import numpy as np
+from models.settings import get_retrieval_settings
+
+AnswerCacheKey = Tuple[str, str, str]
+
+
+class SemanticAnswerCache:
+    """
+    Answers already given in a brain, looked up by similarity of the question
+    embedding. Entries are keyed by (brain_id, prompt_id, model) and tagged
+    with the brain version (its last_update): an answer given before the
+    brain's knowledge changed is never served.
+    """
+
+    def __init__(
+        self,
+        similarity_threshold: float = 0.97,
+        max_entries_per_key: int = 200,
+        ttl: int = 86400,
+    ):
+        self.similarity_threshold = similarity_threshold
+        self.max_entries_per_key = max_entries_per_key
+        self.ttl = ttl
+        self._entries: dict = {}
+        self._lock = threading.Lock()
+
+    def get(
+        self, key: AnswerCacheKey, question_embedding: List[float], version
+    ) -> Optional[str]:
+        query = np.asarray(question_embedding, dtype=np.float32)
+        query_norm = np.linalg.norm(query)
+        now = time.time()
+
+        with self._lock:
+            entries = self._entries.get(key)
+            if not entries:
+                return None
+
+            # Drop what the brain's knowledge or the ttl made stale
+            fresh = [
+                entry
+                for entry in entries
+                if entry[0] == str(version) and now - entry[1] < self.ttl
+            ]
+            if len(fresh) != len(entries):
+                entries.clear()
+                entries.extend(fresh)
+
+            best_answer, best_similarity = None, self.similarity_threshold
+            for _, _, embedding, answer in entries:
+                similarity = float(
+                    np.dot(query, embedding)
+                    / (query_norm * np.linalg.norm(embedding) or 1.0)
+                )
+                if similarity >= best_similarity:
+                    best_answer, best_similarity = answer, similarity
+
+        return best_answer
+
+    def set(
+        self,
+        key: AnswerCacheKey,
+        question_embedding: List[float],
+        version,
+        answer: str,
+    ):
+        if not answer:
+            return
+
+        with self._lock:
+            entries = self._entries.setdefault(
+                key, deque(maxlen=self.max_entries_per_key)
+            )
+            entries.append(
+                (
+                    str(version),
+                    time.time(),
+                    np.asarray(question_embedding, dtype=np.float32),
+                    answer,
+                )
+            )
+
+
+_answer_cache: Optional[SemanticAnswerCache] = None
+
+
+def get_answer_cache() -> Optional[SemanticAnswerCache]:
+    """
+    Process-wide answer cache, None unless enabled
+    """
+    global _answer_cache
+    settings = get_retrieval_settings()
+    if not settings.answer_cache_enabled:
+        return None
+    if _answer_cache is None:
+        _answer_cache = SemanticAnswerCache(
+            similarity_threshold=settings.answer_cache_similarity_threshold,
+            max_entries_per_key=settings.answer_cache_max_entries_per_brain,
+            ttl=settings.answer_cache_ttl,
+        )
+    return _answer_cache
+
+
+def iter_answer_tokens(answer: str) -> Iterator[str]:
+    """
+    Split a cached answer in word-sized pieces to replay it as a stream
+    """
+    return iter(re.findall(r"\s*\S+\s*", answer) or [answer])
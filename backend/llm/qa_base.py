@@ -3,6 +3,7 @@ import json
 from typing import Any, AsyncIterable, Awaitable, List, Optional, Tuple, Union
 from uuid import UUID
 
+import anyio
 from langchain.callbacks.streaming_aiter import AsyncIteratorCallbackHandler
 from langchain.chains import LLMChain
 from langchain.chains.question_answering import load_qa_chain
@@ -16,15 +17,15 @@ from langchain.prompts.chat import (
     SystemMessagePromptTemplate,
 )
 
-from llm.utils.get_prompt_to_use import get_prompt_to_use
-from llm.utils.get_prompt_to_use_id import get_prompt_to_use_id
+from llm.answer_cache import get_answer_cache, iter_answer_tokens
 
 from logger import get_logger
 from models import BrainSettings  # Importing settings related to the 'brain'
+from models import get_brain_settings, get_retrieval_settings, get_supabase_client
 from models.chats import ChatQuestion
 from models.databases.supabase.chats import CreateChatHistory
 from pydantic import BaseModel
-from repository.brain import get_brain_by_id, get_question_context_from_brain
+from repository.brain import get_scored_question_context_from_brain
 from repository.chat import (
     GetChatHistoryOutput,
     format_chat_history,
@@ -32,8 +33,11 @@ from repository.chat import (
     update_chat_history,
     update_message_by_id,
 )
-from supabase.client import Client, create_client
+from supabase.client import Client
 from models import get_supabase_db
+from utils.concurrency import run_blocking
+from utils.request_cache import RequestCache
+from utils.vectors import get_query_embeddings
 from vectorstore.supabase import CustomSupabaseVectorStore
 from .prompts.CONDENSE_PROMPT import CONDENSE_QUESTION_PROMPT
 
@@ -48,8 +52,7 @@ from langchain.schema.messages import (
 from langchain.schema import Document
 
 from langgraph.graph import StateGraph, END
-import operator
-from typing import AsyncIterable, TypedDict, Annotated
+from typing import AsyncIterable, TypedDict
 from langchain.tools.tavily_search import TavilySearchResults
 from langchain_core.pydantic_v1 import BaseModel, Field
 from langchain_core.utils.function_calling import convert_to_openai_tool
@@ -84,6 +87,10 @@ def _get_chat_history(chat_history: List[CHAT_TURN_TYPE]) -> str:
     return buffer
 
 
+# Messages loaded from the chat history on each turn of the graph
+CHAT_HISTORY_TURN_LIMIT = 10
+
+
 def filter_history(input_list):
     filtered_list = [
         tup for tup in input_list if not tup[0].startswith("based on your response")
@@ -108,7 +115,7 @@ class QABaseBrainPicking(BaseModel):
         arbitrary_types_allowed = True
 
     # Instantiate settings
-    brain_settings = BrainSettings()  # type: ignore other parameters are optional
+    brain_settings: BrainSettings = get_brain_settings()
 
     # Default class attributes
     model: str = None  # pyright: ignore reportPrivateUsage=none
@@ -146,14 +153,15 @@ class QABaseBrainPicking(BaseModel):
 
     @property
     def embeddings(self) -> OpenAIEmbeddings:
-        return OpenAIEmbeddings(
-            openai_api_key=self.openai_api_key
-        )  # pyright: ignore reportPrivateUsage=none
+        return get_query_embeddings(
+            OpenAIEmbeddings(openai_api_key=self.openai_api_key)  # pyright: ignore reportPrivateUsage=none
+        )
 
     supabase_client: Optional[Client] = None
     vector_store: Optional[CustomSupabaseVectorStore] = None
     qa: Optional[ConversationalRetrievalChain] = None
     prompt_id: Optional[UUID]
+    request_cache: Optional[RequestCache] = None
 
     def __init__(
         self,
@@ -162,6 +170,7 @@ class QABaseBrainPicking(BaseModel):
         chat_id: str,
         streaming: bool = False,
         prompt_id: Optional[UUID] = None,
+        request_cache: Optional[RequestCache] = None,
         **kwargs,
     ):
         super().__init__(
@@ -174,19 +183,23 @@ class QABaseBrainPicking(BaseModel):
         self.supabase_client = self._create_supabase_client()
         self.vector_store = self._create_vector_store()
         self.prompt_id = prompt_id
+        # Shared with the route so the brain and prompt are fetched once per request
+        self.request_cache = request_cache or RequestCache()
 
     @property
     def prompt_to_use(self):
-        return get_prompt_to_use(UUID(self.brain_id), self.prompt_id)
+        return self.request_cache.get_prompt_to_use(
+            UUID(self.brain_id), self.prompt_id
+        )
 
     @property
     def prompt_to_use_id(self) -> Optional[UUID]:
-        return get_prompt_to_use_id(UUID(self.brain_id), self.prompt_id)
+        return self.request_cache.get_prompt_to_use_id(
+            UUID(self.brain_id), self.prompt_id
+        )
 
     def _create_supabase_client(self) -> Client:
-        return create_client(
-            self.brain_settings.supabase_url, self.brain_settings.supabase_service_key
-        )
+        return get_supabase_client()
 
     def _create_vector_store(self) -> CustomSupabaseVectorStore:
         return CustomSupabaseVectorStore(
@@ -194,6 +207,7 @@ class QABaseBrainPicking(BaseModel):
             self.embeddings,  # type: ignore
             table_name="vectors",
             brain_id=self.brain_id,
+            database=get_supabase_db(),
         )
 
     def _create_llm(
@@ -239,9 +253,23 @@ class QABaseBrainPicking(BaseModel):
         CHAT_PROMPT = ChatPromptTemplate.from_messages(messages)
         return CHAT_PROMPT
 
-    def generate_answer(
-        self, chat_id: UUID, question: ChatQuestion
-    ) -> GetChatHistoryOutput:
+    def _answer_cache_context(self, answer_cache, brain, question: str, model: str):
+        """
+        Key, question embedding and brain version to use with the answer cache,
+        None when the cache is disabled or the question may depend on the
+        conversation. Only the first question of a chat is cached, as follow-ups
+        like "tell me more" mean something else in every chat.
+        """
+        if not answer_cache or not brain or question.startswith("based on your response"):
+            return None
+        if get_chat_history(self.chat_id, limit=1):
+            return None
+
+        key = (str(brain.brain_id), str(self.prompt_to_use_id), model)
+        question_embedding = get_query_embeddings().embed_query(question)
+        return key, question_embedding, brain.last_update
+
+    def _generate_answer_from_brain(self, question: ChatQuestion) -> str:
         transformed_history = format_chat_history(get_chat_history(self.chat_id))
         answering_llm = self._create_llm(
             model=self.model, streaming=False, callbacks=self.callbacks
@@ -263,19 +291,36 @@ class QABaseBrainPicking(BaseModel):
             rephrase_question=False,
         )
 
-        prompt_content = (
-            self.prompt_to_use.content if self.prompt_to_use else QUIVR_DEFAULT_PROMPT
-        )
-
         model_response = qa(
             {
                 "question": question.question,
                 "chat_history": transformed_history,
-                # "custom_personality": prompt_content,
             }
         )  # type: ignore
 
-        answer = model_response["answer"]
+        return model_response["answer"]
+
+    def generate_answer(
+        self, chat_id: UUID, question: ChatQuestion
+    ) -> GetChatHistoryOutput:
+        brain = None
+
+        if question.brain_id:
+            brain = self.request_cache.get_brain(question.brain_id)
+
+        answer_cache = get_answer_cache()
+        answer_cache_context = self._answer_cache_context(
+            answer_cache, brain, question.question, self.model
+        )
+        answer = (
+            answer_cache.get(*answer_cache_context)  # type: ignore
+            if answer_cache_context
+            else None
+        )
+        if answer is None:
+            answer = self._generate_answer_from_brain(question)
+            if answer_cache_context:
+                answer_cache.set(*answer_cache_context, answer)  # type: ignore
 
         new_chat = update_chat_history(
             CreateChatHistory(
@@ -289,11 +334,6 @@ class QABaseBrainPicking(BaseModel):
             )
         )
 
-        brain = None
-
-        if question.brain_id:
-            brain = get_brain_by_id(question.brain_id)
-
         return GetChatHistoryOutput(
             **{
                 "chat_id": chat_id,
@@ -402,12 +442,14 @@ class QABaseBrainPicking(BaseModel):
             brain: Any | None
             chat_history: str
             docs: list
+            scores: list[float]
             messages: list[str]
-            response: Annotated[str, operator.add]
             run_web_search:str
 
         def get_chat_history_node(state):
-            history = get_chat_history(state['chat_id'])
+            # Only the last two exchanges are kept, a few more are loaded in
+            # case some are follow ups filtered out below
+            history = get_chat_history(state['chat_id'], limit=CHAT_HISTORY_TURN_LIMIT)
             transformed_history = format_chat_history(history)
             filtered_transformed_history = filter_history(transformed_history)
             limited_history = filtered_transformed_history[-2:]
@@ -415,12 +457,29 @@ class QABaseBrainPicking(BaseModel):
             return {'chat_history': chat_history}
 
         def get_context_node(state):
-            context_response_similarity = get_question_context_from_brain(state['brain'], state['question'], state['file_names'])  # type: ignore
-            return {'docs': context_response_similarity}
+            context_response_similarity = get_scored_question_context_from_brain(state['brain'], state['question'], state['file_names'])  # type: ignore
+            return {
+                'docs': [doc for doc, _ in context_response_similarity],
+                'scores': [score for _, score in context_response_similarity],
+            }
 
-        def grade_documents(state):
+        async def grade_documents(state):
             question = state["question"]
-            documents = state["docs"]
+            retrieval_settings = get_retrieval_settings()
+
+            # Only the documents in the ambiguous similarity band go to the grader
+            relevant_docs = []
+            documents = []
+            search = "No" # Default do not opt for web search to supplement retrieval
+            for d, similarity in zip(state["docs"], state["scores"]):
+                if similarity >= retrieval_settings.grading_high_threshold:
+                    relevant_docs.append(d)
+                elif similarity < retrieval_settings.grading_low_threshold:
+                    search = "Yes"
+                else:
+                    documents.append(d)
+            if not documents:
+                return {"docs": relevant_docs, "run_web_search": search}
 
             #Data model
             class grade(BaseModel):
@@ -452,19 +511,30 @@ class QABaseBrainPicking(BaseModel):
             #Chain
             chain = prompt | llm_with_tool | parser_tool
             
-            #Score
-            filtered_docs = []
-            search = "No" # Default do not opt for web search to supplement retrieval
-            for d in documents:
-                score = chain.invoke({"question": question, "context": d.page_content})
-                grade = score[0].binary_score
-                if grade == "yes":
-                    print("--GRADE: DOCUHENT RELEVANT--")
-                    filtered_docs.append(d)
-                else:
+            #Score all the documents concurrently, a document that can't be
+            #graded in time is treated as relevant
+            inputs = [{"question": question, "context": d.page_content} for d in documents]
+            try:
+                scores = await asyncio.wait_for(
+                    chain.abatch(
+                        inputs,
+                        config={"max_concurrency": retrieval_settings.grading_max_concurrency},
+                        return_exceptions=True,
+                    ),
+                    timeout=retrieval_settings.grading_timeout,
+                )
+            except asyncio.TimeoutError:
+                logger.warning("Grading timed out, keeping every document")
+                scores = [None] * len(documents)
+
+            filtered_docs = relevant_docs
+            for d, score in zip(documents, scores):
+                if isinstance(score, list) and score and score[0].binary_score != "yes":
                     print("--GRADE: DOCUMENT NOT RELEVANT-—-")
                     search = "Yes" # Perform web search
                     continue
+                print("--GRADE: DOCUHENT RELEVANT--")
+                filtered_docs.append(d)
             return {"docs":filtered_docs, "run_web_search": search}
         
         def transform_query(state):
@@ -511,14 +581,6 @@ class QABaseBrainPicking(BaseModel):
                 ]
             return {'messages': messages}
                 
-        def stream_response_node(state):
-            chat_llm = ChatOpenAI(model=state['model'], openai_api_key=os.getenv("OPENAI_API_KEY"))
-            response_tokens = []
-            for chunk in chat_llm.stream(state['messages']):
-                print('CHUNK:',chunk.content)
-                response_tokens.append(chunk.content)
-            return {'response': "".join(response_tokens)}
-        
         # Create graph
         graph = StateGraph(ChatState)
 
@@ -526,7 +588,6 @@ class QABaseBrainPicking(BaseModel):
         graph.add_node("get_chat_history", get_chat_history_node)
         graph.add_node("get_context", get_context_node)
         graph.add_node("generate_messages", generate_messages_node)
-        graph.add_node("stream_response", stream_response_node)
         graph.add_node("transform_query", transform_query)
         graph.add_node("web_search", web_search)
         graph.add_node("grade_documents", grade_documents)
@@ -544,8 +605,8 @@ class QABaseBrainPicking(BaseModel):
         )
         graph.add_edge("transform_query", "web_search")
         graph.add_edge("web_search", "generate_messages")
-        graph.add_edge("generate_messages", "stream_response")
-        graph.add_edge("stream_response", END)
+        # The answer itself is streamed from the model outside of the graph
+        graph.add_edge("generate_messages", END)
 
         # Set entry point
         graph.set_entry_point("get_chat_history")
@@ -554,10 +615,19 @@ class QABaseBrainPicking(BaseModel):
         model = question.model
         user_question = question.question
         # prompt_content = question.prompt_to_use.content if question.prompt_to_use else None
-        prompt_content = self.prompt_to_use.content if self.prompt_to_use else None
-        brain = get_brain_by_id(question.brain_id) if question.brain_id else None
+        # The database and embeddings calls below are blocking, they run in a
+        # worker thread to keep the other streams of the event loop flowing
+        prompt_to_use = await run_blocking(lambda: self.prompt_to_use)
+        prompt_content = prompt_to_use.content if prompt_to_use else None
+        brain = await run_blocking(self.request_cache.get_brain, question.brain_id)
+        # Looked up before the question is added to the chat history
+        answer_cache = get_answer_cache()
+        answer_cache_context = await run_blocking(
+            self._answer_cache_context, answer_cache, brain, user_question, model
+        )
 
-        streamed_chat_history = update_chat_history(
+        streamed_chat_history = await run_blocking(
+            update_chat_history,
             CreateChatHistory(
                 **{
                     "chat_id": chat_id,
@@ -566,7 +636,7 @@ class QABaseBrainPicking(BaseModel):
                     "brain_id": question.brain_id,
                     "prompt_id": self.prompt_to_use_id,
                 }
-            )
+            ),
         )
 
         streamed_chat_history = GetChatHistoryOutput(
@@ -576,13 +646,29 @@ class QABaseBrainPicking(BaseModel):
                 "message_time": streamed_chat_history.message_time,
                 "user_message": question.question,
                 "assistant": "",
-                "prompt_title": (
-                    self.prompt_to_use.title if self.prompt_to_use else None
-                ),
+                "prompt_title": prompt_to_use.title if prompt_to_use else None,
                 "brain_name": brain.name if brain else None,
             }
         )
 
+        cached_answer = (
+            answer_cache.get(*answer_cache_context)  # type: ignore
+            if answer_cache_context
+            else None
+        )
+        if cached_answer is not None:
+            # Replayed through the same SSE format as a generated answer
+            for token in iter_answer_tokens(cached_answer):
+                streamed_chat_history.assistant = token
+                yield f"data: {json.dumps(streamed_chat_history.dict())}"
+            await run_blocking(
+                update_message_by_id,
+                message_id=str(streamed_chat_history.message_id),
+                user_message=question.question,
+                assistant=cached_answer,
+            )
+            return
+
         initial_state = {
             'chat_id': chat_id,
             'question': user_question,
@@ -592,22 +678,29 @@ class QABaseBrainPicking(BaseModel):
             'brain': brain.brain_id, # type: ignore
             'chat_history': '',
             'docs': [],
+            'scores': [],
             'messages': '',
-            'response': ''
         }
         # Compile graph
         runnable = graph.compile()
-        async for output in runnable.astream(initial_state):
-            key = ', '.join(list(output.keys()))
-            if key=='stream_response':
-                response = output['stream_response']
-                assistant = response['response']
-                update_message_by_id(
+        final_state = await runnable.ainvoke(initial_state)
+
+        chat_llm = ChatOpenAI(model=model, openai_api_key=os.getenv("OPENAI_API_KEY"))  # type: ignore
+        response_tokens = []
+        try:
+            async for chunk in chat_llm.astream(final_state["messages"]):
+                response_tokens.append(chunk.content)
+                streamed_chat_history.assistant = chunk.content
+                yield f"data: {json.dumps(streamed_chat_history.dict())}"
+            if answer_cache_context:
+                answer_cache.set(*answer_cache_context, "".join(response_tokens))  # type: ignore
+        finally:
+            # Persisted once, with whatever was generated if the client left,
+            # shielded as the stream is cancelled when the client disconnects
+            with anyio.CancelScope(shield=True):
+                await run_blocking(
+                    update_message_by_id,
                     message_id=str(streamed_chat_history.message_id),
                     user_message=question.question,
-                    assistant=assistant,
+                    assistant="".join(response_tokens),
                 )
-                for chunk in assistant.split(' '):
-                    streamed_chat_history.assistant = chunk + ' '
-                    returnValue = f"data: {json.dumps(streamed_chat_history.dict())}"
-                    yield returnValue
\ No newline at end of file
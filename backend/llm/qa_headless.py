@@ -8,8 +8,6 @@ from langchain.chains import LLMChain
 from langchain.chat_models import ChatLiteLLM
 from langchain.chat_models.base import BaseChatModel
 from langchain.prompts.chat import ChatPromptTemplate, HumanMessagePromptTemplate
-from llm.utils.get_prompt_to_use import get_prompt_to_use
-from llm.utils.get_prompt_to_use_id import get_prompt_to_use_id
 from logger import get_logger
 from models.chats import ChatQuestion
 from models.databases.supabase.chats import CreateChatHistory
@@ -23,6 +21,8 @@ from repository.chat import (
     update_chat_history,
     update_message_by_id,
 )
+from utils.concurrency import run_blocking
+from utils.request_cache import RequestCache
 
 logger = get_logger(__name__)
 SYSTEM_MESSAGE = "Your name is Quivr. You're a helpful assistant. If you don't know the answer, just say that you don't know, don't try to make up an answer.When answering use markdown or any other techniques to display the content in a nice and aerated way."
@@ -39,6 +39,7 @@ class HeadlessQA(BaseModel):
     file_paths: List[str]
     callbacks: Optional[List[AsyncIteratorCallbackHandler]] = None
     prompt_id: Optional[UUID] = None
+    request_cache: Optional[RequestCache] = None
 
     def _determine_api_key(self, openai_api_key, user_openai_api_key):
         """If user provided an API key, use it."""
@@ -69,14 +70,15 @@ class HeadlessQA(BaseModel):
         )
         self.streaming = self._determine_streaming(self.streaming)
         self.callbacks = self._determine_callback_array(self.streaming)
+        self.request_cache = self.request_cache or RequestCache()
 
     @property
     def prompt_to_use(self) -> Optional[Prompt]:
-        return get_prompt_to_use(None, self.prompt_id)
+        return self.request_cache.get_prompt_to_use(None, self.prompt_id)
 
     @property
     def prompt_to_use_id(self) -> Optional[UUID]:
-        return get_prompt_to_use_id(None, self.prompt_id)
+        return self.request_cache.get_prompt_to_use_id(None, self.prompt_id)
 
     def _create_llm(
         self, model, temperature=0, streaming=False, callbacks=None
@@ -153,10 +155,11 @@ class HeadlessQA(BaseModel):
         callback = AsyncIteratorCallbackHandler()
         self.callbacks = [callback]
 
-        transformed_history = format_chat_history(get_chat_history(self.chat_id))
-        prompt_content = (
-            self.prompt_to_use.content if self.prompt_to_use else SYSTEM_MESSAGE
-        )
+        # The database calls are blocking, they run in a worker thread
+        chat_history = await run_blocking(get_chat_history, self.chat_id)
+        transformed_history = format_chat_history(chat_history)
+        prompt_to_use = await run_blocking(lambda: self.prompt_to_use)
+        prompt_content = prompt_to_use.content if prompt_to_use else SYSTEM_MESSAGE
 
         messages = format_history_to_openai_mesages(
             transformed_history, prompt_content, question.question
@@ -187,7 +190,8 @@ class HeadlessQA(BaseModel):
             ),
         )
 
-        streamed_chat_history = update_chat_history(
+        streamed_chat_history = await run_blocking(
+            update_chat_history,
             CreateChatHistory(
                 **{
                     "chat_id": chat_id,
@@ -196,7 +200,7 @@ class HeadlessQA(BaseModel):
                     "brain_id": None,
                     "prompt_id": self.prompt_to_use_id,
                 }
-            )
+            ),
         )
 
         streamed_chat_history = GetChatHistoryOutput(
@@ -206,9 +210,7 @@ class HeadlessQA(BaseModel):
                 "message_time": streamed_chat_history.message_time,
                 "user_message": question.question,
                 "assistant": "",
-                "prompt_title": self.prompt_to_use.title
-                if self.prompt_to_use
-                else None,
+                "prompt_title": prompt_to_use.title if prompt_to_use else None,
                 "brain_name": None,
             }
         )
@@ -222,7 +224,8 @@ class HeadlessQA(BaseModel):
         await run
         assistant = "".join(response_tokens)
 
-        update_message_by_id(
+        await run_blocking(
+            update_message_by_id,
             message_id=str(streamed_chat_history.message_id),
             user_message=question.question,
             assistant=assistant,
@@ -7,6 +7,7 @@ from celery_worker import process_file_and_notify
 from models.databases.supabase.knowledge import CreateKnowledgeProperties
 from repository.files.upload_file import upload_file_storage
 from repository.knowledge.add_knowledge import add_knowledge
+from repository.knowledge.get_all_knowledge import knowledge_file_exists_in_brain
 
 if __name__ == "__main__":
     # import needed here when running main.py to debug backend
@@ -127,7 +128,9 @@ async def hello(request: Request):
         extension=".txt",
     )
     filename_with_brain_id = str(brain_id) + "/" + str(file_name) + '.txt'
-    added_knowledge = add_knowledge(knowledge_to_add)
+    # Google Drive documents are re-synced: keep a single knowledge entry per file
+    if not knowledge_file_exists_in_brain(brain_id, f'{file_name}.txt'):  # type: ignore
+        add_knowledge(knowledge_to_add)
     #get file content
     response = requests.get(file_content_link)
 
@@ -154,7 +157,9 @@ async def hello(request: Request):
     print("File removed successfully")
     file_content_encoded = file_content.encode('utf-8')
     try:
-        fileInStorage = upload_file_storage(file_content_encoded, filename_with_brain_id)
+        fileInStorage = upload_file_storage(
+            file_content_encoded, filename_with_brain_id, upsert=True
+        )
         logger.info(f"File {fileInStorage} uploaded successfully")
 
     except Exception as e:
@@ -175,6 +180,7 @@ async def hello(request: Request):
         brain_id=brain_id,
         openai_api_key=os.getenv('OPENAI_API_KEY'),
         notification_id=None,
+        incremental=True,
     )
     return {'content':file_content,'filename':file_name}
     
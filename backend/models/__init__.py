@@ -5,9 +5,12 @@ from .chat import Chat, ChatHistory
 from .chats import ChatMessage, ChatQuestion
 from .files import File
 from .prompt import Prompt, PromptStatusEnum
-from .settings import (BrainRateLimiting, BrainSettings, LLMSettings,
+from .settings import (BrainRateLimiting, BrainSettings, IngestionSettings,
+                       LLMSettings, RetrievalSettings, get_brain_settings,
                        get_documents_vector_store, get_embeddings,
-                       get_supabase_client, get_supabase_db)
+                       get_ingestion_settings, get_pg_engine,
+                       get_retrieval_settings, get_supabase_client,
+                       get_supabase_db)
 from .user_identity import UserIdentity
 from .user_usage import UserUsage
 
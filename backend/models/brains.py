@@ -4,7 +4,7 @@ from uuid import UUID
 from logger import get_logger
 from pydantic import BaseModel
 from supabase.client import Client
-from utils.vectors import get_unique_files_from_vector_ids
+from utils.brain_authorization_cache import invalidate_brain_authorization
 
 from models.databases.supabase.supabase import SupabaseDB
 from models.settings import get_supabase_client, get_supabase_db
@@ -37,10 +37,7 @@ class Brain(BaseModel):
 
     @property
     def brain_size(self):
-        self.get_unique_brain_files()
-        current_brain_size = sum(float(doc["size"]) for doc in self.files)
-
-        return current_brain_size
+        return float(self.supabase_db.get_brain_size(self.id))  # type: ignore
 
     @classmethod
     def create(cls, *args, **kwargs):
@@ -72,6 +69,7 @@ class Brain(BaseModel):
             self.supabase_client.table("brains_users").delete().match(
                 {"brain_id": self.id, "user_id": user_id}
             ).execute()
+            invalidate_brain_authorization(self.id, user_id)  # type: ignore
 
     def delete_brain(self, user_id):
         results = self.supabase_db.delete_brain_user_by_id(user_id, self.id)  # type: ignore
@@ -82,13 +80,26 @@ class Brain(BaseModel):
             self.supabase_db.delete_brain_vector(self.id)  # type: ignore
             self.supabase_db.delete_brain_users(self.id)  # type: ignore
             self.supabase_db.delete_brain(self.id)  # type: ignore
+            invalidate_brain_authorization(self.id)  # type: ignore
 
     def create_brain_vector(self, vector_id, file_sha1):
         return self.supabase_db.create_brain_vector(self.id, vector_id, file_sha1)  # type: ignore
 
+    def create_brain_vectors(self, vector_ids, file_sha1):
+        return self.supabase_db.create_brain_vectors(self.id, vector_ids, file_sha1)  # type: ignore
+
     def get_vector_ids_from_file_sha1(self, file_sha1: str):
         return self.supabase_db.get_vector_ids_from_file_sha1(file_sha1)
 
+    def get_file_vectors(self, file_name: str):
+        return self.supabase_db.get_brain_vectors_by_file_name(self.id, file_name)  # type: ignore
+
+    def update_brain_vectors_file_sha1(self, vector_ids, file_sha1):
+        return self.supabase_db.update_brain_vectors_file_sha1(self.id, vector_ids, file_sha1)  # type: ignore
+
+    def delete_brain_vectors_by_ids(self, vector_ids):
+        return self.supabase_db.delete_brain_vectors_by_ids(self.id, vector_ids)  # type: ignore
+
     def update_brain_with_file(self, file_sha1: str):
         # not  used
         vector_ids = self.get_vector_ids_from_file_sha1(file_sha1)
@@ -100,8 +111,12 @@ class Brain(BaseModel):
         Retrieve unique brain data (i.e. uploaded files and crawled websites).
         """
 
-        vector_ids = self.supabase_db.get_brain_vector_ids(self.id)  # type: ignore
-        self.files = get_unique_files_from_vector_ids(vector_ids)
+        # A repository or a website holds several files under its name
+        sizes: dict = {}
+        for brain_file in self.supabase_db.get_brain_files(self.id):  # type: ignore
+            name = brain_file["file_name"]
+            sizes[name] = sizes.get(name, 0) + int(brain_file["file_size"])
+        self.files = [{"name": name, "size": size} for name, size in sizes.items()]
 
         return self.files
 
@@ -115,7 +130,4 @@ class Brain(BaseModel):
         Retrieve unique brain data (i.e. uploaded files and crawled websites).
         """
 
-        vector_ids = self.supabase_db.get_brain_vector_ids(self.id)  # type: ignore
-        self.files = get_unique_files_from_vector_ids(vector_ids)
-
-        return self.files
+        return self.get_unique_brain_files()
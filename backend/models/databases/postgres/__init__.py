@@ -0,0 +1 @@
+from models.databases.postgres.postgres import PostgresDB
@@ -0,0 +1,244 @@
+import re
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Optional
+from uuid import UUID
+
+from models.brain_entity import MinimalBrainEntity
+from models.databases.supabase.supabase import SupabaseDB
+from postgrest import APIResponse
+from sqlalchemy import text
+from sqlalchemy.engine import Engine
+
+# The statements are built once, so SQLAlchemy reuses their compiled form,
+# and values are always passed as bound parameters.
+# The history is read oldest first, or latest first when only the last
+# messages are wanted (a NULL limit means no limit).
+CHAT_HISTORY_SQL = """
+    select * from chat_history
+    where chat_id = :chat_id
+    and (cast(:before as timestamptz) is null
+        or message_time < cast(:before as timestamptz))
+    and (cast(:after as timestamptz) is null
+        or message_time > cast(:after as timestamptz))
+    order by message_time {order}
+    limit :limit
+"""
+GET_CHAT_HISTORY = text(CHAT_HISTORY_SQL.format(order="asc"))
+GET_LATEST_CHAT_HISTORY = text(CHAT_HISTORY_SQL.format(order="desc"))
+
+GET_BRAIN_FOR_USER = text(
+    """
+    select b.brain_id as id, b.name, b.status, bu.rights
+    from brains_users bu
+    join brains b on b.brain_id = bu.brain_id
+    where bu.user_id = :user_id and bu.brain_id = :brain_id
+    """
+)
+GET_BRAIN_DETAILS = text(
+    "select b.brain_id as id, b.* from brains b where b.brain_id = :brain_id"
+)
+
+CREATE_BRAIN_VECTORS = text(
+    """
+    insert into brains_vectors (brain_id, vector_id, file_sha1)
+    select cast(:brain_id as uuid), vector_id, :file_sha1
+    from unnest(cast(:vector_ids as uuid[])) as vector_id
+    returning *
+    """
+)
+UPDATE_BRAIN_VECTORS_FILE_SHA1 = text(
+    """
+    update brains_vectors set file_sha1 = :file_sha1
+    where brain_id = :brain_id and vector_id = any(cast(:vector_ids as uuid[]))
+    returning *
+    """
+)
+DELETE_BRAIN_VECTORS = text(
+    """
+    delete from brains_vectors
+    where brain_id = :brain_id and vector_id = any(cast(:vector_ids as uuid[]))
+    """
+)
+DELETE_ORPHAN_VECTORS = text(
+    """
+    delete from vectors v
+    where v.id = any(cast(:vector_ids as uuid[]))
+    and not exists (select 1 from brains_vectors bv where bv.vector_id = v.id)
+    """
+)
+GET_BRAIN_FILE_SHA1S = text(
+    """
+    select distinct file_sha1 from brains_vectors
+    where brain_id = :brain_id and file_sha1 = any(cast(:file_sha1s as text[]))
+    """
+)
+
+# Retrieval of the chat, the vectors of a brain closest to the question
+MATCH_BRAIN_VECTORS_SQL = """
+    select * from {function}(
+        query_embedding => cast(:query_embedding as vector),
+        match_count => :match_count,
+        p_brain_id => cast(:brain_id as uuid),
+        p_file_names => cast(:file_names as text[])
+    )
+"""
+_FUNCTION_NAME = re.compile(r"^[a-z_][a-z0-9_]*$")
+
+
+def _to_record(row) -> dict:
+    """
+    A row as the dict PostgREST would have returned for it
+    """
+    record = {}
+    for key, value in row._mapping.items():
+        if isinstance(value, (datetime, date)):
+            value = value.isoformat()
+        elif isinstance(value, UUID):
+            value = str(value)
+        elif isinstance(value, Decimal):
+            value = float(value)
+        record[key] = value
+    return record
+
+
+class PostgresDB(SupabaseDB):
+    """
+    SupabaseDB running its hot queries (chat history, brain authorization,
+    brain vector links and the retrieval match) over a pooled direct Postgres
+    connection instead of PostgREST. Every other query still goes through
+    the supabase client.
+
+    Results keep the shape of the supabase ones, so callers can't tell which
+    backend served them.
+    """
+
+    def __init__(self, supabase_client, engine: Engine):
+        super().__init__(supabase_client)
+        self.engine = engine
+        self._match_statements: dict = {}
+
+    def _fetch_all(self, statement, **params) -> list[dict]:
+        with self.engine.connect() as connection:
+            return [
+                _to_record(row) for row in connection.execute(statement, params)
+            ]
+
+    def get_chat_history(
+        self,
+        chat_id: str,
+        limit: Optional[int] = None,
+        before: Optional[str] = None,
+        after: Optional[str] = None,
+    ):
+        latest_first = limit is not None and after is None
+        history = self._fetch_all(
+            GET_LATEST_CHAT_HISTORY if latest_first else GET_CHAT_HISTORY,
+            chat_id=str(chat_id),
+            before=before,
+            after=after,
+            limit=limit,
+        )
+        if latest_first:
+            history.reverse()
+
+        return APIResponse(data=history)
+
+    def get_brain_for_user(  # type: ignore
+        self, user_id, brain_id
+    ) -> MinimalBrainEntity | None:
+        brains = self._fetch_all(
+            GET_BRAIN_FOR_USER, user_id=str(user_id), brain_id=str(brain_id)
+        )
+        if len(brains) == 0:
+            return None
+
+        return MinimalBrainEntity(**brains[0])
+
+    def get_brain_details(self, brain_id):
+        return self._fetch_all(GET_BRAIN_DETAILS, brain_id=str(brain_id))
+
+    def create_brain_vector(self, brain_id, vector_id, file_sha1):
+        return self.create_brain_vectors(brain_id, [vector_id], file_sha1)
+
+    def create_brain_vectors(self, brain_id, vector_ids, file_sha1):
+        if not vector_ids:
+            return []
+
+        with self.engine.begin() as connection:
+            rows = connection.execute(
+                CREATE_BRAIN_VECTORS,
+                {
+                    "brain_id": str(brain_id),
+                    "vector_ids": [str(vector_id) for vector_id in vector_ids],
+                    "file_sha1": file_sha1,
+                },
+            )
+            return [_to_record(row) for row in rows]
+
+    def update_brain_vectors_file_sha1(self, brain_id, vector_ids, file_sha1):
+        if not vector_ids:
+            return []
+
+        with self.engine.begin() as connection:
+            rows = connection.execute(
+                UPDATE_BRAIN_VECTORS_FILE_SHA1,
+                {
+                    "brain_id": str(brain_id),
+                    "vector_ids": [str(vector_id) for vector_id in vector_ids],
+                    "file_sha1": file_sha1,
+                },
+            )
+            return [_to_record(row) for row in rows]
+
+    def delete_brain_vectors_by_ids(self, brain_id, vector_ids):
+        """
+        Unlink vectors from a brain and delete the ones no other brain uses,
+        in one transaction. The links go first, in their own statement, as the
+        brain files inventory triggers still need the vectors of removed links.
+        """
+        if not vector_ids:
+            return
+
+        vector_ids = [str(vector_id) for vector_id in vector_ids]
+        with self.engine.begin() as connection:
+            connection.execute(
+                DELETE_BRAIN_VECTORS,
+                {"brain_id": str(brain_id), "vector_ids": vector_ids},
+            )
+            connection.execute(DELETE_ORPHAN_VECTORS, {"vector_ids": vector_ids})
+
+    def get_brain_file_sha1s(self, brain_id, file_sha1s):
+        if not file_sha1s:
+            return set()
+
+        rows = self._fetch_all(
+            GET_BRAIN_FILE_SHA1S, brain_id=str(brain_id), file_sha1s=list(file_sha1s)
+        )
+        return {row["file_sha1"] for row in rows}
+
+    def match_brain_vectors(
+        self,
+        query_embedding,
+        brain_id,
+        file_names,
+        top_k,
+        table="match_vectors_filtering",
+    ):
+        statement = self._match_statements.get(table)
+        if statement is None:
+            # The function name can't be bound, only known names get in the SQL
+            if not _FUNCTION_NAME.match(table):
+                raise ValueError(f"Invalid vectors matching function: {table}")
+            statement = self._match_statements[table] = text(
+                MATCH_BRAIN_VECTORS_SQL.format(function=table)
+            )
+
+        matches = self._fetch_all(
+            statement,
+            query_embedding=str(list(query_embedding)),
+            match_count=top_k,
+            brain_id=str(brain_id),
+            file_names=list(file_names or []),
+        )
+        return APIResponse(data=matches)
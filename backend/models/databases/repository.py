@@ -1,5 +1,6 @@
 from abc import ABC, abstractmethod
 from datetime import datetime
+from typing import Optional
 from uuid import UUID
 
 from models.brain_entity import BrainEntity
@@ -44,6 +45,26 @@ class Repository(ABC):
     def create_brain_vector(self, brain_id: UUID, vector_id: UUID, file_sha1: str):
         pass
 
+    @abstractmethod
+    def create_brain_vectors(
+        self, brain_id: UUID, vector_ids: list[UUID], file_sha1: str
+    ):
+        pass
+
+    @abstractmethod
+    def update_brain_vectors_file_sha1(
+        self, brain_id: UUID, vector_ids: list[UUID], file_sha1: str
+    ):
+        pass
+
+    @abstractmethod
+    def delete_brain_vectors_by_ids(self, brain_id: UUID, vector_ids: list[UUID]):
+        pass
+
+    @abstractmethod
+    def get_brain_file_sha1s(self, brain_id: UUID, file_sha1s: list[str]):
+        pass
+
     @abstractmethod
     def get_vector_ids_from_file_sha1(self, file_sha1: str):
         pass
@@ -52,6 +73,14 @@ class Repository(ABC):
     def get_brain_vector_ids(self, brain_id: UUID):
         pass
 
+    @abstractmethod
+    def get_brain_files(self, brain_id: UUID):
+        pass
+
+    @abstractmethod
+    def get_brain_size(self, brain_id: UUID):
+        pass
+
     @abstractmethod
     def delete_file_from_brain(self, brain_id: UUID, file_name: str):
         pass
@@ -64,6 +93,10 @@ class Repository(ABC):
     def get_brain_by_id(self, brain_id: UUID):
         pass
 
+    @abstractmethod
+    def get_brains_names_by_ids(self, brain_ids: list[UUID]):
+        pass
+
     @abstractmethod
     def create_user_daily_usage(self, user_id: UUID, user_email: str, date: datetime):
         pass
@@ -80,6 +113,10 @@ class Repository(ABC):
     def update_user_request_count(self, user_id: UUID, date: str):
         pass
 
+    @abstractmethod
+    def increment_user_daily_usage(self, user_id: UUID, user_email: str, date: str):
+        pass
+
     @abstractmethod
     def increment_user_request_count(
         self, user_id: UUID, date: str, current_request_count
@@ -143,7 +180,13 @@ class Repository(ABC):
         pass
 
     @abstractmethod
-    def get_chat_history(self, chat_id: str):
+    def get_chat_history(
+        self,
+        chat_id: str,
+        limit: Optional[int] = None,
+        before: Optional[str] = None,
+        after: Optional[str] = None,
+    ):
         pass
 
     @abstractmethod
@@ -188,6 +231,17 @@ class Repository(ABC):
     ):
         pass
 
+    @abstractmethod
+    def match_brain_vectors(
+        self,
+        query_embedding,
+        brain_id: UUID,
+        file_names: list,
+        top_k: int,
+        table: str = "match_vectors_filtering",
+    ):
+        pass
+
     @abstractmethod
     def update_summary(self, document_id: UUID, summary_id: int):
         pass
@@ -204,6 +258,30 @@ class Repository(ABC):
     def get_vectors_by_file_sha1(self, file_sha1):
         pass
 
+    @abstractmethod
+    def get_vector_ids_by_file_sha1s(self, file_sha1s: list[str]):
+        pass
+
+    @abstractmethod
+    def get_brain_vectors_by_file_name(self, brain_id: UUID, file_name: str):
+        pass
+
+    @abstractmethod
+    def get_embeddings_by_chunk_sha1s(
+        self, chunk_sha1s: list[str], embedding_model: str
+    ):
+        pass
+
+    @abstractmethod
+    def create_vectors(self, brain_id: UUID, vectors: list[dict]) -> list[str]:
+        pass
+
+    @abstractmethod
+    def update_vectors_file_version(
+        self, vector_ids: list[UUID], file_sha1: str, file_size: int
+    ):
+        pass
+
     @abstractmethod
     def create_prompt(self, new_prompt):
         pass
@@ -212,6 +290,10 @@ class Repository(ABC):
     def get_prompt_by_id(self, prompt_id: UUID):
         pass
 
+    @abstractmethod
+    def get_prompts_titles_by_ids(self, prompt_ids: list[UUID]):
+        pass
+
     @abstractmethod
     def delete_prompt_by_id(self, prompt_id: UUID):
         pass
@@ -241,7 +323,13 @@ class Repository(ABC):
         pass
 
     @abstractmethod
-    def get_notifications_by_chat_id(self, chat_id: UUID):
+    def get_notifications_by_chat_id(
+        self,
+        chat_id: UUID,
+        limit: Optional[int] = None,
+        before: Optional[str] = None,
+        after: Optional[str] = None,
+    ):
         pass
 
     @abstractmethod
@@ -260,6 +348,10 @@ class Repository(ABC):
     def get_all_knowledge_in_brain(self, brain_id: UUID):
         pass
 
+    @abstractmethod
+    def knowledge_file_exists_in_brain(self, brain_id: UUID, file_name: str) -> bool:
+        pass
+
     @abstractmethod
     def get_user_onboarding(self, user_id: UUID):
         pass
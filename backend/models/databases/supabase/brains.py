@@ -208,6 +208,71 @@ class Brain(Repository):
         )
         return response.data
 
+    def create_brain_vectors(self, brain_id, vector_ids, file_sha1):
+        if not vector_ids:
+            return []
+
+        response = (
+            self.db.table("brains_vectors")
+            .insert(
+                [
+                    {
+                        "brain_id": str(brain_id),
+                        "vector_id": str(vector_id),
+                        "file_sha1": file_sha1,
+                    }
+                    for vector_id in vector_ids
+                ]
+            )
+            .execute()
+        )
+        return response.data
+
+    def update_brain_vectors_file_sha1(self, brain_id, vector_ids, file_sha1):
+        if not vector_ids:
+            return []
+
+        response = (
+            self.db.table("brains_vectors")
+            .update({"file_sha1": file_sha1})
+            .filter("brain_id", "eq", str(brain_id))
+            .in_("vector_id", [str(vector_id) for vector_id in vector_ids])
+            .execute()
+        )
+        return response.data
+
+    def delete_brain_vectors_by_ids(self, brain_id, vector_ids):
+        """
+        Unlink vectors from a brain and delete the ones no other brain uses,
+        with a single call to the delete_brain_vectors function
+        """
+        if not vector_ids:
+            return
+
+        self.db.rpc(
+            "delete_brain_vectors",
+            {
+                "p_brain_id": str(brain_id),
+                "p_vector_ids": [str(vector_id) for vector_id in vector_ids],
+            },
+        ).execute()
+
+    def get_brain_file_sha1s(self, brain_id, file_sha1s):
+        """
+        Return the subset of `file_sha1s` already linked to the brain
+        """
+        if not file_sha1s:
+            return set()
+
+        response = (
+            self.db.table("brains_vectors")
+            .select("file_sha1")
+            .filter("brain_id", "eq", str(brain_id))
+            .in_("file_sha1", file_sha1s)
+            .execute()
+        )
+        return {item["file_sha1"] for item in response.data}
+
     def get_vector_ids_from_file_sha1(self, file_sha1: str):
         # move to vectors class
         vectorsResponse = (
@@ -252,38 +317,47 @@ class Brain(Repository):
 
         return vector_ids
 
-    def delete_file_from_brain(self, brain_id, file_name: str): # type: ignore
-        # First, get the vector_ids associated with the file_name
-        vector_response = (
-            self.db.table("vectors")
-            .select("id")
-            .filter("metadata->>file_name", "eq", file_name)
+    def get_brain_files(self, brain_id):
+        """
+        Files (and crawled pages) of the brain from its inventory, maintained
+        by triggers on brains_vectors
+        """
+        response = (
+            self.db.from_("brains_files")
+            .select("file_name, file_sha1, file_size, chunk_count")
+            .filter("brain_id", "eq", str(brain_id))
             .execute()
         )
-        vector_ids = [item["id"] for item in vector_response.data]
 
-        # For each vector_id, delete the corresponding entry from the 'brains_vectors' table
-        for vector_id in vector_ids:
-            self.db.table("brains_vectors").delete().filter(
-                "vector_id", "eq", vector_id
-            ).filter("brain_id", "eq", brain_id).execute()
+        return response.data
 
-            # Check if the vector is still associated with any other brains
-            associated_brains_response = (
-                self.db.table("brains_vectors")
-                .select("brain_id")
-                .filter("vector_id", "eq", vector_id)
-                .execute()
-            )
-            associated_brains = [
-                item["brain_id"] for item in associated_brains_response.data
-            ]
+    def get_brain_size(self, brain_id) -> int:
+        """
+        Total size of the brain's files, a counter maintained by triggers on
+        brains_files
+        """
+        response = (
+            self.db.from_("brains")
+            .select("files_size")
+            .filter("brain_id", "eq", str(brain_id))
+            .execute()
+        ).data
+
+        if len(response) == 0:
+            return 0
+
+        return response[0].get("files_size") or 0
 
-            # If the vector is not associated with any other brains, delete it from 'vectors' table
-            if not associated_brains:
-                self.db.table("vectors").delete().filter(
-                    "id", "eq", vector_id
-                ).execute()
+    def delete_file_from_brain(self, brain_id, file_name: str): # type: ignore
+        # Unlink all the vectors of the file and delete the ones no other brain
+        # uses, in one call, the ids are resolved by the function
+        self.db.rpc(
+            "delete_brain_file_vectors",
+            {"p_brain_id": str(brain_id), "p_file_name": file_name},
+        ).execute()
+
+        # The brain content changed, which also expires its cached answers
+        self.update_brain_last_update_time(brain_id)
 
         return {"message": f"File {file_name} in brain {brain_id} has been deleted."}
 
@@ -314,6 +388,22 @@ class Brain(Repository):
 
         return BrainEntity(**response[0])
 
+    def get_brains_names_by_ids(self, brain_ids: list[UUID]) -> dict[str, str]:
+        """
+        Names of the given brains in one query, keyed by brain id
+        """
+        if not brain_ids:
+            return {}
+
+        response = (
+            self.db.from_("brains")
+            .select("brain_id, name")
+            .in_("brain_id", [str(brain_id) for brain_id in brain_ids])
+            .execute()
+        ).data
+
+        return {str(brain["brain_id"]): brain["name"] for brain in response}
+
     def get_brain_subscribers_count(self, brain_id: UUID) -> int:
         response = (
             self.db.from_("brains_users")
@@ -56,14 +56,37 @@ class Chats(Repository):
             return None
 
 
-    def get_chat_history(self, chat_id: str):
-        reponse = (
+    def get_chat_history(
+        self,
+        chat_id: str,
+        limit: Optional[int] = None,
+        before: Optional[str] = None,
+        after: Optional[str] = None,
+    ):
+        """
+        Messages of the chat in chronological order.
+
+        With a limit, the `limit` messages right after `after` when given,
+        otherwise the `limit` most recent ones (before `before` when given).
+        """
+        query = (
             self.db.from_("chat_history")
             .select("*")
             .filter("chat_id", "eq", chat_id)
-            .order("message_time", desc=False)  # Add the ORDER BY clause
-            .execute()
         )
+        if before is not None:
+            query = query.filter("message_time", "lt", before)
+        if after is not None:
+            query = query.filter("message_time", "gt", after)
+
+        latest_first = limit is not None and after is None
+        query = query.order("message_time", desc=latest_first)
+        if limit is not None:
+            query = query.limit(limit)
+
+        reponse = query.execute()
+        if latest_first:
+            reponse.data.reverse()
 
         return reponse
 
@@ -95,3 +95,18 @@ class Knowledges(Repository):
         ).data
 
         return all_knowledge
+
+    def knowledge_file_exists_in_brain(self, brain_id: UUID, file_name: str) -> bool:
+        """
+        Whether the brain has a knowledge for the file, without loading them all
+        """
+        knowledge = (
+            self.db.from_("knowledge")
+            .select("id")
+            .filter("brain_id", "eq", str(brain_id))
+            .filter("file_name", "eq", file_name)
+            .limit(1)
+            .execute()
+        ).data
+
+        return len(knowledge) > 0
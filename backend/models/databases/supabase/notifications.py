@@ -107,11 +107,21 @@ class Notifications(Repository):
             .execute()
         ).data
 
-    def get_notifications_by_chat_id(self, chat_id: UUID) -> list[Notification]:
+    def get_notifications_by_chat_id(
+        self,
+        chat_id: UUID,
+        limit: Optional[int] = None,
+        before: Optional[str] = None,
+        after: Optional[str] = None,
+    ) -> list[Notification]:
         """
-        Get all notifications for a chat
+        Get the recent notifications of a chat in chronological order
         Args:
             chat_id (UUID): The id of the chat
+            limit (Optional[int]): The number of notifications to return, the
+                first ones after `after` when given, otherwise the last ones
+            before (Optional[str]): Only notifications sent before this time
+            after (Optional[str]): Only notifications sent after this time
 
         Returns:
             list[Notification]: The notifications
@@ -120,12 +130,23 @@ class Notifications(Repository):
             "%Y-%m-%d %H:%M:%S.%f"
         )
 
-        notifications = (
+        query = (
             self.db.from_("notifications")
             .select("*")
             .filter("chat_id", "eq", chat_id)
             .filter("datetime", "gt", five_minutes_ago)
-            .execute()
-        ).data
+        )
+        if before is not None:
+            query = query.filter("datetime", "lt", before)
+        if after is not None:
+            query = query.filter("datetime", "gt", after)
+
+        latest_first = limit is not None and after is None
+        query = query.order("datetime", desc=latest_first)
+        if limit is not None:
+            query = query.limit(limit)
+        notifications = query.execute().data
+        if latest_first:
+            notifications.reverse()
 
         return [Notification(**notification) for notification in notifications]
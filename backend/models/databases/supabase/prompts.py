@@ -84,6 +84,28 @@ class Prompts(Repository):
             return None
         return Prompt(**response[0])
 
+    def get_prompts_titles_by_ids(self, prompt_ids: list[UUID]) -> dict[str, str]:
+        """
+        Get the titles of several prompts in one query
+
+        Args:
+            prompt_ids (list[UUID]): The ids of the prompts
+
+        Returns:
+            dict[str, str]: The prompt titles keyed by prompt id
+        """
+        if not prompt_ids:
+            return {}
+
+        response = (
+            self.db.from_("prompts")
+            .select("id, title")
+            .in_("id", [str(prompt_id) for prompt_id in prompt_ids])
+            .execute()
+        ).data
+
+        return {str(prompt["id"]): prompt["title"] for prompt in response}
+
     def get_public_prompts(self) -> list[Prompt]:
         """
         List all public prompts
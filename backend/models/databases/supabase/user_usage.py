@@ -88,6 +88,18 @@ class UserUsage(Repository):
             user_id, daily_requests_count=current_requests_count + 1, date=date
         )
 
+    def increment_user_daily_usage(self, user_id, user_email, date) -> int:
+        """
+        Atomically count one more request of the user for the day, creating
+        the day's usage if needed, and return the new count
+        """
+        response = self.db.rpc(
+            "increment_user_daily_usage",
+            {"p_user_id": str(user_id), "p_email": user_email, "p_date": date},
+        ).execute()
+
+        return response.data[0]["daily_requests_count"]
+
     def update_user_request_count(self, user_id, daily_requests_count, date):
         response = (
             self.db.table("user_daily_usage")
@@ -1,6 +1,11 @@
+from uuid import uuid4
+
 from models.databases.repository import Repository
 import re
 
+# Below the default max_rows of PostgREST, so a full page means there may be more
+VECTORS_PAGE_SIZE = 1000
+
 class Vector(Repository):
     def __init__(self, supabase_client):
         self.db = supabase_client
@@ -41,6 +46,88 @@ class Vector(Repository):
 
         return response
 
+    def create_vectors(self, brain_id, vectors):
+        """
+        Insert a batch of embedded chunks and link them to the brain, in one
+        request and one transaction (see the create_vectors_for_brain
+        function). `vectors` are dicts with content, metadata, embedding and
+        file_sha1.
+        """
+        if not vectors:
+            return []
+
+        rows = [{"id": str(uuid4()), **vector} for vector in vectors]
+        self.db.rpc(
+            "create_vectors_for_brain",
+            {"p_brain_id": str(brain_id), "p_vectors": rows},
+        ).execute()
+
+        return [row["id"] for row in rows]
+
+    def update_vectors_file_version(self, vector_ids, file_sha1, file_size):
+        """
+        Stamp vectors with a new version of their file, its sha1 and size, in
+        the column and the metadata (see the update_vectors_file_version
+        function)
+        """
+        response = self.db.rpc(
+            "update_vectors_file_version",
+            {
+                "p_vector_ids": [str(vector_id) for vector_id in vector_ids],
+                "p_file_sha1": file_sha1,
+                "p_file_size": file_size,
+            },
+        ).execute()
+
+        return response
+
+    def get_vector_ids_by_file_sha1s(self, file_sha1s):
+        if not file_sha1s:
+            return []
+
+        response = (
+            self.db.table("vectors")
+            .select("id, file_sha1")
+            .in_("file_sha1", file_sha1s)
+            .execute()
+        )
+
+        return response.data
+
+    def get_brain_vectors_by_file_name(self, brain_id, file_name):
+        """
+        All the vectors of a file in the brain, read in pages as PostgREST caps
+        the rows of a single response
+        """
+        vectors = []
+        while True:
+            page = (
+                self.db.table("vectors")
+                .select(
+                    "id, content, page_url:metadata->>page_url,"
+                    " page_sha1:metadata->>page_sha1, brains_vectors!inner(brain_id)"
+                )
+                .filter("metadata->>file_name", "eq", file_name)
+                .filter("brains_vectors.brain_id", "eq", str(brain_id))
+                .order("id")
+                .range(len(vectors), len(vectors) + VECTORS_PAGE_SIZE - 1)
+                .execute()
+            ).data
+            vectors.extend(page)
+            if len(page) < VECTORS_PAGE_SIZE:
+                return vectors
+
+    def get_embeddings_by_chunk_sha1s(self, chunk_sha1s, embedding_model):
+        response = (
+            self.db.table("vectors")
+            .select("chunk_sha1:metadata->>chunk_sha1, embedding")
+            .in_("metadata->>chunk_sha1", chunk_sha1s)
+            .filter("metadata->>embedding_model", "eq", embedding_model)
+            .execute()
+        )
+
+        return response.data
+
     def similarity_search(self, query_embedding, table, top_k, threshold):
         response = self.db.rpc(
             table,
@@ -52,6 +139,29 @@ class Vector(Repository):
         ).execute()
         return response
 
+    def match_brain_vectors(
+        self,
+        query_embedding,
+        brain_id,
+        file_names,
+        top_k,
+        table="match_vectors_filtering",
+    ):
+        """
+        Vectors of the brain closest to the query embedding, with their
+        similarity, from the `table` matching function
+        """
+        response = self.db.rpc(
+            table,
+            {
+                "query_embedding": query_embedding,
+                "match_count": top_k,
+                "p_brain_id": str(brain_id),
+                "p_file_names": file_names,
+            },
+        ).execute()
+        return response
+
     def update_summary(self, document_id, summary_id):
         return (
             self.db.table("summaries")
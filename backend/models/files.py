@@ -1,3 +1,4 @@
+import hashlib
 import os
 import tempfile
 from typing import Any, Optional
@@ -10,7 +11,7 @@ from models.brains import Brain
 from models.databases.supabase.supabase import SupabaseDB
 from models.settings import get_supabase_db
 from pydantic import BaseModel
-from utils.file import compute_sha1_from_file
+from utils.file import FILE_READ_CHUNK_SIZE, compute_sha1_from_file
 
 logger = get_logger(__name__)
 
@@ -27,6 +28,8 @@ class File(BaseModel):
     chunk_size: int = 500
     chunk_overlap: int = 0
     documents: Optional[Any] = None
+    tmp_file_path: Optional[str] = None
+    spooled_file: bool = False
 
     @property
     def supabase_db(self) -> SupabaseDB:
@@ -44,21 +47,50 @@ class File(BaseModel):
 
     async def compute_file_sha1(self):
         """
-        Compute the sha1 of the file using a temporary file
+        Compute the sha1 of the file while spooling it once to a temporary file.
+        The upload is read chunk by chunk so memory stays bounded whatever its size,
+        and the temporary file is reused by the loaders afterwards.
         """
+        if self.tmp_file_path:
+            # The file is already on disk (e.g. downloaded by the worker)
+            self.file_sha1 = compute_sha1_from_file(self.tmp_file_path)
+            return
+
+        sha1 = hashlib.sha1()
+        file_size = 0
         with tempfile.NamedTemporaryFile(
             delete=False,
             suffix=self.file.filename,  # pyright: ignore reportPrivateUsage=none
         ) as tmp_file:
             await self.file.seek(0)  # pyright: ignore reportPrivateUsage=none
-            self.content = (
-                await self.file.read()  # pyright: ignore reportPrivateUsage=none
-            )
-            tmp_file.write(self.content)
-            tmp_file.flush()
-            self.file_sha1 = compute_sha1_from_file(tmp_file.name)
-
-        os.remove(tmp_file.name)
+            while True:
+                chunk = await self.file.read(  # pyright: ignore reportPrivateUsage=none
+                    FILE_READ_CHUNK_SIZE
+                )
+                if not chunk:
+                    break
+                sha1.update(chunk)
+                tmp_file.write(chunk)
+                file_size += len(chunk)
+
+        self.tmp_file_path = tmp_file.name
+        self.spooled_file = True
+        self.file_sha1 = sha1.hexdigest()
+        if self.file_size is None:
+            self.file_size = file_size
+
+    def remove_tmp_file(self):
+        """
+        Remove the temporary file created by compute_file_sha1, if any
+        """
+        if (
+            self.spooled_file
+            and self.tmp_file_path
+            and os.path.exists(self.tmp_file_path)
+        ):
+            os.remove(self.tmp_file_path)
+        self.tmp_file_path = None
+        self.spooled_file = False
 
     def compute_documents(self, loader_class):
         """
@@ -68,17 +100,8 @@ class File(BaseModel):
             loader_class (class): The class of the loader to use to load the file
         """
         logger.info(f"Computing documents from file {self.file_name}")
-        documents = []
-        with tempfile.NamedTemporaryFile(
-            delete=False,
-            suffix=self.file.filename,  # pyright: ignore reportPrivateUsage=none
-        ) as tmp_file:
-            tmp_file.write(self.content)  # pyright: ignore reportPrivateUsage=none
-            tmp_file.flush()
-            loader = loader_class(tmp_file.name)
-            documents = loader.load()
-
-        os.remove(tmp_file.name)
+        loader = loader_class(self.tmp_file_path)
+        documents = loader.load()
 
         text_splitter = RecursiveCharacterTextSplitter.from_tiktoken_encoder(
             chunk_size=self.chunk_size, chunk_overlap=self.chunk_overlap
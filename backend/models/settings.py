@@ -1,6 +1,13 @@
+import os
+import threading
+from typing import Optional
+
 from langchain.embeddings.openai import OpenAIEmbeddings
+from models.databases.postgres import PostgresDB
 from models.databases.supabase.supabase import SupabaseDB
 from pydantic import BaseSettings
+from sqlalchemy import create_engine
+from sqlalchemy.engine import Engine
 from supabase.client import Client, create_client
 from vectorstore.supabase import SupabaseVectorStore
 
@@ -15,6 +22,11 @@ class BrainSettings(BaseSettings):
     supabase_url: str
     supabase_service_key: str
     pg_database_url: str = "not implemented"
+    # "postgres" runs the hot queries over a direct connection to
+    # pg_database_url, "supabase" runs everything through PostgREST
+    database_backend: str = "supabase"
+    pg_pool_size: int = 5
+    pg_max_overflow: int = 10
     resend_api_key: str = "null"
     resend_email_address: str = "haojiang1029@gmail.com"
 
@@ -24,34 +36,125 @@ class LLMSettings(BaseSettings):
     model_path: str = "./local_models/ggml-gpt4all-j-v1.3-groovy.bin"
 
 
+class IngestionSettings(BaseSettings):
+    embedding_batch_size: int = 100
+    embedding_cache_enabled: bool = True
+    embedding_cache_max_size: int = 10000
+    embedding_cache_disk_path: Optional[str] = None
+    embedding_cache_disk_max_size: int = 100000
+    embedding_cache_use_database: bool = True
+
+
+class RetrievalSettings(BaseSettings):
+    grading_max_concurrency: int = 4
+    grading_timeout: float = 10.0
+    # Documents at least this similar are relevant without asking the grader,
+    # the ones below the low threshold are dropped
+    grading_high_threshold: float = 0.85
+    grading_low_threshold: float = 0.7
+    query_embedding_cache_enabled: bool = True
+    query_embedding_cache_max_size: int = 10000
+    query_embedding_cache_ttl: int = 86400
+    # Share the cache between workers through the redis used as celery broker
+    query_embedding_cache_use_redis: bool = False
+    # Opt-in: serve a previous answer of the brain to a near-identical question
+    answer_cache_enabled: bool = False
+    answer_cache_similarity_threshold: float = 0.97
+    answer_cache_max_entries_per_brain: int = 200
+    answer_cache_ttl: int = 86400
+
+
+_process_cache: dict = {}
+_process_cache_lock = threading.RLock()
+
+
+def _get_process_wide(name, factory):
+    """
+    Build `name` once per process and reuse it afterwards, so settings are
+    parsed once and the HTTP connection pools are kept alive across requests
+    """
+    instance = _process_cache.get(name)
+    if instance is None:
+        with _process_cache_lock:
+            instance = _process_cache.get(name)
+            if instance is None:
+                instance = _process_cache[name] = factory()
+    return instance
+
+
+def reset_process_cache():
+    """
+    Drop the process-wide settings and clients. Called in forked children
+    (e.g. celery workers) so they never share connections with their parent.
+    """
+    global _process_cache_lock
+    pg_engine = _process_cache.get("pg_engine")
+    if pg_engine is not None:
+        # Leave the connections to the parent, closing them here would close
+        # them for the parent too
+        pg_engine.dispose(close=False)
+    _process_cache.clear()
+    _process_cache_lock = threading.RLock()
+
+
+os.register_at_fork(after_in_child=reset_process_cache)
+
+
+def get_brain_settings() -> BrainSettings:
+    return _get_process_wide("brain_settings", BrainSettings)
+
+
+def get_ingestion_settings() -> IngestionSettings:
+    return _get_process_wide("ingestion_settings", IngestionSettings)
+
+
+def get_retrieval_settings() -> RetrievalSettings:
+    return _get_process_wide("retrieval_settings", RetrievalSettings)
+
+
 def get_supabase_client() -> Client:
-    settings = BrainSettings()  # pyright: ignore reportPrivateUsage=none
-    supabase_client: Client = create_client(
-        settings.supabase_url, settings.supabase_service_key
-    )
-    return supabase_client
+    def create_supabase_client() -> Client:
+        settings = get_brain_settings()
+        return create_client(settings.supabase_url, settings.supabase_service_key)
+
+    return _get_process_wide("supabase_client", create_supabase_client)
+
+
+def get_pg_engine() -> Engine:
+    def create_pg_engine() -> Engine:
+        settings = get_brain_settings()
+        return create_engine(
+            settings.pg_database_url,
+            pool_size=settings.pg_pool_size,
+            max_overflow=settings.pg_max_overflow,
+            pool_pre_ping=True,
+        )
+
+    return _get_process_wide("pg_engine", create_pg_engine)
 
 
 def get_supabase_db() -> SupabaseDB:
-    supabase_client = get_supabase_client()
-    return SupabaseDB(supabase_client)
+    def create_supabase_db() -> SupabaseDB:
+        if get_brain_settings().database_backend == "postgres":
+            return PostgresDB(get_supabase_client(), get_pg_engine())
+        return SupabaseDB(get_supabase_client())
+
+    return _get_process_wide("supabase_db", create_supabase_db)
 
 
 def get_embeddings() -> OpenAIEmbeddings:
-    settings = BrainSettings()  # pyright: ignore reportPrivateUsage=none
-    embeddings = OpenAIEmbeddings(
-        openai_api_key=settings.openai_api_key
-    )  # pyright: ignore reportPrivateUsage=none
-    return embeddings
+    return _get_process_wide(
+        "embeddings",
+        lambda: OpenAIEmbeddings(
+            openai_api_key=get_brain_settings().openai_api_key
+        ),  # pyright: ignore reportPrivateUsage=none
+    )
 
 
 def get_documents_vector_store() -> SupabaseVectorStore:
-    settings = BrainSettings()  # pyright: ignore reportPrivateUsage=none
-    embeddings = get_embeddings()
-    supabase_client: Client = create_client(
-        settings.supabase_url, settings.supabase_service_key
-    )
+    # A new store every time as callers may swap its embeddings for a user key,
+    # the client and embeddings underneath are shared
     documents_vector_store = SupabaseVectorStore(
-        supabase_client, embeddings, table_name="vectors"
+        get_supabase_client(), get_embeddings(), table_name="vectors"
     )
     return documents_vector_store
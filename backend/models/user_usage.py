@@ -1,3 +1,7 @@
+import os
+import threading
+
+from cachetools import TTLCache
 from logger import get_logger
 from models.databases.supabase.supabase import SupabaseDB
 from models.settings import get_supabase_db
@@ -5,6 +9,11 @@ from models.user_identity import UserIdentity
 
 logger = get_logger(__name__)
 
+USER_SETTINGS_CACHE_TTL = float(os.getenv("USER_SETTINGS_CACHE_TTL", 60))
+
+_user_settings_cache: TTLCache = TTLCache(maxsize=10000, ttl=USER_SETTINGS_CACHE_TTL)
+_user_settings_cache_lock = threading.Lock()
+
 
 class UserUsage(UserIdentity):
     daily_requests_count: int = 0
@@ -26,37 +35,27 @@ class UserUsage(UserIdentity):
 
     def get_user_settings(self):
         """
-        Fetch the user settings from the database
+        Fetch the user settings, cached for USER_SETTINGS_CACHE_TTL seconds.
+        The app never writes them, so a change made in the database is seen
+        once the entry expires.
         """
-        request = self.supabase_db.get_user_settings(self.id)
+        with _user_settings_cache_lock:
+            user_settings = _user_settings_cache.get(str(self.id))
+        if user_settings is None:
+            user_settings = self.supabase_db.get_user_settings(self.id)
+            with _user_settings_cache_lock:
+                _user_settings_cache[str(self.id)] = user_settings
 
-        return request
+        return user_settings
 
     def handle_increment_user_request_count(self, date):
         """
-        Increment the user request count in the database
+        Increment the user request count in the database, in one atomic call
         """
-        current_requests_count = self.supabase_db.get_user_requests_count_for_day(
-            self.id, date
+        self.daily_requests_count = self.supabase_db.increment_user_daily_usage(
+            user_id=self.id, user_email=self.email, date=date
         )
 
-        if current_requests_count is None:
-            if self.email is None:
-                raise ValueError("User Email should be defined for daily usage table")
-            self.supabase_db.create_user_daily_usage(
-                user_id=self.id, date=date, user_email=self.email
-            )
-            self.daily_requests_count = 1
-            return
-
-        self.supabase_db.increment_user_request_count(
-            user_id=self.id,
-            date=date,
-            current_requests_count=current_requests_count,
-        )
-
-        self.daily_requests_count = current_requests_count
-
         logger.info(
-            f"User {self.email} request count updated to {current_requests_count}"
+            f"User {self.email} request count updated to {self.daily_requests_count}"
         )
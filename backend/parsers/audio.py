@@ -1,85 +1,269 @@
+import asyncio
+import json
 import os
+import shutil
+import subprocess
 import tempfile
 import time
+from concurrent.futures import ThreadPoolExecutor
 
 import openai
-from langchain.schema import Document
-from langchain.text_splitter import RecursiveCharacterTextSplitter
+import tiktoken
+from celery_task import create_embedding_for_documents_batch
+from logger import get_logger
+from models import File, get_ingestion_settings
+from repository.files.upload_file import DocumentSerializable
+from vectorstore.embeddings_cache import compute_chunk_sha1
 
-from models import File, get_documents_vector_store
-from utils.file import compute_sha1_from_content
+from .common import keep_unchanged_file_vectors
+
+logger = get_logger(__name__)
+
+AUDIO_SEGMENT_SECONDS = int(os.getenv("AUDIO_SEGMENT_SECONDS", "600"))
+AUDIO_SEGMENT_OVERLAP_SECONDS = int(os.getenv("AUDIO_SEGMENT_OVERLAP_SECONDS", "5"))
+AUDIO_TRANSCRIPTION_CONCURRENCY = int(os.getenv("AUDIO_TRANSCRIPTION_CONCURRENCY", "4"))
+AUDIO_TRANSCRIPTS_DIR = os.path.join(tempfile.gettempdir(), "audio-transcripts")
+
+
+def get_audio_duration(file_path):
+    """
+    Duration of the recording in seconds, None if ffprobe can't tell
+    """
+    try:
+        result = subprocess.run(
+            [
+                "ffprobe",
+                "-v",
+                "error",
+                "-show_entries",
+                "format=duration",
+                "-of",
+                "default=noprint_wrappers=1:nokey=1",
+                file_path,
+            ],
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+        return float(result.stdout.strip())
+    except (OSError, subprocess.CalledProcessError, ValueError) as e:
+        logger.error(f"Could not read the duration of {file_path}: {e}")
+        return None
+
+
+def split_audio_segments(duration):
+    """
+    Split a recording in windows of AUDIO_SEGMENT_SECONDS overlapping by
+    AUDIO_SEGMENT_OVERLAP_SECONDS on each side. Each window owns
+    [owned_start, owned_end): a transcribed sentence is kept by the window its
+    midpoint falls in, so overlaps are not duplicated in the transcript.
+    """
+    if duration is None:
+        return [(0, 0, None, 0, float("inf"))]
+
+    segments = []
+    owned_start = 0.0
+    while owned_start < duration:
+        owned_end = owned_start + AUDIO_SEGMENT_SECONDS
+        segments.append(
+            (
+                len(segments),
+                max(owned_start - AUDIO_SEGMENT_OVERLAP_SECONDS, 0),
+                min(owned_end + AUDIO_SEGMENT_OVERLAP_SECONDS, duration),
+                owned_start,
+                owned_end if owned_end < duration else float("inf"),
+            )
+        )
+        owned_start = owned_end
+
+    return segments
+
+
+def transcribe_segment(file_path, transcript_dir, segment, user_openai_api_key):
+    """
+    Transcribe one window of the recording. The result is saved to
+    `transcript_dir` so a retried task does not transcribe it again.
+    """
+    index, start, end, owned_start, owned_end = segment
+    transcript_path = os.path.join(transcript_dir, f"segment-{index}.json")
+    if os.path.exists(transcript_path):
+        with open(transcript_path) as transcript_file:
+            return json.load(transcript_file)
+
+    if end is None:
+        # The duration is unknown (no ffprobe): send the whole recording at once
+        segment_path = file_path
+    else:
+        segment_path = os.path.join(transcript_dir, f"segment-{index}.mp3")
+        subprocess.run(
+            [
+                "ffmpeg",
+                "-y",
+                "-v",
+                "error",
+                "-ss",
+                str(start),
+                "-t",
+                str(end - start),
+                "-i",
+                file_path,
+                "-vn",
+                "-ac",
+                "1",
+                "-ar",
+                "16000",
+                "-b:a",
+                "64k",
+                segment_path,
+            ],
+            check=True,
+        )
+
+    try:
+        with open(segment_path, "rb") as audio_file:
+            transcript = openai.Audio.transcribe(
+                "whisper-1",
+                audio_file,
+                response_format="verbose_json",
+                api_key=user_openai_api_key or None,
+            )
+    finally:
+        if segment_path != file_path:
+            os.remove(segment_path)
+
+    sentences = []
+    for sentence in transcript["segments"]:  # pyright: ignore reportPrivateUsage=none
+        sentence_start = start + sentence["start"]
+        sentence_end = start + sentence["end"]
+        midpoint = (sentence_start + sentence_end) / 2
+        if owned_start <= midpoint < owned_end:
+            sentences.append(
+                {
+                    "start": sentence_start,
+                    "end": sentence_end,
+                    "text": sentence["text"].strip(),
+                }
+            )
+
+    with open(transcript_path + ".tmp", "w") as transcript_file:
+        json.dump(sentences, transcript_file)
+    os.replace(transcript_path + ".tmp", transcript_path)
+
+    return sentences
+
+
+def group_sentences(sentences, chunk_size):
+    """
+    Group consecutive transcribed sentences into chunks of about `chunk_size`
+    tokens, keeping the time range each chunk covers.
+    """
+    encoding = tiktoken.get_encoding("gpt2")
+
+    chunks = []
+    current, current_size = [], 0
+    for sentence in sentences:
+        sentence_size = len(encoding.encode(sentence["text"]))
+        if current and current_size + sentence_size > chunk_size:
+            chunks.append(current)
+            current, current_size = [], 0
+        current.append(sentence)
+        current_size += sentence_size
+    if current:
+        chunks.append(current)
+
+    return [
+        {
+            "text": " ".join(sentence["text"] for sentence in chunk),
+            "start": chunk[0]["start"],
+            "end": chunk[-1]["end"],
+        }
+        for chunk in chunks
+    ]
 
 
 async def process_audio(
     file: File,
     enable_summarization: bool,
-    user,
+    brain_id,
     user_openai_api_key,
+    incremental=False,
 ):
-    temp_filename = None
-    file_sha = ""
-    dateshort = time.strftime("%Y%m%d-%H%M%S")
-    file_meta_name = f"audiotranscript_{dateshort}.txt"
-    documents_vector_store = get_documents_vector_store()
+    dateshort = time.strftime("%Y%m%d")
+    batch_size = get_ingestion_settings().embedding_batch_size
+    chunk_size = 500
+    chunk_overlap = 0
 
-    # use this for whisper
-    os.environ.get("OPENAI_API_KEY")
-    if user_openai_api_key:
-        pass
+    # Keyed by the audio file sha1 so that a retried task resumes from the
+    # segments that were already transcribed
+    transcript_dir = os.path.join(AUDIO_TRANSCRIPTS_DIR, str(file.file_sha1))
+    os.makedirs(transcript_dir, exist_ok=True)
 
     try:
-        upload_file = file.file
-        with tempfile.NamedTemporaryFile(
-            delete=False,
-            suffix=upload_file.filename,  # pyright: ignore reportPrivateUsage=none
-        ) as tmp_file:
-            await upload_file.seek(0)  # pyright: ignore reportPrivateUsage=none
-            content = (
-                await upload_file.read()  # pyright: ignore reportPrivateUsage=none
-            )
-            tmp_file.write(content)
-            tmp_file.flush()
-            tmp_file.close()
+        # The upload has already been spooled to disk by File.compute_file_sha1
+        segments = split_audio_segments(get_audio_duration(file.tmp_file_path))
+        logger.info(f"Transcribing {file.file_name} in {len(segments)} segments")
 
-            temp_filename = tmp_file.name
+        loop = asyncio.get_event_loop()
+        with ThreadPoolExecutor(
+            max_workers=AUDIO_TRANSCRIPTION_CONCURRENCY
+        ) as executor:
+            transcripts = await asyncio.gather(
+                *[
+                    loop.run_in_executor(
+                        executor,
+                        transcribe_segment,
+                        file.tmp_file_path,
+                        transcript_dir,
+                        segment,
+                        user_openai_api_key,
+                    )
+                    for segment in segments
+                ]
+            )
+    finally:
+        file.remove_tmp_file()
 
-            with open(tmp_file.name, "rb") as audio_file:
-                transcript = openai.Audio.transcribe("whisper-1", audio_file)
+    sentences = [sentence for transcript in transcripts for sentence in transcript]
+    chunks = group_sentences(sentences, chunk_size)
+    file_size = sum(len(chunk["text"].encode("utf-8")) for chunk in chunks)
 
-        file_sha = compute_sha1_from_content(
-            transcript.text.encode("utf-8")  # pyright: ignore reportPrivateUsage=none
+    docs_with_metadata = [
+        DocumentSerializable(
+            page_content=chunk["text"],
+            metadata={
+                "file_sha1": file.file_sha1,
+                "file_size": file_size,
+                "file_name": file.file_name,
+                "chunk_size": chunk_size,
+                "chunk_overlap": chunk_overlap,
+                "date": dateshort,
+                "summarization": "true" if enable_summarization else "false",
+                "start_time": round(chunk["start"], 2),
+                "end_time": round(chunk["end"], 2),
+                "chunk_sha1": compute_chunk_sha1(chunk["text"]),
+            },
         )
-        file_size = len(
-            transcript.text.encode("utf-8")  # pyright: ignore reportPrivateUsage=none
+        for chunk in chunks
+    ]
+
+    if incremental:
+        docs_with_metadata = keep_unchanged_file_vectors(
+            brain_id, file.file_name, file.file_sha1, file_size, docs_with_metadata
         )
 
-        chunk_size = 500
-        chunk_overlap = 0
+    docs_with_metadata = [doc.to_json() for doc in docs_with_metadata]
 
-        text_splitter = RecursiveCharacterTextSplitter.from_tiktoken_encoder(
-            chunk_size=chunk_size, chunk_overlap=chunk_overlap
+    for i in range(0, len(docs_with_metadata), batch_size):
+        create_embedding_for_documents_batch.delay(  # type: ignore
+            brain_id,
+            docs_with_metadata[i : i + batch_size],
+            user_openai_api_key,
+            file.file_sha1,
         )
-        texts = text_splitter.split_text(
-            transcript.text.encode("utf-8")  # pyright: ignore reportPrivateUsage=none
-        )
-
-        docs_with_metadata = [
-            Document(
-                page_content=text,
-                metadata={
-                    "file_sha1": file_sha,
-                    "file_size": file_size,
-                    "file_name": file_meta_name,
-                    "chunk_size": chunk_size,
-                    "chunk_overlap": chunk_overlap,
-                    "date": dateshort,
-                },
-            )
-            for text in texts
-        ]
 
-        documents_vector_store.add_documents(docs_with_metadata)
+    logger.info(
+        f"Queued {len(docs_with_metadata)} transcript chunks of {file.file_name}"
+    )
 
-    finally:
-        if temp_filename and os.path.exists(temp_filename):
-            os.remove(temp_filename)
+    # Every segment made it, the resume cache is no longer needed
+    shutil.rmtree(transcript_dir, ignore_errors=True)
@@ -1,21 +1,78 @@
 import time
 
-from celery_task import create_embedding_for_document
-from models import File
+from celery_task import create_embedding_for_documents_batch
+from models import Brain, File, get_ingestion_settings
 from repository.files.upload_file import DocumentSerializable
 from logger import get_logger
+from vectorstore.embeddings_cache import compute_chunk_sha1
 
 logger = get_logger(__name__)
 
+
+def _diff_file_vectors(brain: Brain, file_name, chunk_sha1s):
+    """
+    Split the vectors already stored for `file_name` in the brain into the ones
+    whose chunk is still part of the new version (keyed by chunk sha1) and the
+    ones that should be removed.
+    """
+    kept_vector_ids = {}
+    removed_vector_ids = []
+    for vector in brain.get_file_vectors(file_name):
+        chunk_sha1 = compute_chunk_sha1(vector["content"])
+        if chunk_sha1 in chunk_sha1s and chunk_sha1 not in kept_vector_ids:
+            kept_vector_ids[chunk_sha1] = vector["id"]
+        else:
+            removed_vector_ids.append(vector["id"])
+
+    return kept_vector_ids, removed_vector_ids
+
+
+def keep_unchanged_file_vectors(
+    brain_id, file_name, file_sha1, file_size, docs_with_metadata
+):
+    """
+    Keep the vectors of unchanged chunks, moved to the new version of the file,
+    drop the removed ones and return the documents that are new in this
+    version of the file, the only ones to embed
+    """
+    brain = Brain(id=brain_id)
+    kept_vector_ids, removed_vector_ids = _diff_file_vectors(
+        brain,
+        file_name,
+        {doc.metadata["chunk_sha1"] for doc in docs_with_metadata},
+    )
+    brain.delete_brain_vectors_by_ids(removed_vector_ids)
+    if kept_vector_ids:
+        kept = list(kept_vector_ids.values())
+        # The vectors first, the links update reads their new size
+        brain.supabase_db.update_vectors_file_version(kept, file_sha1, file_size)
+        brain.update_brain_vectors_file_sha1(kept, file_sha1)
+
+    docs_with_metadata = [
+        doc
+        for doc in docs_with_metadata
+        if doc.metadata["chunk_sha1"] not in kept_vector_ids
+    ]
+    logger.info(
+        f"Incremental update of {file_name}: {len(kept_vector_ids)} kept, "
+        f"{len(removed_vector_ids)} removed, {len(docs_with_metadata)} to embed"
+    )
+    return docs_with_metadata
+
+
 async def process_file(
     file: File,
     loader_class,
     enable_summarization,
     brain_id,
     user_openai_api_key,
+    incremental=False,
 ):
     dateshort = time.strftime("%Y%m%d")
+    batch_size = get_ingestion_settings().embedding_batch_size
     file.compute_documents(loader_class)
+
+    docs_with_metadata = []
     for doc in file.documents:  # pyright: ignore reportPrivateUsage=none
         metadata = {
             "file_sha1": file.file_sha1,
@@ -25,14 +82,34 @@ async def process_file(
             "chunk_overlap": file.chunk_overlap,
             "date": dateshort,
             "summarization": "true" if enable_summarization else "false",
+            "chunk_sha1": compute_chunk_sha1(doc.page_content),
         }
-        doc_with_metadata = DocumentSerializable(
-            page_content=doc.page_content, metadata=metadata
+        docs_with_metadata.append(
+            DocumentSerializable(page_content=doc.page_content, metadata=metadata)
+        )
+
+    if incremental:
+        docs_with_metadata = keep_unchanged_file_vectors(
+            brain_id,
+            file.file_name,
+            file.file_sha1,
+            file.file_size,
+            docs_with_metadata,
         )
 
-        create_embedding_for_document.delay(# type: ignore
-            brain_id, doc_with_metadata.to_json(), user_openai_api_key, file.file_sha1
+    docs_with_metadata = [doc.to_json() for doc in docs_with_metadata]
+
+    # One task (one embeddings call and one bulk insert) per batch of chunks
+    for i in range(0, len(docs_with_metadata), batch_size):
+        create_embedding_for_documents_batch.delay(  # type: ignore
+            brain_id,
+            docs_with_metadata[i : i + batch_size],
+            user_openai_api_key,
+            file.file_sha1,
         )
-        
+
+    logger.info(
+        f"Queued {len(docs_with_metadata)} chunks of {file.file_name} in batches of {batch_size}"
+    )
 
     return
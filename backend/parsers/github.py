@@ -1,12 +1,114 @@
+import asyncio
 import os
+import shutil
+import tempfile
 import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
 
-from langchain.document_loaders import GitLoader
-from langchain.schema import Document
+from git import Repo
 from langchain.text_splitter import RecursiveCharacterTextSplitter
-from models import Brain, File
+from logger import get_logger
+from models import Brain, get_ingestion_settings
+from repository.files.upload_file import DocumentSerializable
 from utils.file import compute_sha1_from_content
 from utils.vectors import Neurons
+from vectorstore.embeddings_cache import compute_chunk_sha1
+
+logger = get_logger(__name__)
+
+GITHUB_MAX_FILE_SIZE = int(os.getenv("GITHUB_MAX_FILE_SIZE", str(1024 * 1024)))
+GITHUB_EMBEDDING_CONCURRENCY = int(os.getenv("GITHUB_EMBEDDING_CONCURRENCY", "4"))
+GITHUB_FILES_BATCH_SIZE = 50
+
+IGNORED_EXTENSIONS = {
+    ".pyc",
+    ".png",
+    ".jpg",
+    ".jpeg",
+    ".gif",
+    ".ico",
+    ".svg",
+    ".webp",
+    ".pdf",
+    ".zip",
+    ".gz",
+    ".tar",
+    ".jar",
+    ".so",
+    ".dll",
+    ".exe",
+    ".bin",
+    ".woff",
+    ".woff2",
+    ".ttf",
+    ".eot",
+    ".mp3",
+    ".mp4",
+    ".env",
+    ".lock",
+    ".gitignore",
+    ".gitmodules",
+    ".gitattributes",
+    ".gitkeep",
+    ".git",
+    ".json",
+    ".map",
+}
+IGNORED_FILE_SUFFIXES = (".min.js", ".min.css", "-lock.yaml", ".lock.json")
+IGNORED_DIRECTORIES = {
+    ".git",
+    "node_modules",
+    "vendor",
+    "third_party",
+    "dist",
+    "build",
+    "target",
+    "__pycache__",
+    ".venv",
+    "venv",
+    "site-packages",
+    ".next",
+    ".tox",
+}
+
+
+def list_repository_files(repo_path):
+    """
+    Yield the paths of the source files worth indexing, leaving out vendored
+    or generated directories, ignored extensions and oversized files before
+    anything is read.
+    """
+    for root, dirs, files in os.walk(repo_path):
+        dirs[:] = [
+            directory for directory in dirs if directory not in IGNORED_DIRECTORIES
+        ]
+        for file_name in files:
+            _, extension = os.path.splitext(file_name)
+            if (
+                extension.lower() in IGNORED_EXTENSIONS
+                or file_name in IGNORED_EXTENSIONS
+                or file_name.endswith(IGNORED_FILE_SUFFIXES)
+            ):
+                continue
+
+            file_path = os.path.join(root, file_name)
+            if os.path.islink(file_path):
+                continue
+            if os.path.getsize(file_path) > GITHUB_MAX_FILE_SIZE:
+                continue
+            yield file_path
+
+
+def read_text_file(file_path):
+    with open(file_path, "rb") as file:
+        content = file.read()
+
+    # Binary files not caught by their extension
+    if b"\0" in content[:8192]:
+        return None
+
+    return content.decode("utf-8", errors="ignore")
 
 
 async def process_github(
@@ -15,14 +117,10 @@ async def process_github(
     brain_id,
     user_openai_api_key,
 ):
-    random_dir_name = os.urandom(16).hex()
+    repo_path = tempfile.mkdtemp(prefix="github-")
     dateshort = time.strftime("%Y%m%d")
-    loader = GitLoader(
-        clone_url=repo,
-        repo_path="/tmp/" + random_dir_name,
-    )
-    documents = loader.load()
-    os.system("rm -rf /tmp/" + random_dir_name)
+    batch_size = get_ingestion_settings().embedding_batch_size
+    brain = Brain(id=brain_id)
 
     chunk_size = 500
     chunk_overlap = 0
@@ -30,52 +128,88 @@ async def process_github(
         chunk_size=chunk_size, chunk_overlap=chunk_overlap
     )
 
-    documents = text_splitter.split_documents(documents)
-
-    for doc in documents:
-        if doc.metadata["file_type"] in [
-            ".pyc",
-            ".png",
-            ".svg",
-            ".env",
-            ".lock",
-            ".gitignore",
-            ".gitmodules",
-            ".gitattributes",
-            ".gitkeep",
-            ".git",
-            ".json",
-        ]:
-            continue
-        metadata = {
-            "file_sha1": compute_sha1_from_content(doc.page_content.encode("utf-8")),
-            "file_size": len(doc.page_content) * 8,
-            "file_name": doc.metadata["file_name"],
-            "chunk_size": chunk_size,
-            "chunk_overlap": chunk_overlap,
-            "date": dateshort,
-            "summarization": "true" if enable_summarization else "false",
-        }
-        doc_with_metadata = Document(page_content=doc.page_content, metadata=metadata)
-
-        file = File(
-            file_sha1=compute_sha1_from_content(doc.page_content.encode("utf-8"))
-        )
+    loop = asyncio.get_event_loop()
+    executor = ThreadPoolExecutor(max_workers=GITHUB_EMBEDDING_CONCURRENCY)
+    embedding_tasks = []
+    files_count = 0
+
+    try:
+        # Only the latest snapshot is indexed, the history is not needed
+        Repo.clone_from(repo, repo_path, depth=1, single_branch=True)
+        file_paths = list(list_repository_files(repo_path))
+
+        for i in range(0, len(file_paths), GITHUB_FILES_BATCH_SIZE):
+            files = {}
+            for file_path in file_paths[i : i + GITHUB_FILES_BATCH_SIZE]:
+                content = read_text_file(file_path)
+                if content and content.strip():
+                    files[compute_sha1_from_content(content.encode("utf-8"))] = (
+                        file_path,
+                        content,
+                    )
+            files_count += len(files)
+
+            # One query per batch for the files already in the brain and one
+            # for the files already embedded by another brain
+            file_sha1s = list(files.keys())
+            in_brain = brain.supabase_db.get_brain_file_sha1s(brain_id, file_sha1s)
+            existing_vector_ids = defaultdict(list)
+            for vector in brain.supabase_db.get_vector_ids_by_file_sha1s(
+                [file_sha1 for file_sha1 in file_sha1s if file_sha1 not in in_brain]
+            ):
+                existing_vector_ids[vector["file_sha1"]].append(vector["id"])
 
-        file_exists = file.file_already_exists()
+            docs = []
+            for file_sha1, (file_path, content) in files.items():
+                if file_sha1 in in_brain:
+                    continue
+                if file_sha1 in existing_vector_ids:
+                    brain.create_brain_vectors(
+                        existing_vector_ids[file_sha1], file_sha1
+                    )
+                    continue
 
-        if not file_exists:
-            neurons = Neurons()
-            created_vector = neurons.create_vector(
-                doc_with_metadata, user_openai_api_key
-            )
+                relative_path = os.path.relpath(file_path, repo_path)
+                for chunk in text_splitter.split_text(content):
+                    metadata = {
+                        "file_sha1": file_sha1,
+                        "file_size": len(content),
+                        "file_name": repo,
+                        "file_path": relative_path,
+                        "chunk_size": chunk_size,
+                        "chunk_overlap": chunk_overlap,
+                        "date": dateshort,
+                        "summarization": "true" if enable_summarization else "false",
+                        "chunk_sha1": compute_chunk_sha1(chunk),
+                    }
+                    docs.append(
+                        DocumentSerializable(page_content=chunk, metadata=metadata)
+                    )
 
-        file_exists_in_brain = file.file_already_exists_in_brain(brain_id)
+            for j in range(0, len(docs), batch_size):
+                embedding_tasks.append(
+                    loop.run_in_executor(
+                        executor,
+                        Neurons().create_vectors,
+                        brain_id,
+                        docs[j : j + batch_size],
+                        user_openai_api_key,
+                    )
+                )
+
+        created_vector_ids = await asyncio.gather(*embedding_tasks)
+        created_vectors_count = sum(
+            len(vector_ids or []) for vector_ids in created_vector_ids
+        )
+    finally:
+        executor.shutdown(wait=True)
+        shutil.rmtree(repo_path, ignore_errors=True)
+
+    logger.info(
+        f"Indexed {files_count} files of {repo}, {created_vectors_count} vectors created"
+    )
 
-        if not file_exists_in_brain:
-            brain = Brain(id=brain_id)
-            file.link_file_to_brain(brain)
     return {
-        "message": f"✅ Github with {len(documents)} files has been uploaded.",
+        "message": f"✅ Github with {files_count} files has been uploaded.",
         "type": "success",
     }
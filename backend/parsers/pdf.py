@@ -4,11 +4,14 @@ from models import File
 from .common import process_file
 
 
-def process_pdf(file: File, enable_summarization, brain_id, user_openai_api_key):
+def process_pdf(
+    file: File, enable_summarization, brain_id, user_openai_api_key, incremental=False
+):
     return process_file(
         file=file,
         loader_class=PyMuPDFLoader,
         enable_summarization=enable_summarization,
         brain_id=brain_id,
         user_openai_api_key=user_openai_api_key,
+        incremental=incremental,
     )
@@ -4,11 +4,14 @@ from models import File
 from .common import process_file
 
 
-async def process_txt(file: File, enable_summarization, brain_id, user_openai_api_key):
+async def process_txt(
+    file: File, enable_summarization, brain_id, user_openai_api_key, incremental=False
+):
     return await process_file(
         file=file,
         loader_class=TextLoader,
         enable_summarization=enable_summarization,
         brain_id=brain_id,
         user_openai_api_key=user_openai_api_key,
+        incremental=incremental,
     )
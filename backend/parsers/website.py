@@ -0,0 +1,119 @@
+import time
+from collections import defaultdict
+
+from celery_task import create_embedding_for_documents_batch
+from crawl.crawler import CrawlWebsite
+from langchain.text_splitter import RecursiveCharacterTextSplitter
+from logger import get_logger
+from models import Brain, get_ingestion_settings
+from repository.files.upload_file import DocumentSerializable
+from utils.file import compute_sha1_from_content
+from vectorstore.embeddings_cache import compute_chunk_sha1
+
+logger = get_logger(__name__)
+
+
+async def process_website(
+    crawl_website: CrawlWebsite,
+    enable_summarization,
+    brain_id,
+    user_openai_api_key,
+):
+    """
+    Chunk and embed a crawled website page by page. Every chunk carries the
+    URL of its page, pages whose content did not change since the last crawl
+    are skipped, and when the crawl was complete the pages it no longer finds
+    are removed.
+    """
+    dateshort = time.strftime("%Y%m%d")
+    batch_size = get_ingestion_settings().embedding_batch_size
+    chunk_size = 500
+    chunk_overlap = 0
+    text_splitter = RecursiveCharacterTextSplitter.from_tiktoken_encoder(
+        chunk_size=chunk_size, chunk_overlap=chunk_overlap
+    )
+
+    # Vectors are stored under the crawled URL, like the knowledge entry, so
+    # that deleting the knowledge deletes every page
+    website_name = crawl_website.url
+    brain = Brain(id=brain_id)
+
+    stored_pages = set()
+    stored_vector_ids_by_page = defaultdict(list)
+    legacy_vector_ids = []
+    for vector in brain.get_file_vectors(website_name):
+        if vector.get("page_url"):
+            stored_pages.add((vector["page_url"], vector["page_sha1"]))
+            stored_vector_ids_by_page[vector["page_url"]].append(vector["id"])
+        else:
+            legacy_vector_ids.append(vector["id"])
+
+    stale_vector_ids = legacy_vector_ids
+    pages_count = 0
+    skipped_pages_count = 0
+    chunks_count = 0
+    visited_urls = set()
+    async for page in crawl_website.crawl():
+        visited_urls.add(page.url)
+        if not page.content.strip():
+            continue
+        pages_count += 1
+
+        page_sha1 = compute_sha1_from_content(page.content.encode("utf-8"))
+        if (page.url, page_sha1) in stored_pages:
+            skipped_pages_count += 1
+            continue
+
+        # The page changed: its previous chunks are replaced
+        stale_vector_ids += stored_vector_ids_by_page[page.url]
+
+        docs_with_metadata = []
+        for chunk in text_splitter.split_text(page.content):
+            metadata = {
+                "file_sha1": page_sha1,
+                "file_size": len(page.content),
+                "file_name": website_name,
+                "page_url": page.url,
+                "page_sha1": page_sha1,
+                "chunk_size": chunk_size,
+                "chunk_overlap": chunk_overlap,
+                "date": dateshort,
+                "summarization": "true" if enable_summarization else "false",
+                "chunk_sha1": compute_chunk_sha1(chunk),
+            }
+            docs_with_metadata.append(
+                DocumentSerializable(page_content=chunk, metadata=metadata).to_json()
+            )
+
+        for i in range(0, len(docs_with_metadata), batch_size):
+            create_embedding_for_documents_batch.delay(  # type: ignore
+                brain_id,
+                docs_with_metadata[i : i + batch_size],
+                user_openai_api_key,
+                page_sha1,
+            )
+        chunks_count += len(docs_with_metadata)
+
+    if crawl_website.complete:
+        # The pages the crawl no longer reaches were removed from the website
+        for page_url, vector_ids in stored_vector_ids_by_page.items():
+            if page_url not in visited_urls | crawl_website.failed_urls:
+                stale_vector_ids += vector_ids
+
+    brain.delete_brain_vectors_by_ids(stale_vector_ids)
+
+    logger.info(
+        f"Crawled {pages_count} pages of {website_name}: {skipped_pages_count} unchanged, "
+        f"{chunks_count} chunks queued, {len(stale_vector_ids)} stale vectors removed"
+    )
+
+    if pages_count == 0:
+        return {
+            "message": f"❌ No content could be extracted from {website_name}.",
+            "type": "error",
+        }
+
+    return {
+        "message": f"✅ {website_name} with {pages_count} pages has been uploaded.",
+        "type": "success",
+    }
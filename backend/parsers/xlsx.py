@@ -9,6 +9,7 @@ def process_xlsx(
     enable_summarization,
     brain_id,
     user_openai_api_key,
+    incremental=False,
 ):
     return process_file(
         file=file,
@@ -16,4 +17,5 @@ def process_xlsx(
         enable_summarization=enable_summarization,
         brain_id=brain_id,
         user_openai_api_key=user_openai_api_key,
+        incremental=incremental,
     )
@@ -10,6 +10,8 @@ from .get_default_user_brain import get_user_default_brain
 from .get_default_user_brain_or_create_new import \
     get_default_user_brain_or_create_new
 from .get_question_context_from_brain import get_question_context_from_brain
+from .get_scored_question_context_from_brain import \
+    get_scored_question_context_from_brain
 from .get_user_brains import get_user_brains
 from .set_as_default_brain_for_user import set_as_default_brain_for_user
 from .update_brain import update_brain_by_id
@@ -2,6 +2,7 @@ from uuid import UUID
 
 from models import get_supabase_db
 from routes.authorizations.types import RoleEnum
+from utils.brain_authorization_cache import invalidate_brain_authorization
 
 
 def create_brain_user(
@@ -14,3 +15,4 @@ def create_brain_user(
         rights=rights,
         default_brain=is_default_brain,
     ).data[0]
+    invalidate_brain_authorization(brain_id, user_id)
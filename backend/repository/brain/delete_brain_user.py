@@ -1,6 +1,7 @@
 from uuid import UUID
 
 from models.settings import get_supabase_db
+from utils.brain_authorization_cache import invalidate_brain_authorization
 
 
 def delete_brain_user(user_id: UUID, brain_id: UUID) -> None:
@@ -9,3 +10,4 @@ def delete_brain_user(user_id: UUID, brain_id: UUID) -> None:
         user_id=user_id,
         brain_id=brain_id,
     )
+    invalidate_brain_authorization(brain_id, user_id)
@@ -1,6 +1,7 @@
 from uuid import UUID
 
 from models.settings import get_supabase_db
+from utils.brain_authorization_cache import invalidate_brain_authorization
 
 
 def delete_brain_users(brain_id: UUID) -> None:
@@ -8,3 +9,4 @@ def delete_brain_users(brain_id: UUID) -> None:
     supabase_db.delete_brain_subscribers(
         brain_id=brain_id,
     )
+    invalidate_brain_authorization(brain_id)
@@ -1,16 +1,11 @@
 from uuid import UUID
 
-from models import BrainEntity, get_supabase_client
+from models import BrainEntity, get_supabase_db
 
 
 def get_brain_details(brain_id: UUID) -> BrainEntity | None:
-    supabase_client = get_supabase_client()
-    response = (
-        supabase_client.table("brains")
-        .select("*")
-        .filter("brain_id", "eq", str(brain_id))
-        .execute()
-    )
-    if response.data == []:
+    supabase_db = get_supabase_db()
+    brains = supabase_db.get_brain_details(brain_id)
+    if brains == []:
         return None
-    return BrainEntity(**response.data[0])
+    return BrainEntity(**brains[0])
@@ -1,21 +1,15 @@
 from uuid import UUID
 
-from models.settings import get_embeddings, get_supabase_client
-from vectorstore.supabase import CustomSupabaseVectorStore
+from repository.brain.get_scored_question_context_from_brain import (
+    get_scored_question_context_from_brain,
+)
 
 
 def get_question_context_from_brain(brain_id: UUID, question: str, file_names: list):
-    supabase_client = get_supabase_client()
-    embeddings = get_embeddings()
-
-    vector_store = CustomSupabaseVectorStore(
-        supabase_client,
-        embeddings,
-        table_name="vectors",
-        brain_id=str(brain_id),
+    documents_with_scores = get_scored_question_context_from_brain(
+        brain_id, question, file_names
     )
-    documents = vector_store.similarity_search(question, file_names)
 
     # aggregate all the documents into one string
     # return "\n".join([doc.page_content for doc in documents])
-    return documents
+    return [document for document, _ in documents_with_scores]
@@ -0,0 +1,25 @@
+from uuid import UUID
+
+from models.settings import get_supabase_client, get_supabase_db
+from utils.vectors import get_query_embeddings
+from vectorstore.supabase import CustomSupabaseVectorStore
+
+
+def get_scored_question_context_from_brain(
+    brain_id: UUID, question: str, file_names: list
+):
+    """
+    Documents of the brain relevant to the question, each with its similarity
+    to the question
+    """
+    supabase_client = get_supabase_client()
+    embeddings = get_query_embeddings()
+
+    vector_store = CustomSupabaseVectorStore(
+        supabase_client,
+        embeddings,
+        table_name="vectors",
+        brain_id=str(brain_id),
+        database=get_supabase_db(),
+    )
+    return vector_store.similarity_search_with_score(question, file_names)
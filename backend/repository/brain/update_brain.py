@@ -4,6 +4,7 @@ from models import BrainEntity, get_supabase_db
 from models.databases.supabase.brains import BrainUpdatableProperties
 
 from repository.brain.update_brain_last_update_time import update_brain_last_update_time
+from utils.brain_authorization_cache import invalidate_brain_authorization
 
 
 def update_brain_by_id(brain_id: UUID, brain: BrainUpdatableProperties) -> BrainEntity:
@@ -14,5 +15,7 @@ def update_brain_by_id(brain_id: UUID, brain: BrainUpdatableProperties) -> Brain
     if brain_update_answer is None:
         raise Exception("Brain not found")
 
+    # The status of the brain may have changed for every user
+    invalidate_brain_authorization(brain_id)
     update_brain_last_update_time(brain_id)
     return brain_update_answer
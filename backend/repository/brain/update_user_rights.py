@@ -1,6 +1,7 @@
 from uuid import UUID
 
 from models import get_supabase_client
+from utils.brain_authorization_cache import invalidate_brain_authorization
 
 
 def update_brain_user_rights(brain_id: UUID, user_id: UUID, rights: str) -> None:
@@ -10,3 +11,4 @@ def update_brain_user_rights(brain_id: UUID, user_id: UUID, rights: str) -> None
         "brain_id",
         brain_id,
     ).eq("user_id", user_id).execute()
+    invalidate_brain_authorization(brain_id, user_id)
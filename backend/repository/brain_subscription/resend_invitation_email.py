@@ -1,6 +1,6 @@
 import resend
 from logger import get_logger
-from models import BrainSubscription, BrainSettings
+from models import BrainSubscription
 
 from repository.brain import get_brain_details
 from repository.brain_subscription import get_brain_url
@@ -14,10 +14,10 @@ def resend_invitation_email(
     inviter_email: str,
     origin: str = "https://cortx.xyz",
 ):
-    brains_settings = BrainSettings()  # pyright: ignore reportPrivateUsage=none
-    brains_settings.resend_api_key= os.environ.get("RESEND_API_KEY")#type:ignore
-    brains_settings.resend_email_address = os.environ.get("RESEND_EMAIL_ADDRESS")#type:ignore
-    resend.api_key = brains_settings.resend_api_key
+    # Read straight from the environment, the shared settings are left as is
+    resend_api_key = os.environ.get("RESEND_API_KEY")
+    resend_email_address = os.environ.get("RESEND_EMAIL_ADDRESS")
+    resend.api_key = resend_api_key
     
     brain_url = get_brain_url(origin, brain_subscription.brain_id)
 
@@ -34,7 +34,7 @@ def resend_invitation_email(
     try:
         r = resend.Emails.send(
             {
-                "from": brains_settings.resend_email_address,
+                "from": resend_email_address,
                 "to": brain_subscription.email,
                 "subject": "Cortx - Brain Shared With You",
                 "html": html_body,
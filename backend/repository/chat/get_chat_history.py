@@ -4,9 +4,6 @@ from uuid import UUID
 from models import ChatHistory, get_supabase_db
 from pydantic import BaseModel
 
-from repository.brain import get_brain_by_id
-from repository.prompt import get_prompt_by_id
-
 
 class GetChatHistoryOutput(BaseModel):
     chat_id: UUID
@@ -25,23 +22,37 @@ class GetChatHistoryOutput(BaseModel):
         return chat_history
 
 
-def get_chat_history(chat_id: str) -> List[GetChatHistoryOutput]:
+def get_chat_history(
+    chat_id: str,
+    limit: Optional[int] = None,
+    before: Optional[str] = None,
+    after: Optional[str] = None,
+) -> List[GetChatHistoryOutput]:
+    """
+    Messages of the chat with their brain name and prompt title. With a
+    limit, the `limit` messages following `after` when given, otherwise the
+    `limit` most recent ones sent before `before`.
+
+    Brain names and prompt titles are resolved with one query each for the
+    whole history rather than one per message.
+    """
     supabase_db = get_supabase_db()
-    history: List[dict] = supabase_db.get_chat_history(chat_id).data
+    history: List[dict] = supabase_db.get_chat_history(
+        chat_id, limit=limit, before=before, after=after
+    ).data
     if history is None:
         return []
     else:
-        enriched_history: List[GetChatHistoryOutput] = []
-        for message in history:
-            message = ChatHistory(message)
-            brain = None
-            if message.brain_id:
-                brain = get_brain_by_id(message.brain_id)
-
-            prompt = None
-            if message.prompt_id:
-                prompt = get_prompt_by_id(message.prompt_id)
+        messages = [ChatHistory(message) for message in history]
+        brains_names = supabase_db.get_brains_names_by_ids(
+            list({message.brain_id for message in messages if message.brain_id})
+        )
+        prompts_titles = supabase_db.get_prompts_titles_by_ids(
+            list({message.prompt_id for message in messages if message.prompt_id})
+        )
 
+        enriched_history: List[GetChatHistoryOutput] = []
+        for message in messages:
             enriched_history.append(
                 GetChatHistoryOutput(
                     chat_id=(UUID(message.chat_id)),
@@ -49,8 +60,8 @@ def get_chat_history(chat_id: str) -> List[GetChatHistoryOutput]:
                     user_message=message.user_message,
                     assistant=message.assistant,
                     message_time=message.message_time,
-                    brain_name=brain.name if brain else None,
-                    prompt_title=prompt.title if prompt else None,
+                    brain_name=brains_names.get(str(message.brain_id)),
+                    prompt_title=prompts_titles.get(str(message.prompt_id)),
                 )
             )
         return enriched_history
@@ -1,5 +1,7 @@
+import heapq
 from enum import Enum
-from typing import List, Union
+from itertools import islice
+from typing import List, Optional, Union
 from uuid import UUID
 
 from models.notifications import Notification
@@ -24,19 +26,39 @@ class ChatItem(BaseModel):
     body: Union[GetChatHistoryOutput, Notification]
 
 
+def _item_time(item: Union[GetChatHistoryOutput, Notification]):
+    if isinstance(item, GetChatHistoryOutput):
+        return parse_message_time(item.message_time)
+    return parse_message_time(item.datetime)
+
+
 def merge_chat_history_and_notifications(
-    chat_history: List[GetChatHistoryOutput], notifications: List[Notification]
+    chat_history: List[GetChatHistoryOutput],
+    notifications: List[Notification],
+    limit: Optional[int] = None,
+    latest: bool = False,
 ) -> List[ChatItem]:
-    chat_history_and_notifications = chat_history + notifications
+    """
+    Merge the two chronologically sorted lists. With a limit, only the first
+    `limit` items are kept, or the last ones when `latest` is set. The merge
+    is lazy: only the items kept are compared and converted.
+    """
+    if latest:
+        merged = heapq.merge(
+            reversed(chat_history),
+            reversed(notifications),
+            key=_item_time,
+            reverse=True,
+        )
+    else:
+        merged = heapq.merge(chat_history, notifications, key=_item_time)
 
-    chat_history_and_notifications.sort(
-        key=lambda x: parse_message_time(x.message_time)
-        if isinstance(x, GetChatHistoryOutput)
-        else parse_message_time(x.datetime)
-    )
+    items = list(islice(merged, limit))
+    if latest:
+        items.reverse()
 
     transformed_data = []
-    for item in chat_history_and_notifications:
+    for item in items:
         if isinstance(item, GetChatHistoryOutput):
             item_type = ChatItemType.MESSAGE
             body = item
@@ -51,7 +73,24 @@ def merge_chat_history_and_notifications(
 
 def get_chat_history_with_notifications(
     chat_id: UUID,
+    limit: Optional[int] = None,
+    before: Optional[str] = None,
+    after: Optional[str] = None,
 ) -> List[ChatItem]:
-    chat_history = get_chat_history(str(chat_id))
-    chat_notifications = get_chat_notifications(chat_id)
-    return merge_chat_history_and_notifications(chat_history, chat_notifications)
+    """
+    Messages and notifications of the chat in chronological order. With a
+    limit, the window of `limit` items right after `after` when given,
+    otherwise the most recent ones before `before`.
+    """
+    chat_history = get_chat_history(
+        str(chat_id), limit=limit, before=before, after=after
+    )
+    chat_notifications = get_chat_notifications(
+        chat_id, limit=limit, before=before, after=after
+    )
+    return merge_chat_history_and_notifications(
+        chat_history,
+        chat_notifications,
+        limit=limit,
+        latest=limit is not None and after is None,
+    )
@@ -0,0 +1,31 @@
+import requests
+from logger import get_logger
+from models import get_supabase_client
+from supabase.client import Client
+from utils.file import FILE_READ_CHUNK_SIZE
+
+logger = get_logger(__name__)
+
+DOWNLOAD_SIGNED_URL_EXPIRATION_PERIOD_IN_SECONDS = 600
+
+
+def download_file_from_storage(file_identifier: str, destination_path: str):
+    """
+    Stream a file from storage to disk without holding it in memory
+    """
+    supabase_client: Client = get_supabase_client()
+
+    try:
+        signed_url = supabase_client.storage.from_("quivr").create_signed_url(
+            file_identifier, DOWNLOAD_SIGNED_URL_EXPIRATION_PERIOD_IN_SECONDS
+        )["signedURL"]
+
+        with requests.get(signed_url, stream=True, timeout=60) as response:
+            response.raise_for_status()
+            with open(destination_path, "wb") as destination:
+                for chunk in response.iter_content(chunk_size=FILE_READ_CHUNK_SIZE):
+                    destination.write(chunk)
+        return destination_path
+    except Exception as e:
+        logger.error(e)
+        raise e
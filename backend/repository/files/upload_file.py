@@ -9,13 +9,16 @@ from supabase.client import Client
 logger = get_logger()
 
 
-def upload_file_storage(file, file_identifier: str):
+def upload_file_storage(file, file_identifier: str, upsert: bool = False):
     supabase_client: Client = get_supabase_client()
     # res = supabase_client.storage.create_bucket("quivr")
     response = None
+    file_options = {"x-upsert": "true"} if upsert else None
 
     try:
-        response = supabase_client.storage.from_("quivr").upload(file_identifier, file)
+        response = supabase_client.storage.from_("quivr").upload(
+            file_identifier, file, file_options
+        )
         return response
     except Exception as e:
         logger.error(e)
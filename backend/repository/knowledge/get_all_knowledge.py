@@ -12,3 +12,9 @@ def get_all_knowledge(brain_id: UUID):
     knowledges = supabase_db.get_all_knowledge_in_brain(brain_id)
 
     return knowledges
+
+
+def knowledge_file_exists_in_brain(brain_id: UUID, file_name: str) -> bool:
+    supabase_db = get_supabase_db()
+
+    return supabase_db.knowledge_file_exists_in_brain(brain_id, file_name)
@@ -6,6 +6,13 @@ from fastapi import Depends, HTTPException, status
 from models import UserIdentity
 from repository.brain import get_brain_for_user
 from repository.brain.get_brain_details import get_brain_details
+from utils.brain_authorization_cache import (
+    BrainAuthorization,
+    get_cached_brain_authorization,
+    set_cached_brain_authorization,
+)
+from utils.concurrency import run_blocking
+from utils.request_cache import RequestCache
 
 from routes.authorizations.types import RoleEnum
 
@@ -25,29 +32,71 @@ def has_brain_authorization(
         nonlocal required_roles
         if isinstance(required_roles, str):
             required_roles = [required_roles]  # Convert single role to a list
-        validate_brain_authorization(
-            brain_id=brain_id, user_id=current_user.id, required_roles=required_roles
+        await run_blocking(
+            validate_brain_authorization,
+            brain_id=brain_id,
+            user_id=current_user.id,
+            required_roles=required_roles,
         )
 
     return wrapper
 
 
+def get_brain_authorization(
+    brain_id: UUID,
+    user_id: UUID,
+    request_cache: Optional[RequestCache] = None,
+) -> BrainAuthorization:
+    """
+    Whether the brain is public and the rights of the user on it, served from
+    the short-lived authorization cache when possible
+    param: brain_id: The id of the brain
+    param: user_id: The id of the user
+    param: request_cache: Cache of the current request, to reuse its lookups
+    return: (is_public, rights), rights being None if the user has no access
+    """
+    authorization = get_cached_brain_authorization(user_id, brain_id)
+    if authorization is not None:
+        return authorization
+
+    brain = (
+        request_cache.get_brain(brain_id)
+        if request_cache
+        else get_brain_details(brain_id)
+    )
+
+    if brain and brain.status == "public":
+        authorization = (True, None)
+    else:
+        user_brain = (
+            request_cache.get_brain_for_user(user_id, brain_id)
+            if request_cache
+            else get_brain_for_user(user_id, brain_id)
+        )
+        authorization = (False, user_brain.rights if user_brain else None)
+
+    set_cached_brain_authorization(user_id, brain_id, authorization)
+    return authorization
+
+
 def validate_brain_authorization(
     brain_id: UUID,
     user_id: UUID,
     required_roles: Optional[Union[RoleEnum, List[RoleEnum]]] = RoleEnum.Owner,
+    request_cache: Optional[RequestCache] = None,
 ):
     """
     Function to check if the user has the required role(s) for the brain
     param: brain_id: The id of the brain
     param: user_id: The id of the user
     param: required_roles: The role(s) required to access the brain
+    param: request_cache: Cache of the current request, to reuse its lookups
     return: None
     """
 
-    brain = get_brain_details(brain_id)
+    is_public, rights = get_brain_authorization(brain_id, user_id, request_cache)
 
-    if brain and brain.status == "public":
+    if is_public:
         return
 
     if required_roles is None:
@@ -56,8 +105,7 @@ def validate_brain_authorization(
             detail="Missing required role",
         )
 
-    user_brain = get_brain_for_user(user_id, brain_id)
-    if user_brain is None:
+    if rights is None:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="You don't have permission for this brain",
@@ -66,7 +114,7 @@ def validate_brain_authorization(
     if isinstance(required_roles, str):
         required_roles = [required_roles]
     # Check if the user has at least one of the required roles
-    if user_brain.rights not in required_roles:
+    if rights not in required_roles:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="You don't have the required role(s) for this brain",
@@ -26,6 +26,7 @@ from repository.brain import (
 from repository.prompt import delete_prompt_by_id, get_prompt_by_id
 from routes.authorizations.brain_authorization import has_brain_authorization
 from routes.authorizations.types import RoleEnum
+from utils.concurrency import run_blocking
 from pydantic import BaseModel
 from fastapi.security import OAuth2PasswordRequestForm
 from google_auth_oauthlib.flow import Flow
@@ -59,7 +60,7 @@ async def retrieve_all_brains_for_user(
     current_user: UserIdentity = Depends(get_current_user),
 ):
     """Retrieve all brains for the current user."""
-    brains = get_user_brains(current_user.id)
+    brains = await run_blocking(get_user_brains, current_user.id)
     return {"brains": brains}
 
 
@@ -68,7 +69,7 @@ async def retrieve_all_brains_for_user(
 )
 async def retrieve_public_brains() -> list[PublicBrain]:
     """Retrieve all Quivr public brains."""
-    return get_public_brains()
+    return await run_blocking(get_public_brains)
 
 
 @brain_router.get(
@@ -78,7 +79,7 @@ async def retrieve_default_brain(
     current_user: UserIdentity = Depends(get_current_user),
 ):
     """Retrieve or create the default brain for the current user."""
-    brain = get_default_user_brain_or_create_new(current_user)
+    brain = await run_blocking(get_default_user_brain_or_create_new, current_user)
     return {"id": brain.brain_id, "name": brain.name, "rights": "Owner"}
 
 
@@ -89,7 +90,7 @@ async def retrieve_default_brain(
 )
 async def retrieve_brain_by_id(brain_id: UUID):
     """Retrieve details of a specific brain by its ID."""
-    brain_details = get_brain_details(brain_id)
+    brain_details = await run_blocking(get_brain_details, brain_id)
     if brain_details is None:
         raise HTTPException(status_code=404, detail="Brain details not found")
     return brain_details
@@ -100,13 +101,13 @@ async def create_new_brain(
     brain: CreateBrainProperties, current_user: UserIdentity = Depends(get_current_user)
 ):
     """Create a new brain for the user."""
-    user_brains = get_user_brains(current_user.id)
+    user_brains = await run_blocking(get_user_brains, current_user.id)
     user_usage = UserUsage(
         id=current_user.id,
         email=current_user.email,
         openai_api_key=current_user.openai_api_key,
     )
-    user_settings = user_usage.get_user_settings()
+    user_settings = await run_blocking(user_usage.get_user_settings)
 
     if len(user_brains) >= user_settings.get("max_brains", 5):  # type: ignore
         raise HTTPException(
@@ -114,10 +115,11 @@ async def create_new_brain(
             detail=f"Maximum number of brains reached ({user_settings.get('max_brains', 5)}).",  # type: ignore
         )
 
-    new_brain = create_brain(brain)
-    if get_user_default_brain(current_user.id):
+    new_brain = await run_blocking(create_brain, brain)
+    if await run_blocking(get_user_default_brain, current_user.id):
         logger.info(f"Default brain already exists for user {current_user.id}")
-        create_brain_user(
+        await run_blocking(
+            create_brain_user,
             user_id=current_user.id,
             brain_id=new_brain.brain_id,
             rights=RoleEnum.Owner,
@@ -125,7 +127,8 @@ async def create_new_brain(
         )
     else:
         logger.info(f"Creating default brain for user {current_user.id}.")
-        create_brain_user(
+        await run_blocking(
+            create_brain_user,
             user_id=current_user.id,
             brain_id=new_brain.brain_id,
             rights=RoleEnum.Owner,
@@ -147,19 +150,19 @@ async def update_existing_brain(
     brain_id: UUID, brain_update_data: BrainUpdatableProperties
 ):
     """Update an existing brain's configuration."""
-    existing_brain = get_brain_details(brain_id)
+    existing_brain = await run_blocking(get_brain_details, brain_id)
     if existing_brain is None:
         raise HTTPException(status_code=404, detail="Brain not found")
 
     if brain_update_data.prompt_id is None and existing_brain.prompt_id:
-        prompt = get_prompt_by_id(existing_brain.prompt_id)
+        prompt = await run_blocking(get_prompt_by_id, existing_brain.prompt_id)
         if prompt and prompt.status == "private":
-            delete_prompt_by_id(existing_brain.prompt_id)
+            await run_blocking(delete_prompt_by_id, existing_brain.prompt_id)
 
     if brain_update_data.status == "private" and existing_brain.status == "public":
-        delete_brain_users(brain_id)
+        await run_blocking(delete_brain_users, brain_id)
 
-    update_brain_by_id(brain_id, brain_update_data)
+    await run_blocking(update_brain_by_id, brain_id, brain_update_data)
     return {"message": f"Brain {brain_id} has been updated."}
 
 
@@ -172,7 +175,7 @@ async def set_brain_as_default(
     brain_id: UUID, user: UserIdentity = Depends(get_current_user)
 ):
     """Set a brain as the default for the current user."""
-    set_as_default_brain_for_user(user.id, brain_id)
+    await run_blocking(set_as_default_brain_for_user, user.id, brain_id)
     return {"message": f"Brain {brain_id} has been set as default brain."}
 
 
@@ -183,7 +186,9 @@ async def set_brain_as_default(
 )
 async def get_question_context_for_brain(brain_id: UUID, request: BrainQuestionRequest):
     """Retrieve the question context from a specific brain."""
-    context = get_question_context_from_brain(brain_id, request.question)  # type: ignore
+    context = await run_blocking(
+        get_question_context_from_brain, brain_id, request.question  # type: ignore
+    )
     return {"context": context}
 
 @brain_router.get('/brains/extract-transform-load')
@@ -6,6 +6,7 @@ from uuid import UUID
 from venv import logger
 import openai
 from pydantic import BaseModel
+from pydantic.datetime_parse import parse_datetime
 from sympy import Array
 
 from auth import AuthBearer, get_current_user
@@ -24,7 +25,6 @@ from models import (
 )
 from models.databases.supabase.chats import QuestionAndAnswer
 from models.databases.supabase.supabase import SupabaseDB
-from repository.brain import get_brain_details
 from repository.chat import (
     ChatUpdatableProperties,
     CreateChatProperties,
@@ -40,9 +40,10 @@ from repository.chat.get_chat_history_with_notifications import (
     get_chat_history_with_notifications,
 )
 from repository.notification.remove_chat_notifications import remove_chat_notifications
-from repository.user_identity import get_user_identity
 from routes.authorizations.brain_authorization import validate_brain_authorization
 from routes.authorizations.types import RoleEnum
+from utils.concurrency import run_blocking
+from utils.request_cache import RequestCache, get_request_cache
 # from dotenv import load_dotenv
 
 # load_dotenv()
@@ -51,6 +52,22 @@ from routes.authorizations.types import RoleEnum
 
 chat_router = APIRouter()
 
+
+def parse_history_cursor(name: str, value: Optional[str]) -> Optional[str]:
+    """
+    Validate a chat history cursor (a message_time) and return it in ISO
+    format, a malformed cursor is a bad request
+    """
+    if value is None:
+        return None
+    try:
+        return parse_datetime(value).isoformat()
+    except (ValueError, TypeError):
+        raise HTTPException(
+            status_code=400,
+            detail=f"Invalid {name} cursor, expected an ISO 8601 datetime.",
+        )
+
 class RequestBody(BaseModel):
     prompt: str
 
@@ -83,19 +100,25 @@ def delete_chat_from_db(supabase_db: SupabaseDB, chat_id):
 
 def check_user_requests_limit(
     user: UserIdentity,
+    request_cache: Optional[RequestCache] = None,
 ):
     userDailyUsage = UserUsage(
         id=user.id, email=user.email, openai_api_key=user.openai_api_key
     )
 
-    userSettings = userDailyUsage.get_user_settings()
+    userSettings = (
+        request_cache.get_user_settings(user)
+        if request_cache
+        else userDailyUsage.get_user_settings()
+    )
 
     date = time.strftime("%Y%m%d")
     userDailyUsage.handle_increment_user_request_count(date)
 
     if user.openai_api_key is None:
         daily_chat_credit = userSettings.get("daily_chat_credit", 0)  # type: ignore
-        if int(userDailyUsage.daily_requests_count) >= int(daily_chat_credit):
+        # The count includes this request
+        if int(userDailyUsage.daily_requests_count) > int(daily_chat_credit):
             raise HTTPException(
                 status_code=429,  # pyright: ignore reportPrivateUsage=none
                 detail="You have reached the maximum number of requests for today.",  # pyright: ignore reportPrivateUsage=none
@@ -115,7 +138,7 @@ async def get_chats(current_user: UserIdentity = Depends(get_current_user)):
     This endpoint retrieves all the chats associated with the current authenticated user. It returns a list of chat objects
     containing the chat ID and chat name for each chat.
     """
-    chats = get_user_chats(str(current_user.id))
+    chats = await run_blocking(get_user_chats, str(current_user.id))
     return {"chats": chats}
 
 
@@ -128,9 +151,9 @@ async def delete_chat(chat_id: UUID):
     Delete a specific chat by chat ID.
     """
     supabase_db = get_supabase_db()
-    remove_chat_notifications(chat_id)
+    await run_blocking(remove_chat_notifications, chat_id)
 
-    delete_chat_from_db(supabase_db=supabase_db, chat_id=chat_id)
+    await run_blocking(delete_chat_from_db, supabase_db=supabase_db, chat_id=chat_id)
     return {"message": f"{chat_id}  has been deleted."}
 
 
@@ -147,13 +170,13 @@ async def update_chat_metadata_handler(
     Update chat attributes
     """
 
-    chat = get_chat_by_id(chat_id)  # pyright: ignore reportPrivateUsage=none
+    chat = await run_blocking(get_chat_by_id, chat_id)  # pyright: ignore reportPrivateUsage=none
     if str(current_user.id) != chat.user_id:
         raise HTTPException(
             status_code=403,  # pyright: ignore reportPrivateUsage=none
             detail="You should be the owner of the chat to update it.",  # pyright: ignore reportPrivateUsage=none
         )
-    return update_chat(chat_id=chat_id, chat_data=chat_data)
+    return await run_blocking(update_chat, chat_id=chat_id, chat_data=chat_data)
 
 
 # create new chat
@@ -166,7 +189,7 @@ async def create_chat_handler(
     Create a new chat with initial chat messages.
     """
 
-    return create_chat(user_id=current_user.id, chat_data=chat_data)
+    return await run_blocking(create_chat, user_id=current_user.id, chat_data=chat_data)
 
 
 # add new question to chat
@@ -187,44 +210,37 @@ async def create_question_handler(
     | UUID
     | None = Query(..., description="The ID of the brain"),
     current_user: UserIdentity = Depends(get_current_user),
+    request_cache: RequestCache = Depends(get_request_cache),
 ) -> GetChatHistoryOutput:
     """
     Add a new question to the chat.
     """
     if brain_id:
-        validate_brain_authorization(
+        await run_blocking(
+            validate_brain_authorization,
             brain_id=brain_id,
             user_id=current_user.id,
             required_roles=[RoleEnum.Viewer, RoleEnum.Editor, RoleEnum.Owner],
+            request_cache=request_cache,
         )
 
     # Retrieve user's OpenAI API key
-    if brain_id:
-        validate_brain_authorization(
-            brain_id=brain_id,
-            user_id=current_user.id,
-            required_roles=[RoleEnum.Viewer, RoleEnum.Editor, RoleEnum.Owner],
-        )
-
     current_user.openai_api_key = request.headers.get("Openai-Api-Key")
     brain = Brain(id=brain_id)
     brain_details: BrainEntity | None = None
 
-    userDailyUsage = UserUsage(
-        id=current_user.id,
-        email=current_user.email,
-        openai_api_key=current_user.openai_api_key,
-    )
-    userSettings = userDailyUsage.get_user_settings()
+    userSettings = await run_blocking(request_cache.get_user_settings, current_user)
     is_model_ok = (brain_details or chat_question).model in userSettings.get("models", ["gpt-3.5-turbo"])  # type: ignore
 
     if not current_user.openai_api_key and brain_id:
-        brain_details = get_brain_details(brain_id)
+        brain_details = await run_blocking(request_cache.get_brain, brain_id)
         if brain_details:
             current_user.openai_api_key = brain_details.openai_api_key
 
     if not current_user.openai_api_key:
-        user_identity = get_user_identity(current_user.id)
+        user_identity = await run_blocking(
+            request_cache.get_user_identity, current_user.id
+        )
 
         if user_identity is not None:
             current_user.openai_api_key = user_identity.openai_api_key
@@ -243,7 +259,7 @@ async def create_question_handler(
         chat_question.max_tokens = chat_question.max_tokens or brain.max_tokens or 256
 
     try:
-        check_user_requests_limit(current_user)
+        await run_blocking(check_user_requests_limit, current_user, request_cache)
         is_model_ok = (brain_details or chat_question).model in userSettings.get("models", ["gpt-3.5-turbo"])  # type: ignore
         gpt_answer_generator: HeadlessQA | QABaseBrainPicking
         if brain_id:
@@ -255,6 +271,7 @@ async def create_question_handler(
                 brain_id=str(brain_id),
                 user_openai_api_key=current_user.openai_api_key,  # pyright: ignore reportPrivateUsage=none
                 prompt_id=chat_question.prompt_id,
+                request_cache=request_cache,
             )
         else:
             gpt_answer_generator = HeadlessQA(
@@ -264,9 +281,12 @@ async def create_question_handler(
                 user_openai_api_key=current_user.openai_api_key,
                 chat_id=str(chat_id),
                 prompt_id=chat_question.prompt_id,
+                request_cache=request_cache,
             )
 
-        chat_answer = gpt_answer_generator.generate_answer(chat_id, chat_question)
+        chat_answer = await run_blocking(
+            gpt_answer_generator.generate_answer, chat_id, chat_question
+        )
 
         return chat_answer
     except HTTPException as e:
@@ -291,33 +311,33 @@ async def create_stream_question_handler(
     | UUID
     | None = Query(..., description="The ID of the brain"),
     current_user: UserIdentity = Depends(get_current_user),
+    request_cache: RequestCache = Depends(get_request_cache),
 ) -> StreamingResponse:
 
     if brain_id:
-        validate_brain_authorization(
+        await run_blocking(
+            validate_brain_authorization,
             brain_id=brain_id,
             user_id=current_user.id,
             required_roles=[RoleEnum.Viewer, RoleEnum.Editor, RoleEnum.Owner],
+            request_cache=request_cache,
         )
 
     # Retrieve user's OpenAI API key
     current_user.openai_api_key = request.headers.get("Openai-Api-Key")
     brain = Brain(id=brain_id)
     brain_details: BrainEntity | None = None
-    userDailyUsage = UserUsage(
-        id=current_user.id,
-        email=current_user.email,
-        openai_api_key=current_user.openai_api_key,
-    )
 
-    userSettings = userDailyUsage.get_user_settings()
+    userSettings = await run_blocking(request_cache.get_user_settings, current_user)
     if not current_user.openai_api_key and brain_id:
-        brain_details = get_brain_details(brain_id)
+        brain_details = await run_blocking(request_cache.get_brain, brain_id)
         if brain_details:
             current_user.openai_api_key = brain_details.openai_api_key
 
     if not current_user.openai_api_key:
-        user_identity = get_user_identity(current_user.id)
+        user_identity = await run_blocking(
+            request_cache.get_user_identity, current_user.id
+        )
 
         if user_identity is not None:
             current_user.openai_api_key = user_identity.openai_api_key
@@ -333,7 +353,7 @@ async def create_stream_question_handler(
         chat_question.max_tokens = chat_question.max_tokens or brain.max_tokens or 256
     try:
         logger.info(f"Streaming request for {chat_question.model}")
-        check_user_requests_limit(current_user)
+        await run_blocking(check_user_requests_limit, current_user, request_cache)
         gpt_answer_generator: HeadlessQA | QABaseBrainPicking
         # TODO check if model is in the list of models available for the user
 
@@ -350,6 +370,7 @@ async def create_stream_question_handler(
                 user_openai_api_key=current_user.openai_api_key,  # pyright: ignore reportPrivateUsage=none
                 streaming=True,
                 prompt_id=chat_question.prompt_id,
+                request_cache=request_cache,
                 file_paths=chat_question.file_paths,
             )
             
@@ -362,6 +383,7 @@ async def create_stream_question_handler(
                 chat_id=str(chat_id),
                 streaming=True,
                 prompt_id=chat_question.prompt_id,
+                request_cache=request_cache,
                 file_paths=chat_question.file_paths,
             )
 
@@ -380,9 +402,29 @@ async def create_stream_question_handler(
 )
 async def get_chat_history_handler(
     chat_id: UUID,
+    limit: Optional[int] = Query(
+        None, ge=1, le=500, description="The number of items to return"
+    ),
+    before: Optional[str] = Query(
+        None, description="Only the items sent before this message_time"
+    ),
+    after: Optional[str] = Query(
+        None, description="Only the items sent after this message_time"
+    ),
 ) -> List[ChatItem]:
+    """
+    Messages and notifications of the chat. Without limit the whole chat is
+    returned, otherwise the most recent items (before `before`), or the
+    first ones after `after`.
+    """
     # TODO: RBAC with current_user
-    return get_chat_history_with_notifications(chat_id)
+    return await run_blocking(
+        get_chat_history_with_notifications,
+        chat_id,
+        limit=limit,
+        before=parse_history_cursor("before", before),
+        after=parse_history_cursor("after", after),
+    )
 
 
 @chat_router.post(
@@ -397,4 +439,4 @@ async def add_question_and_answer_handler(
     """
     Add a new question and anwser to the chat.
     """
-    return add_question_and_answer(chat_id, question_and_answer)
+    return await run_blocking(add_question_and_answer, chat_id, question_and_answer)
@@ -84,6 +84,11 @@ async def crawl_endpoint(
             brain_id=brain_id,
             openai_api_key=request.headers.get("Openai-Api-Key", None),
             notification_id=crawl_notification.id,  # type: ignore
+            crawl_options={
+                "depth": crawl_website.depth,
+                "max_pages": crawl_website.max_pages,
+                "max_time": crawl_website.max_time,
+            },
         )
 
         return {"message": "Crawl processing has started."}
@@ -16,13 +16,17 @@ from models.notifications import NotificationsStatusEnum
 from repository.brain import get_brain_details
 from repository.files.upload_file import upload_file_storage
 from repository.knowledge.add_knowledge import add_knowledge
-from repository.knowledge.get_all_knowledge import get_all_knowledge
+from repository.knowledge.get_all_knowledge import (
+    get_all_knowledge,
+    knowledge_file_exists_in_brain,
+)
 from repository.notification.add_notification import add_notification
 from repository.user_identity import get_user_identity
 from routes.authorizations.brain_authorization import (
     RoleEnum,
     validate_brain_authorization,
 )
+from utils.concurrency import run_blocking
 from utils.file import convert_bytes, get_file_size
 
 logger = get_logger(__name__)
@@ -40,10 +44,16 @@ async def upload_file(
     brain_id: UUID = Query(..., description="The ID of the brain"),
     chat_id: Optional[UUID] = Query(None, description="The ID of the chat"),
     enable_summarization: bool = False,
+    incremental: bool = Query(
+        False, description="Update an already uploaded file with the same name"
+    ),
     current_user: UserIdentity = Depends(get_current_user),
 ):
-    validate_brain_authorization(
-        brain_id, current_user.id, [RoleEnum.Editor, RoleEnum.Owner]
+    await run_blocking(
+        validate_brain_authorization,
+        brain_id,
+        current_user.id,
+        [RoleEnum.Editor, RoleEnum.Owner],
     )
     brain = Brain(id=brain_id)
     userDailyUsage = UserUsage(
@@ -51,7 +61,7 @@ async def upload_file(
         email=current_user.email,
         openai_api_key=current_user.openai_api_key,
     )
-    userSettings = userDailyUsage.get_user_settings()
+    userSettings = await run_blocking(userDailyUsage.get_user_settings)
 
     if request.headers.get("Openai-Api-Key"):
         brain.max_brain_size = userSettings.get("max_brain_size", 1000000000) # type: ignore
@@ -68,20 +78,22 @@ async def upload_file(
         return message
     upload_notification = None
     if chat_id:
-        upload_notification = add_notification(
+        upload_notification = await run_blocking(
+            add_notification,
             CreateNotificationProperties(
                 action="UPLOAD",
                 chat_id=chat_id,
                 status=NotificationsStatusEnum.Pending,
-            )
+            ),
         )
     openai_api_key = request.headers.get("Openai-Api-Key", None)
     if openai_api_key is None:
-        brain_details = get_brain_details(brain_id)
+        brain_details = await run_blocking(get_brain_details, brain_id)
         if brain_details:
             openai_api_key = brain_details.openai_api_key
     if openai_api_key is None:
-        openai_api_key = get_user_identity(current_user.id).openai_api_key
+        user_identity = await run_blocking(get_user_identity, current_user.id)
+        openai_api_key = user_identity.openai_api_key
     # Given file path and file name
     # Split the file path into directory path and file name
     directory_path, old_file_name = file_path.rsplit('/', 1)
@@ -95,7 +107,12 @@ async def upload_file(
     file_content = await uploadFile.read()
     filename_with_brain_id = str(brain_id) + "/" + str(uploadFile.filename)
     try:
-        fileInStorage = upload_file_storage(file_content, filename_with_brain_id)
+        fileInStorage = await run_blocking(
+            upload_file_storage,
+            file_content,
+            filename_with_brain_id,
+            upsert=incremental,
+        )
         logger.info(f"File {fileInStorage} uploaded successfully")
 
     except Exception as e:
@@ -118,16 +135,22 @@ async def upload_file(
         )[-1].lower(),
     )
 
-    added_knowledge = add_knowledge(knowledge_to_add)
-    logger.info(f"Knowledge {added_knowledge} added successfully")
+    # A re-synced file keeps its existing knowledge entry
+    if not incremental or not await run_blocking(
+        knowledge_file_exists_in_brain, brain_id, uploadFile.filename  # type: ignore
+    ):
+        added_knowledge = await run_blocking(add_knowledge, knowledge_to_add)
+        logger.info(f"Knowledge {added_knowledge} added successfully")
 
-    process_file_and_notify.delay( # type: ignore
+    await run_blocking(
+        process_file_and_notify.delay,  # type: ignore
         file_name=filename_with_brain_id,
         file_original_name=uploadFile.filename,
         enable_summarization=enable_summarization,
         brain_id=brain_id,
         openai_api_key=openai_api_key,
         notification_id=upload_notification.id if upload_notification else None,
+        incremental=incremental,
     )
     return {"message": "File processing has started."}
 
@@ -136,7 +159,8 @@ async def fileStructure(
     brain_id: UUID = Query(..., description="The ID of the brain"),
     # current_user: UserIdentity = Depends(get_current_user),
 ):
-    result = get_all_knowledge(
+    result = await run_blocking(
+        get_all_knowledge,
         brain_id=brain_id,
     )
     file_paths = [item["file_path"] for item in result if item["file_path"] is not None] # type: ignore
@@ -0,0 +1,126 @@
+-- Per brain inventory of the files (and crawled pages) it holds, kept up to
+-- date by triggers on brains_vectors, and a per brain size counter kept up to
+-- date by triggers on the inventory.
+
+create table if not exists brains_files (
+    brain_id uuid not null references brains (brain_id) on delete cascade,
+    file_name text not null,
+    file_sha1 text not null default '',
+    file_size bigint not null default 0,
+    chunk_count integer not null default 0,
+    primary key (brain_id, file_name, file_sha1)
+);
+
+alter table brains add column if not exists files_size bigint not null default 0;
+
+
+-- Size of the file a vector comes from, 0 when missing or malformed
+create or replace function vector_file_size(metadata jsonb) returns bigint
+language sql immutable as $$
+    select case
+        when metadata->>'file_size' ~ '^[0-9]+(\.[0-9]+)?$'
+        then (metadata->>'file_size')::numeric::bigint
+        else 0
+    end;
+$$;
+
+
+-- Add (direction = 1) or remove (direction = -1) links from the inventory.
+-- Removed links must still have their vector, which is the case as links are
+-- always deleted before their vectors.
+create or replace function apply_brains_files_links(links brains_vectors[], direction integer)
+returns void
+language plpgsql as $$
+begin
+    insert into brains_files as bf (brain_id, file_name, file_sha1, file_size, chunk_count)
+    select
+        l.brain_id,
+        coalesce(v.metadata->>'file_name', ''),
+        coalesce(l.file_sha1, v.metadata->>'file_sha1', ''),
+        max(vector_file_size(v.metadata)),
+        direction * count(*)
+    from unnest(links) as l
+    join vectors v on v.id = l.vector_id
+    group by 1, 2, 3
+    on conflict (brain_id, file_name, file_sha1) do update
+    set chunk_count = bf.chunk_count + excluded.chunk_count,
+        file_size = case when direction > 0 then excluded.file_size else bf.file_size end;
+
+    if direction < 0 then
+        delete from brains_files
+        where chunk_count <= 0
+        and brain_id in (select distinct l.brain_id from unnest(links) as l);
+    end if;
+end;
+$$;
+
+
+create or replace function brains_vectors_update_brains_files() returns trigger
+language plpgsql as $$
+begin
+    if tg_op in ('UPDATE', 'DELETE') then
+        perform apply_brains_files_links(array(select l from old_links l), -1);
+    end if;
+    if tg_op in ('INSERT', 'UPDATE') then
+        perform apply_brains_files_links(array(select l from new_links l), 1);
+    end if;
+    return null;
+end;
+$$;
+
+drop trigger if exists brains_vectors_inserted on brains_vectors;
+create trigger brains_vectors_inserted
+after insert on brains_vectors
+referencing new table as new_links
+for each statement execute function brains_vectors_update_brains_files();
+
+drop trigger if exists brains_vectors_updated on brains_vectors;
+create trigger brains_vectors_updated
+after update on brains_vectors
+referencing old table as old_links new table as new_links
+for each statement execute function brains_vectors_update_brains_files();
+
+drop trigger if exists brains_vectors_deleted on brains_vectors;
+create trigger brains_vectors_deleted
+after delete on brains_vectors
+referencing old table as old_links
+for each statement execute function brains_vectors_update_brains_files();
+
+
+create or replace function brains_files_update_brain_size() returns trigger
+language plpgsql as $$
+begin
+    if tg_op in ('UPDATE', 'DELETE') then
+        update brains set files_size = files_size - old.file_size
+        where brain_id = old.brain_id;
+    end if;
+    if tg_op in ('INSERT', 'UPDATE') then
+        update brains set files_size = files_size + new.file_size
+        where brain_id = new.brain_id;
+    end if;
+    return null;
+end;
+$$;
+
+drop trigger if exists brains_files_changed on brains_files;
+create trigger brains_files_changed
+after insert or update of file_size or delete on brains_files
+for each row execute function brains_files_update_brain_size();
+
+
+-- Rebuild the inventory of a brain from its vectors, used for the backfill
+-- and to repair a brain whose vectors were deleted outside of the app
+create or replace function refresh_brains_files(p_brain_id uuid) returns void
+language plpgsql as $$
+begin
+    delete from brains_files where brain_id = p_brain_id;
+    perform apply_brains_files_links(
+        array(select l from brains_vectors l where l.brain_id = p_brain_id), 1
+    );
+end;
+$$;
+
+
+-- Backfill
+update brains set files_size = 0;
+select refresh_brains_files(brain_id) from brains;
@@ -0,0 +1,39 @@
+-- Count a request of the user for the day and return the new count, in one
+-- atomic statement so that concurrent requests never lose an increment.
+
+-- on conflict needs a unique index on (user_id, date), normally the primary key.
+-- The former read-modify-write increment could create several rows for the
+-- same day, they are merged into one with the summed count first.
+lock table user_daily_usage in share row exclusive mode;
+
+with duplicates as (
+    delete from user_daily_usage u
+    using (
+        select user_id, date
+        from user_daily_usage
+        group by user_id, date
+        having count(*) > 1
+    ) d
+    where u.user_id = d.user_id and u.date = d.date
+    returning u.user_id, u.email, u.date, u.daily_requests_count
+)
+insert into user_daily_usage (user_id, email, date, daily_requests_count)
+select user_id, max(email), date, sum(daily_requests_count)
+from duplicates
+group by user_id, date;
+
+create unique index if not exists user_daily_usage_user_id_date_idx
+on user_daily_usage (user_id, date);
+
+create or replace function increment_user_daily_usage(
+    p_user_id uuid,
+    p_email text,
+    p_date text
+) returns table (daily_requests_count integer)
+language sql as $$
+    insert into user_daily_usage as u (user_id, email, date, daily_requests_count)
+    values (p_user_id, p_email, p_date, 1)
+    on conflict (user_id, date) do update
+    set daily_requests_count = u.daily_requests_count + 1
+    returning u.daily_requests_count;
+$$;
@@ -0,0 +1,4 @@
+-- Lookup of the chunk embeddings cache: vectors already embedded for a chunk
+-- content with a given model
+create index if not exists vectors_chunk_sha1_embedding_model_idx
+on vectors ((metadata->>'chunk_sha1'), (metadata->>'embedding_model'));
@@ -0,0 +1,23 @@
+-- Insert a batch of embedded chunks and link them to a brain in one
+-- transaction, so a failed link never leaves vectors without a brain.
+-- p_vectors is a json array of {id, content, metadata, embedding, file_sha1}.
+create or replace function create_vectors_for_brain(p_brain_id uuid, p_vectors jsonb)
+returns table (vector_id uuid)
+language plpgsql as $$
+begin
+    insert into vectors (id, content, metadata, embedding, file_sha1)
+    select
+        (v->>'id')::uuid,
+        v->>'content',
+        v->'metadata',
+        (v->>'embedding')::vector,
+        v->>'file_sha1'
+    from jsonb_array_elements(p_vectors) as v;
+
+    return query
+    insert into brains_vectors as bv (brain_id, vector_id, file_sha1)
+    select p_brain_id, (v->>'id')::uuid, v->>'file_sha1'
+    from jsonb_array_elements(p_vectors) as v
+    returning bv.vector_id;
+end;
+$$;
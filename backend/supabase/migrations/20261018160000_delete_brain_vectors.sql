@@ -0,0 +1,36 @@
+-- Unlink vectors from a brain and delete the ones no other brain uses, in one
+-- call and one transaction. Returns the ids of the deleted vectors.
+-- The links go first, in their own statement, as the brain files inventory
+-- triggers still need the vectors of removed links.
+create or replace function delete_brain_vectors(p_brain_id uuid, p_vector_ids uuid[])
+returns table (deleted_vector_id uuid)
+language plpgsql as $$
+begin
+    delete from brains_vectors bv
+    where bv.brain_id = p_brain_id and bv.vector_id = any(p_vector_ids);
+
+    return query
+    delete from vectors v
+    where v.id = any(p_vector_ids)
+    and not exists (select 1 from brains_vectors bv where bv.vector_id = v.id)
+    returning v.id;
+end;
+$$;
+
+-- Same for all the vectors of a file in the brain, their ids are resolved here
+-- so that a file of any size is deleted in one call.
+create or replace function delete_brain_file_vectors(p_brain_id uuid, p_file_name text)
+returns table (deleted_vector_id uuid)
+language sql as $$
+    select deleted.deleted_vector_id
+    from delete_brain_vectors(
+        p_brain_id,
+        array(
+            select bv.vector_id
+            from brains_vectors bv
+            join vectors v on v.id = bv.vector_id
+            where bv.brain_id = p_brain_id
+            and v.metadata->>'file_name' = p_file_name
+        )
+    ) as deleted;
+$$;
@@ -0,0 +1,16 @@
+-- Move the vectors an incremental re-upload keeps to the new version of their
+-- file: its sha1 and size, in the column and the metadata. Done before their
+-- links are restamped, so that the brains_files inventory takes the new size.
+create or replace function update_vectors_file_version(
+    p_vector_ids uuid[], p_file_sha1 text, p_file_size bigint
+)
+returns table (vector_id uuid)
+language sql as $$
+    update vectors v
+    set file_sha1 = p_file_sha1,
+        metadata = v.metadata || jsonb_build_object(
+            'file_sha1', p_file_sha1, 'file_size', p_file_size
+        )
+    where v.id = any(p_vector_ids)
+    returning v.id;
+$$;
@@ -0,0 +1,32 @@
+import hashlib
+import time
+from typing import List
+
+from langchain.embeddings.base import Embeddings
+
+
+class FakeEmbeddings(Embeddings):
+    """
+    Deterministic embeddings provider standing in for OpenAI, with a fixed
+    latency per call and a latency per embedded text.
+    """
+
+    def __init__(self, call_latency=0.0, text_latency=0.0, dimensions=1536):
+        self.call_latency = call_latency
+        self.text_latency = text_latency
+        self.dimensions = dimensions
+        self.calls = 0
+        self.texts = 0
+
+    def _embed(self, text) -> List[float]:
+        digest = hashlib.sha1(text.encode("utf-8")).digest()
+        return [digest[i % len(digest)] / 255 for i in range(self.dimensions)]
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        self.calls += 1
+        self.texts += len(texts)
+        time.sleep(self.call_latency + self.text_latency * len(texts))
+        return [self._embed(text) for text in texts]
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.embed_documents([text])[0]
@@ -0,0 +1,206 @@
+"""
+Ingestion throughput benchmark.
+
+Drives `utils.processors.filter_file` and the parsers end to end over a
+corpus of sample files, against an in-process fake of the supabase client
+and a fake embeddings provider with configurable latency. Embedding tasks
+run inline instead of going through the broker.
+
+    python -m tests.benchmarks.ingestion_benchmark --call-latency 0.2
+"""
+import argparse
+import asyncio
+import functools
+import glob
+import json
+import os
+import resource
+import time
+import tracemalloc
+import uuid
+from collections import defaultdict
+
+import pytest
+from fastapi import UploadFile
+
+from tests.benchmarks.fake_embeddings import FakeEmbeddings
+from tests.fake_supabase import FakeSupabaseClient
+
+DEFAULT_CORPUS_DIR = os.path.join(os.path.dirname(__file__), "..", "test_files")
+
+
+class StageTimer:
+    def __init__(self):
+        self.timings = defaultdict(float)
+
+    def wrap(self, monkeypatch, owner, name, stage):
+        """
+        Replace `owner.name` by a wrapper adding its run time to `stage`
+        """
+        function = getattr(owner, name)
+
+        if asyncio.iscoroutinefunction(function):
+
+            @functools.wraps(function)
+            async def timed_async(*args, **kwargs):
+                start = time.perf_counter()
+                try:
+                    return await function(*args, **kwargs)
+                finally:
+                    self.timings[stage] += time.perf_counter() - start
+
+            monkeypatch.setattr(owner, name, timed_async)
+        else:
+
+            @functools.wraps(function)
+            def timed(*args, **kwargs):
+                start = time.perf_counter()
+                try:
+                    return function(*args, **kwargs)
+                finally:
+                    self.timings[stage] += time.perf_counter() - start
+
+            monkeypatch.setattr(owner, name, timed)
+
+
+def _seed_brain(client: FakeSupabaseClient):
+    brain_id = str(uuid.uuid4())
+    client.tables["brains"].append(
+        {
+            "brain_id": brain_id,
+            "name": "Benchmark brain",
+            "status": "private",
+            "last_update": "2023-01-01T00:00:00",
+        }
+    )
+    return brain_id
+
+
+async def _ingest(corpus, brain_id):
+    from models.files import File
+    from utils.processors import filter_file
+
+    messages = []
+    for file_path in corpus:
+        with open(file_path, "rb") as f:
+            upload_file = UploadFile(
+                file=f,
+                filename=os.path.basename(file_path),
+                size=os.path.getsize(file_path),
+            )
+            messages.append(
+                await filter_file(
+                    file=File(file=upload_file),
+                    enable_summarization=False,
+                    brain_id=brain_id,
+                    openai_api_key=None,
+                )
+            )
+    return messages
+
+
+def run_ingestion_benchmark(
+    corpus_dir=DEFAULT_CORPUS_DIR,
+    call_latency=0.0,
+    text_latency=0.0,
+    rounds=1,
+    embedding_batch_size=None,
+):
+    """
+    Ingest every file of `corpus_dir` `rounds` times, each round against an
+    empty database, and return the measurements.
+    """
+    corpus = sorted(glob.glob(os.path.join(corpus_dir, "*")))
+    embeddings = FakeEmbeddings(call_latency=call_latency, text_latency=text_latency)
+    timer = StageTimer()
+    round_trips = defaultdict(int)
+    messages = []
+
+    with pytest.MonkeyPatch.context() as monkeypatch:
+        monkeypatch.setenv("OPENAI_API_KEY", "benchmark")
+        monkeypatch.setenv("ANTHROPIC_API_KEY", "benchmark")
+        monkeypatch.setenv("SUPABASE_URL", "http://localhost")
+        monkeypatch.setenv("SUPABASE_SERVICE_KEY", "benchmark")
+        if embedding_batch_size:
+            monkeypatch.setenv("EMBEDDING_BATCH_SIZE", str(embedding_batch_size))
+
+        import celery_task
+        import models.settings
+        import utils.vectors
+        from models.databases.supabase.vectors import Vector
+        from models.files import File
+
+        monkeypatch.setattr(
+            models.settings, "OpenAIEmbeddings", lambda **kwargs: embeddings
+        )
+        monkeypatch.setattr(
+            utils.vectors, "OpenAIEmbeddings", lambda **kwargs: embeddings
+        )
+        # Run the embedding tasks inline
+        for task in (
+            celery_task.create_embedding_for_document,
+            celery_task.create_embedding_for_documents_batch,
+        ):
+            monkeypatch.setattr(task, "delay", task.run)
+
+        timer.wrap(monkeypatch, File, "compute_file_sha1", "sha1")
+        timer.wrap(monkeypatch, File, "compute_documents", "load_and_split")
+        timer.wrap(monkeypatch, FakeEmbeddings, "embed_documents", "embed")
+        timer.wrap(monkeypatch, Vector, "create_vectors", "db_write")
+
+        tracemalloc.start()
+        start = time.perf_counter()
+        for _ in range(rounds):
+            client = FakeSupabaseClient()
+            monkeypatch.setattr(
+                models.settings, "create_client", lambda *args, **kwargs: client
+            )
+            # Each round starts with cold caches and a client on the new database
+            models.settings.reset_process_cache()
+            monkeypatch.setattr(utils.vectors, "_chunk_embedding_cache", None)
+
+            brain_id = _seed_brain(client)
+            messages += asyncio.get_event_loop().run_until_complete(
+                _ingest(corpus, brain_id)
+            )
+            for operation, count in client.round_trips.items():
+                round_trips[" ".join(operation)] += count
+        timer.timings["total"] = time.perf_counter() - start
+        _, peak_traced_memory = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+    # Do not leave the fakes behind for whoever builds a client next
+    models.settings.reset_process_cache()
+
+    chunks = embeddings.texts
+    return {
+        "files": len(corpus) * rounds,
+        "chunks": chunks,
+        "chunks_per_second": chunks / timer.timings["total"],
+        "embeddings_calls": embeddings.calls,
+        "db_round_trips": sum(round_trips.values()),
+        "db_round_trips_by_operation": dict(round_trips),
+        "peak_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+        "peak_traced_memory_mb": peak_traced_memory / 1024 / 1024,
+        "stage_timings": dict(timer.timings),
+        "messages": messages,
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--corpus-dir", default=DEFAULT_CORPUS_DIR)
+    parser.add_argument("--call-latency", type=float, default=0.0)
+    parser.add_argument("--text-latency", type=float, default=0.0)
+    parser.add_argument("--rounds", type=int, default=1)
+    parser.add_argument("--embedding-batch-size", type=int, default=None)
+    args = parser.parse_args()
+
+    report = run_ingestion_benchmark(
+        corpus_dir=args.corpus_dir,
+        call_latency=args.call_latency,
+        text_latency=args.text_latency,
+        rounds=args.rounds,
+        embedding_batch_size=args.embedding_batch_size,
+    )
+    print(json.dumps(report, indent=2, default=str))
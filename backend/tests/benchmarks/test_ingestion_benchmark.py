@@ -0,0 +1,20 @@
+import math
+
+from tests.benchmarks.ingestion_benchmark import run_ingestion_benchmark
+
+
+def test_ingestion_benchmark():
+    batch_size = 10
+    report = run_ingestion_benchmark(call_latency=0.01, embedding_batch_size=batch_size)
+
+    assert report["files"] > 0
+    assert all(message["type"] == "success" for message in report["messages"])
+    assert report["chunks"] > 0
+    assert report["chunks_per_second"] > 0
+
+    # Chunks are embedded and written in batches, not one by one
+    assert report["embeddings_calls"] <= report["files"] + math.ceil(
+        report["chunks"] / batch_size
+    )
+    assert report["db_round_trips"] < report["chunks"] + 10 * report["files"]
+    assert report["stage_timings"]["embed"] > 0
@@ -1,12 +1,35 @@
+"""
+Shared fixtures
+"""
 import os
 
+import models.settings
 import pytest
-from fastapi.testclient import TestClient
-from main import app
+from models.settings import reset_process_cache
+
+from tests.fake_supabase import FakeSupabaseClient
+
+
+@pytest.fixture
+def fake_supabase(monkeypatch):
+    """
+    A fake supabase client, used by every supabase client and database the
+    app gets during the test
+    """
+    client = FakeSupabaseClient()
+    monkeypatch.setattr(
+        models.settings, "create_client", lambda *args, **kwargs: client
+    )
+    reset_process_cache()
+    yield client
+    reset_process_cache()
 
 
 @pytest.fixture(scope="module")
 def client():
+    from fastapi.testclient import TestClient
+    from main import app
+
     return TestClient(app)
 
 
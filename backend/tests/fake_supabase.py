@@ -0,0 +1,304 @@
+"""
+In-process stand-in for the supabase client, covering the subset of the
+postgrest query builder the app uses. Every `execute()` counts as one
+database round trip.
+"""
+import re
+from collections import Counter, defaultdict
+from copy import deepcopy
+from types import SimpleNamespace
+
+
+def _split_columns(columns):
+    # Split on the commas that are not inside an embedded resource
+    parts, depth, current = [], 0, ""
+    for char in columns:
+        if char == "," and depth == 0:
+            parts.append(current.strip())
+            current = ""
+            continue
+        depth += char == "("
+        depth -= char == ")"
+        current += char
+    if current.strip():
+        parts.append(current.strip())
+    return parts
+
+
+def _split_alias(column):
+    # "alias:expression", the colons of an embedded resource are not aliases
+    if ":" in column.split("(", 1)[0]:
+        alias, _, expression = column.partition(":")
+        return alias.strip(), expression.strip()
+    return "", column.strip()
+
+
+class FakeQuery:
+    def __init__(self, client, table_name):
+        self.client = client
+        self.table_name = table_name
+        self.operation = "select"
+        self.columns = "*"
+        self.payload = None
+        self.filters = []
+        self.limit_count = None
+        self.offset = 0
+        self.ordering = []
+
+    # Query building
+
+    def select(self, *columns, count=None):
+        self.operation = "select"
+        self.columns = ",".join(columns) or "*"
+        return self
+
+    def insert(self, json, count=None, returning=None, upsert=False):
+        self.operation = "upsert" if upsert else "insert"
+        self.payload = json
+        return self
+
+    def upsert(self, json, count=None, returning=None, **kwargs):
+        return self.insert(json, upsert=True)
+
+    def update(self, json, count=None):
+        self.operation = "update"
+        self.payload = json
+        return self
+
+    def delete(self, count=None, returning=None):
+        self.operation = "delete"
+        return self
+
+    def filter(self, column, operator, criteria):
+        self.filters.append((column, operator, criteria))
+        return self
+
+    def eq(self, column, value):
+        return self.filter(column, "eq", value)
+
+    def neq(self, column, value):
+        return self.filter(column, "neq", value)
+
+    def in_(self, column, values):
+        return self.filter(column, "in", list(values))
+
+    def match(self, query):
+        for column, value in query.items():
+            self.filter(column, "eq", value)
+        return self
+
+    def order(self, column, desc=False, **kwargs):
+        self.ordering.append((column, desc))
+        return self
+
+    def limit(self, count, **kwargs):
+        self.limit_count = count
+        return self
+
+    def range(self, start, end):
+        self.offset = start
+        self.limit_count = end - start + 1
+        return self
+
+    # Evaluation
+
+    def _value(self, row, column):
+        if "->>" in column:
+            column, key = column.split("->>")
+            return (row.get(column) or {}).get(key)
+        return row.get(column)
+
+    def _related_rows(self, row, table_name):
+        # A brains_users row has one brain, the one with the same brain_id,
+        # and a vector has the brains_vectors rows with vector_id == its id
+        own_key = f"{table_name.rstrip('s')}_id"
+        if own_key in row:
+            return [
+                related
+                for related in self.client.tables[table_name]
+                if str(related.get(own_key)) == str(row[own_key])
+            ]
+        foreign_key = f"{self.table_name.rstrip('s')}_id"
+        return [
+            related
+            for related in self.client.tables[table_name]
+            if str(related.get(foreign_key)) == str(row.get("id"))
+        ]
+
+    def _matches(self, row, column, operator, criteria):
+        if "." in column and "->>" not in column:
+            table_name, related_column = column.split(".", 1)
+            return any(
+                self._matches(related, related_column, operator, criteria)
+                for related in self._related_rows(row, table_name)
+            )
+
+        value = self._value(row, column)
+        if operator == "eq":
+            return str(value) == str(criteria)
+        if operator == "neq":
+            return str(value) != str(criteria)
+        if operator == "in":
+            return str(value) in {str(item) for item in criteria}
+        raise NotImplementedError(f"Unsupported operator {operator}")
+
+    def _rows(self):
+        return [
+            row
+            for row in self.client.tables[self.table_name]
+            if all(self._matches(row, *f) for f in self.filters)
+        ]
+
+    def _project(self, row, columns=None):
+        columns = self.columns if columns is None else columns
+        if columns.strip() == "*":
+            return deepcopy(row)
+
+        projected = {}
+        for column in _split_columns(columns):
+            if column == "*":
+                projected.update(deepcopy(row))
+                continue
+            alias, expression = _split_alias(column)
+            embedded = re.match(r"(\w+)(?:!inner)?\s*\((.*)\)", expression)
+            if embedded:
+                table_name, embedded_columns = embedded.groups()
+                related_rows = [
+                    self._project(related, embedded_columns)
+                    for related in self._related_rows(row, table_name)
+                ]
+                # Many-to-one relations are embedded as an object
+                if f"{table_name.rstrip('s')}_id" in row:
+                    related_rows = related_rows[0] if related_rows else None
+                projected[alias or table_name] = related_rows
+            else:
+                name = alias or expression.split("->>")[-1]
+                projected[name] = self._value(row, expression)
+        return projected
+
+    def execute(self):
+        self.client.round_trips[(self.table_name, self.operation)] += 1
+        table = self.client.tables[self.table_name]
+
+        if self.operation in ("insert", "upsert"):
+            rows = self.payload if isinstance(self.payload, list) else [self.payload]
+            rows = [deepcopy(row) for row in rows]
+            table.extend(rows)
+            data = rows
+        elif self.operation == "update":
+            data = self._rows()
+            for row in data:
+                row.update(deepcopy(self.payload))
+        elif self.operation == "delete":
+            data = self._rows()
+            deleted = {id(row) for row in data}
+            self.client.tables[self.table_name] = [
+                row for row in table if id(row) not in deleted
+            ]
+        else:
+            rows = self._rows()
+            for column, desc in reversed(self.ordering):
+                rows.sort(key=lambda row: str(self._value(row, column)), reverse=desc)
+            data = [self._project(row) for row in rows][self.offset :]
+            if self.limit_count is not None:
+                data = data[: self.limit_count]
+
+        return SimpleNamespace(data=data, count=len(data))
+
+
+class FakeSupabaseClient:
+    def __init__(self):
+        self.tables = defaultdict(list)
+        self.round_trips = Counter()
+        # Functions called through rpc(), by name, taking the params. The SQL
+        # functions of the migrations used by the app come built in.
+        self.functions = {
+            "create_vectors_for_brain": self._create_vectors_for_brain,
+            "delete_brain_vectors": self._delete_brain_vectors,
+            "delete_brain_file_vectors": self._delete_brain_file_vectors,
+            "update_vectors_file_version": self._update_vectors_file_version,
+        }
+
+    def table(self, table_name):
+        return FakeQuery(self, table_name)
+
+    from_ = table
+
+    def rpc(self, function_name, params=None):
+        client = self
+
+        class FakeRpc:
+            def execute(self):
+                client.round_trips[("rpc", function_name)] += 1
+                function = client.functions.get(function_name)
+                data = function(params or {}) if function else []
+                return SimpleNamespace(data=data, count=len(data))
+
+        return FakeRpc()
+
+    def _create_vectors_for_brain(self, params):
+        for vector in params["p_vectors"]:
+            self.tables["vectors"].append(deepcopy(vector))
+            self.tables["brains_vectors"].append(
+                {
+                    "brain_id": params["p_brain_id"],
+                    "vector_id": vector["id"],
+                    "file_sha1": vector.get("file_sha1"),
+                }
+            )
+        return [{"vector_id": vector["id"]} for vector in params["p_vectors"]]
+
+    def _delete_brain_vectors(self, params):
+        vector_ids = set(params["p_vector_ids"])
+        self.tables["brains_vectors"] = [
+            link
+            for link in self.tables["brains_vectors"]
+            if not (
+                str(link["brain_id"]) == params["p_brain_id"]
+                and str(link["vector_id"]) in vector_ids
+            )
+        ]
+        still_linked = {
+            str(link["vector_id"]) for link in self.tables["brains_vectors"]
+        }
+        orphan_ids = vector_ids - still_linked
+        self.tables["vectors"] = [
+            vector
+            for vector in self.tables["vectors"]
+            if str(vector["id"]) not in orphan_ids
+        ]
+        return [{"deleted_vector_id": vector_id} for vector_id in orphan_ids]
+
+    def _delete_brain_file_vectors(self, params):
+        file_vector_ids = {
+            str(vector["id"])
+            for vector in self.tables["vectors"]
+            if (vector.get("metadata") or {}).get("file_name") == params["p_file_name"]
+        }
+        vector_ids = [
+            str(link["vector_id"])
+            for link in self.tables["brains_vectors"]
+            if str(link["brain_id"]) == params["p_brain_id"]
+            and str(link["vector_id"]) in file_vector_ids
+        ]
+        return self._delete_brain_vectors(
+            {"p_brain_id": params["p_brain_id"], "p_vector_ids": vector_ids}
+        )
+
+    def _update_vectors_file_version(self, params):
+        vector_ids = set(params["p_vector_ids"])
+        updated = []
+        for vector in self.tables["vectors"]:
+            if str(vector["id"]) in vector_ids:
+                vector["file_sha1"] = params["p_file_sha1"]
+                vector["metadata"] = {
+                    **(vector.get("metadata") or {}),
+                    "file_sha1": params["p_file_sha1"],
+                    "file_size": params["p_file_size"],
+                }
+                updated.append({"vector_id": vector["id"]})
+        return updated
+
+    @property
+    def total_round_trips(self):
+        return sum(self.round_trips.values())
@@ -0,0 +1,49 @@
+import uuid
+
+import utils.vectors
+from llm.answer_cache import SemanticAnswerCache, iter_answer_tokens
+from repository.files.upload_file import DocumentSerializable
+from utils.vectors import Neurons
+
+from tests.benchmarks.fake_embeddings import FakeEmbeddings
+
+
+def test_answer_cache_matches_similar_questions_of_the_same_brain_version():
+    cache = SemanticAnswerCache(similarity_threshold=0.95)
+    key = ("brain", "prompt", "gpt-3.5-turbo")
+    cache.set(key, [1.0, 0.0], "v1", "The answer")
+
+    assert cache.get(key, [0.99, 0.05], "v1") == "The answer"
+    assert cache.get(key, [0.0, 1.0], "v1") is None
+    assert cache.get(("other brain", "prompt", "gpt-3.5-turbo"), [1.0, 0.0], "v1") is None
+
+    # New knowledge in the brain invalidates the answers given before
+    assert cache.get(key, [1.0, 0.0], "v2") is None
+    assert cache.get(key, [1.0, 0.0], "v1") is None
+
+
+def test_cached_answer_is_replayed_without_loss():
+    answer = "A cached\nanswer,  replayed. "
+    assert "".join(iter_answer_tokens(answer)) == answer
+
+
+def test_brain_version_is_bumped_once_its_new_vectors_are_written(
+    fake_supabase, monkeypatch
+):
+    brain_id = str(uuid.uuid4())
+    fake_supabase.tables["brains"] = [{"brain_id": brain_id, "last_update": "v1"}]
+    monkeypatch.setattr(utils.vectors, "get_embeddings", lambda: FakeEmbeddings())
+    docs = [DocumentSerializable(page_content="New knowledge", metadata={})]
+
+    def fail(params):
+        raise RuntimeError("insert failed")
+
+    create_vectors_for_brain = fake_supabase.functions["create_vectors_for_brain"]
+    fake_supabase.functions["create_vectors_for_brain"] = fail
+    assert Neurons().create_vectors(brain_id, docs) is None
+    assert fake_supabase.tables["brains"][0]["last_update"] == "v1"
+
+    fake_supabase.functions["create_vectors_for_brain"] = create_vectors_for_brain
+    Neurons().create_vectors(brain_id, docs)
+    assert len(fake_supabase.tables["vectors"]) == 1
+    assert fake_supabase.tables["brains"][0]["last_update"] != "v1"
@@ -0,0 +1,35 @@
+import uuid
+
+import pytest
+from fastapi import HTTPException
+from routes.authorizations.brain_authorization import validate_brain_authorization
+from routes.authorizations.types import RoleEnum
+from utils.brain_authorization_cache import invalidate_brain_authorization
+
+
+def test_brain_authorization_is_cached_until_invalidated(fake_supabase):
+    brain_id, user_id = uuid.uuid4(), uuid.uuid4()
+    fake_supabase.tables["brains"] = [
+        {
+            "brain_id": str(brain_id),
+            "name": "Brain",
+            "status": "private",
+            "last_update": "2023-01-01T00:00:00",
+        }
+    ]
+    fake_supabase.tables["brains_users"] = [
+        {"brain_id": str(brain_id), "user_id": str(user_id), "rights": "Owner"}
+    ]
+
+    for _ in range(3):
+        validate_brain_authorization(brain_id, user_id, RoleEnum.Owner)
+    assert fake_supabase.round_trips[("brains_users", "select")] == 1
+
+    # A rights change is seen right away
+    fake_supabase.tables["brains_users"][0]["rights"] = "Viewer"
+    invalidate_brain_authorization(brain_id, user_id)
+    with pytest.raises(HTTPException):
+        validate_brain_authorization(brain_id, user_id, RoleEnum.Owner)
+    assert fake_supabase.round_trips[("brains_users", "select")] == 2
+
+    invalidate_brain_authorization(brain_id)
@@ -0,0 +1,40 @@
+import uuid
+
+from models import Brain
+
+
+def test_brain_files_and_size_come_from_the_inventory(fake_supabase):
+    brain_id = uuid.uuid4()
+    fake_supabase.tables["brains"] = [{"brain_id": str(brain_id), "files_size": 600}]
+    fake_supabase.tables["brains_files"] = [
+        {
+            "brain_id": str(brain_id),
+            "file_name": "https://github.com/org/repo",
+            "file_sha1": "a",
+            "file_size": 100,
+            "chunk_count": 2,
+        },
+        {
+            "brain_id": str(brain_id),
+            "file_name": "https://github.com/org/repo",
+            "file_sha1": "b",
+            "file_size": 200,
+            "chunk_count": 3,
+        },
+        {
+            "brain_id": str(brain_id),
+            "file_name": "file.pdf",
+            "file_sha1": "c",
+            "file_size": 300,
+            "chunk_count": 10,
+        },
+    ]
+
+    brain = Brain(id=brain_id)
+    assert sorted(brain.get_unique_brain_files(), key=lambda f: f["name"]) == [
+        {"name": "file.pdf", "size": 300},
+        {"name": "https://github.com/org/repo", "size": 300},
+    ]
+    assert brain.brain_size == 600
+    # Neither needs the brain's vectors
+    assert fake_supabase.total_round_trips == 2
@@ -0,0 +1,110 @@
+import uuid
+
+import pytest
+from models.notifications import Notification
+from repository.chat import GetChatHistoryOutput, get_chat_history
+from repository.chat.get_chat_history_with_notifications import (
+    ChatItemType,
+    merge_chat_history_and_notifications,
+)
+
+
+def test_chat_history_resolves_brains_and_prompts_in_batch(fake_supabase):
+    chat_id = str(uuid.uuid4())
+    brain_ids = [str(uuid.uuid4()) for _ in range(2)]
+    prompt_id = str(uuid.uuid4())
+    fake_supabase.tables["brains"] = [
+        {"brain_id": brain_id, "name": f"Brain {i}"}
+        for i, brain_id in enumerate(brain_ids)
+    ]
+    fake_supabase.tables["prompts"] = [{"id": prompt_id, "title": "Prompt"}]
+    fake_supabase.tables["chat_history"] = [
+        {
+            "chat_id": chat_id,
+            "message_id": str(uuid.uuid4()),
+            "user_message": f"Question {i}",
+            "assistant": f"Answer {i}",
+            "message_time": f"2023-01-01T00:00:{i:02d}",
+            "brain_id": brain_ids[i % 2],
+            "prompt_id": prompt_id if i % 3 == 0 else None,
+        }
+        for i in range(50)
+    ]
+
+    history = get_chat_history(chat_id)
+    assert len(history) == 50
+    assert fake_supabase.total_round_trips == 3
+    assert [message.brain_name for message in history[:2]] == [
+        "Brain 0",
+        "Brain 1",
+    ]
+    assert [message.prompt_title for message in history[:2]] == ["Prompt", None]
+
+    last_messages = get_chat_history(chat_id, limit=4)
+    assert [message.user_message for message in last_messages] == [
+        f"Question {i}" for i in range(46, 50)
+    ]
+
+
+def _message(second):
+    return GetChatHistoryOutput(
+        chat_id=uuid.uuid4(),
+        message_id=uuid.uuid4(),
+        user_message=f"Question {second}",
+        assistant=f"Answer {second}",
+        message_time=f"2023-01-01T00:00:{second:02d}.000000",
+        prompt_title=None,
+        brain_name=None,
+    )
+
+
+def _notification(second):
+    return Notification(
+        id=uuid.uuid4(),
+        datetime=f"2023-01-01T00:00:{second:02d}.000000",
+        chat_id=None,
+        message=None,
+        action="CRAWL",
+        status="Done",
+    )
+
+
+def test_chat_history_window_merges_messages_and_notifications():
+    messages = [_message(second) for second in (1, 3, 5, 7)]
+    notifications = [_notification(second) for second in (2, 6)]
+
+    def seconds(items):
+        return [
+            int(
+                item.body.message_time[17:19]
+                if item.item_type == ChatItemType.MESSAGE
+                else item.body.datetime[17:19]
+            )
+            for item in items
+        ]
+
+    assert seconds(
+        merge_chat_history_and_notifications(messages, notifications)
+    ) == [1, 2, 3, 5, 6, 7]
+    assert seconds(
+        merge_chat_history_and_notifications(messages, notifications, limit=3)
+    ) == [1, 2, 3]
+    assert seconds(
+        merge_chat_history_and_notifications(
+            messages, notifications, limit=3, latest=True
+        )
+    ) == [5, 6, 7]
+
+
+def test_chat_history_cursors_are_validated():
+    from fastapi import HTTPException
+    from routes.chat_routes import parse_history_cursor
+
+    assert parse_history_cursor("before", None) is None
+    assert (
+        parse_history_cursor("before", "2023-01-01T00:00:01.5+00:00")
+        == "2023-01-01T00:00:01.500000+00:00"
+    )
+    with pytest.raises(HTTPException) as error:
+        parse_history_cursor("after", "yesterday'); drop table chats")
+    assert error.value.status_code == 400
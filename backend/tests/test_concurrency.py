@@ -0,0 +1,40 @@
+import threading
+import time
+
+import anyio
+import utils.concurrency
+from utils.concurrency import run_blocking
+
+
+def test_run_blocking_keeps_the_event_loop_free_and_is_bounded(monkeypatch):
+    running, max_running = [0], [0]
+    lock = threading.Lock()
+
+    def blocking_query():
+        with lock:
+            running[0] += 1
+            max_running[0] = max(max_running[0], running[0])
+        time.sleep(0.05)
+        with lock:
+            running[0] -= 1
+
+    async def main():
+        monkeypatch.setattr(utils.concurrency, "_limiter", anyio.CapacityLimiter(2))
+        ticks = 0
+
+        async def queries():
+            async with anyio.create_task_group() as task_group:
+                for _ in range(6):
+                    task_group.start_soon(run_blocking, blocking_query)
+
+        async with anyio.create_task_group() as task_group:
+            task_group.start_soon(queries)
+            # The loop keeps running while the queries block their threads
+            await anyio.sleep(0)
+            while running[0] or not max_running[0]:
+                ticks += 1
+                await anyio.sleep(0.005)
+        return ticks
+
+    assert anyio.run(main) > 5
+    assert max_running[0] == 2
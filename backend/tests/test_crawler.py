@@ -0,0 +1,16 @@
+from crawl.crawler import CrawlWebsite
+
+
+def test_scope_is_the_crawled_host_and_path():
+    crawler = CrawlWebsite(url="https://Example.com/docs/")
+
+    assert crawler._is_in_scope("https://example.com/docs")
+    assert crawler._is_in_scope("https://example.com/docs/guide?page=2")
+    assert not crawler._is_in_scope("https://example.com/docs-old")
+    assert not crawler._is_in_scope("https://example.com.evil.com/docs")
+    assert not crawler._is_in_scope("https://example.com:8443/docs")
+    assert not crawler._is_in_scope("https://example.com/")
+
+    assert CrawlWebsite(url="https://example.com")._is_in_scope(
+        "https://example.com/anything"
+    )
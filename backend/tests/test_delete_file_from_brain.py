@@ -0,0 +1,32 @@
+import uuid
+
+from models import get_supabase_db
+
+
+def test_delete_file_from_brain_is_set_based(fake_supabase):
+    brain_id, other_brain_id = str(uuid.uuid4()), str(uuid.uuid4())
+    vector_ids = [str(uuid.uuid4()) for _ in range(5000)]
+    fake_supabase.tables["vectors"] = [
+        {"id": vector_id, "metadata": {"file_name": "file.txt"}}
+        for vector_id in vector_ids
+    ]
+    fake_supabase.tables["brains_vectors"] = [
+        {"brain_id": brain_id, "vector_id": vector_id} for vector_id in vector_ids
+    ]
+    # The first chunk is shared with another brain
+    fake_supabase.tables["brains_vectors"].append(
+        {"brain_id": other_brain_id, "vector_id": vector_ids[0]}
+    )
+
+    get_supabase_db().delete_file_from_brain(brain_id, "file.txt")
+
+    remaining = [vector["id"] for vector in fake_supabase.tables["vectors"]]
+    assert remaining == [vector_ids[0]]
+    assert fake_supabase.tables["brains_vectors"] == [
+        {"brain_id": other_brain_id, "vector_id": vector_ids[0]}
+    ]
+    # One call to unlink and delete the whole file, and the last_update bump
+    assert fake_supabase.round_trips == {
+        ("rpc", "delete_brain_file_vectors"): 1,
+        ("brains", "update"): 1,
+    }
@@ -0,0 +1,102 @@
+import sqlite3
+
+from langchain.embeddings.base import Embeddings
+from vectorstore.embeddings_cache import CachedEmbeddings, ChunkEmbeddingCache
+from vectorstore.query_embedding_cache import (
+    CachedQueryEmbeddings,
+    QueryEmbeddingCache,
+)
+
+
+class CountingEmbeddings(Embeddings):
+    def __init__(self):
+        self.calls = []
+
+    def embed_documents(self, texts):
+        self.calls.append(list(texts))
+        return [[float(len(text))] for text in texts]
+
+    def embed_query(self, text):
+        return [float(len(text))]
+
+
+def test_cached_embeddings_only_embeds_missing_chunks():
+    embeddings = CountingEmbeddings()
+    cached_embeddings = CachedEmbeddings(embeddings, ChunkEmbeddingCache(max_size=10))
+
+    assert cached_embeddings.embed_documents(["a", "bb", "a"]) == [[1.0], [2.0], [1.0]]
+    assert embeddings.calls == [["a", "bb"]]
+
+    assert cached_embeddings.embed_documents(["bb", "ccc"]) == [[2.0], [3.0]]
+    assert embeddings.calls[-1] == ["ccc"]
+    assert cached_embeddings.cache.stats() == {
+        "hits": {"memory": 1, "disk": 0, "database": 0},
+        "misses": 3,
+    }
+
+
+def test_disk_cache_survives_memory_eviction(tmp_path):
+    cache = ChunkEmbeddingCache(max_size=1, disk_path=str(tmp_path / "cache.db"))
+    embeddings = CountingEmbeddings()
+    cached_embeddings = CachedEmbeddings(embeddings, cache)
+
+    cached_embeddings.embed_documents(["a", "bb"])
+    cached_embeddings.embed_documents(["a", "bb"])
+
+    assert len(embeddings.calls) == 1
+    assert cache.hits["disk"] >= 1
+
+
+def test_database_hits_are_reused_for_the_same_model_only():
+    class FakeDatabase:
+        def get_embeddings_by_chunk_sha1s(self, chunk_sha1s, embedding_model):
+            if embedding_model != "CountingEmbeddings":
+                return []
+            return [{"chunk_sha1": chunk_sha1, "embedding": "[9.0]"} for chunk_sha1 in chunk_sha1s]
+
+    embeddings = CountingEmbeddings()
+    cache = ChunkEmbeddingCache(get_database=lambda: FakeDatabase())
+    cached_embeddings = CachedEmbeddings(embeddings, cache)
+
+    assert cached_embeddings.embed_documents(["a"]) == [[9.0]]
+    assert embeddings.calls == []
+    assert cache.hits["database"] == 1
+
+    other_embeddings = CountingEmbeddings()
+    other_embeddings.model = "other-model"
+    other_cached_embeddings = CachedEmbeddings(other_embeddings, cache)
+
+    assert other_cached_embeddings.embed_documents(["a"]) == [[1.0]]
+    assert other_embeddings.calls == [["a"]]
+
+
+def test_query_embeddings_are_cached_by_normalized_query():
+    embeddings = CountingEmbeddings()
+    embeddings.queries = []
+    embeddings.embed_query = lambda text: embeddings.queries.append(text) or [1.0]
+    cached_embeddings = CachedQueryEmbeddings(embeddings, QueryEmbeddingCache(max_size=10))
+
+    assert cached_embeddings.embed_query("What is Cortx?") == [1.0]
+    assert cached_embeddings.embed_query("  what is   cortx? ") == [1.0]
+    assert embeddings.queries == ["What is Cortx?"]
+    assert cached_embeddings.cache.stats() == {
+        "hits": {"memory": 1, "redis": 0},
+        "misses": 1,
+    }
+
+
+def test_disk_cache_evicts_least_recently_used_in_batches(tmp_path):
+    disk_path = str(tmp_path / "cache.db")
+    cache = ChunkEmbeddingCache(max_size=1, disk_path=disk_path, disk_max_size=10)
+
+    for index in range(10):
+        cache.set_many("model", {f"chunk-{index}": [float(index)]})
+    cache.get_many("model", ["chunk-0"])
+    cache.set_many("model", {"chunk-10": [10.0]})
+
+    with sqlite3.connect(disk_path) as connection:
+        keys = {key for (key,) in connection.execute("SELECT key FROM embeddings")}
+    # Down to 90% of the limit, the least recently used entries go first
+    assert len(keys) == 9
+    assert "model:chunk-0" in keys and "model:chunk-10" in keys
+    assert "model:chunk-1" not in keys
@@ -0,0 +1,46 @@
+import uuid
+
+import models.databases.supabase.vectors
+from parsers.common import keep_unchanged_file_vectors
+from repository.files.upload_file import DocumentSerializable
+from vectorstore.embeddings_cache import compute_chunk_sha1
+
+
+def test_re_upload_diffs_every_page_of_the_stored_vectors(fake_supabase, monkeypatch):
+    monkeypatch.setattr(models.databases.supabase.vectors, "VECTORS_PAGE_SIZE", 10)
+    brain_id = str(uuid.uuid4())
+    vector_ids = [str(uuid.uuid4()) for _ in range(25)]
+    fake_supabase.tables["vectors"] = [
+        {
+            "id": vector_id,
+            "content": f"chunk {index}",
+            "metadata": {"file_name": "file.txt"},
+        }
+        for index, vector_id in enumerate(vector_ids)
+    ]
+    fake_supabase.tables["brains_vectors"] = [
+        {"brain_id": brain_id, "vector_id": vector_id, "file_sha1": "old"}
+        for vector_id in vector_ids
+    ]
+
+    # The new version drops the last chunk, past the first pages, and adds one
+    contents = [f"chunk {index}" for index in range(24)] + ["new chunk"]
+    docs = [
+        DocumentSerializable(
+            page_content=content,
+            metadata={"chunk_sha1": compute_chunk_sha1(content)},
+        )
+        for content in contents
+    ]
+
+    to_embed = keep_unchanged_file_vectors(brain_id, "file.txt", "new", 240, docs)
+
+    assert [doc.page_content for doc in to_embed] == ["new chunk"]
+    remaining = {vector["id"] for vector in fake_supabase.tables["vectors"]}
+    assert remaining == set(vector_ids[:24])
+    assert {link["file_sha1"] for link in fake_supabase.tables["brains_vectors"]} == {
+        "new"
+    }
+    assert {
+        vector["metadata"]["file_size"] for vector in fake_supabase.tables["vectors"]
+    } == {240}
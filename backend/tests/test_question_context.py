@@ -0,0 +1,15 @@
+import repository.brain.get_question_context_from_brain as question_context
+from langchain.docstore.document import Document
+
+
+def test_question_context_keeps_returning_documents(monkeypatch):
+    document = Document(page_content="content", metadata={})
+    monkeypatch.setattr(
+        question_context,
+        "get_scored_question_context_from_brain",
+        lambda brain_id, question, file_names: [(document, 0.9)],
+    )
+
+    assert question_context.get_question_context_from_brain(
+        "brain_id", "question", []
+    ) == [document]
@@ -0,0 +1,38 @@
+import uuid
+
+from routes.authorizations.brain_authorization import validate_brain_authorization
+from utils.request_cache import RequestCache
+
+
+def test_request_cache_fetches_each_entity_once(fake_supabase):
+    brain_id, prompt_id = uuid.uuid4(), uuid.uuid4()
+    fake_supabase.tables["brains"] = [
+        {
+            "brain_id": str(brain_id),
+            "name": "Brain",
+            "status": "public",
+            "prompt_id": str(prompt_id),
+            "last_update": "2023-01-01T00:00:00",
+        }
+    ]
+    fake_supabase.tables["prompts"] = [
+        {"id": str(prompt_id), "title": "Prompt", "content": "", "status": "private"}
+    ]
+
+    request_cache = RequestCache()
+    validate_brain_authorization(
+        brain_id=brain_id, user_id=uuid.uuid4(), request_cache=request_cache
+    )
+    assert request_cache.get_brain(brain_id).name == "Brain"
+    assert request_cache.get_prompt_to_use_id(brain_id, None) == prompt_id
+    assert request_cache.get_prompt_to_use(brain_id, None).title == "Prompt"
+    assert request_cache.get_prompt_to_use(brain_id, None).title == "Prompt"
+
+    assert fake_supabase.round_trips == {
+        ("brains", "select"): 1,
+        ("prompts", "select"): 1,
+    }
+
+    # Nothing is shared with another request
+    RequestCache().get_brain(brain_id)
+    assert fake_supabase.round_trips[("brains", "select")] == 2
@@ -0,0 +1,22 @@
+import models.settings
+from models.settings import get_supabase_client, get_supabase_db, reset_process_cache
+
+
+def test_supabase_client_is_created_once_per_process(monkeypatch):
+    created = []
+    monkeypatch.setattr(
+        models.settings,
+        "create_client",
+        lambda *args, **kwargs: created.append(object()) or created[-1],
+    )
+    reset_process_cache()
+    try:
+        assert get_supabase_client() is get_supabase_client()
+        assert get_supabase_db() is get_supabase_db()
+        assert len(created) == 1
+
+        # A forked worker starts over with its own client
+        reset_process_cache()
+        assert get_supabase_client() is created[1]
+    finally:
+        reset_process_cache()
@@ -0,0 +1,30 @@
+import uuid
+from collections import Counter
+
+from models import UserUsage
+
+
+def test_request_count_and_settings_cost_one_call(fake_supabase):
+    counts = Counter()
+
+    def increment_user_daily_usage(params):
+        key = (params["p_user_id"], params["p_date"])
+        counts[key] += 1
+        return [{"daily_requests_count": counts[key]}]
+
+    fake_supabase.functions["increment_user_daily_usage"] = increment_user_daily_usage
+
+    user_id = uuid.uuid4()
+    fake_supabase.tables["user_settings"] = [
+        {"user_id": str(user_id), "daily_chat_credit": 2}
+    ]
+
+    for expected_count in (1, 2, 3):
+        user_usage = UserUsage(id=user_id, email="user@quivr.app")
+        assert user_usage.get_user_settings()["daily_chat_credit"] == 2
+        user_usage.handle_increment_user_request_count("20231018")
+        assert user_usage.daily_requests_count == expected_count
+
+    # One settings fetch, then one call per request
+    assert fake_supabase.round_trips[("user_settings", "select")] == 1
+    assert fake_supabase.round_trips[("rpc", "increment_user_daily_usage")] == 3
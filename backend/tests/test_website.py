@@ -0,0 +1,112 @@
+import asyncio
+import uuid
+from types import SimpleNamespace
+
+import parsers.website
+from crawl.crawler import CrawledPage
+from parsers.website import process_website
+from utils.file import compute_sha1_from_content
+
+
+class FakeCrawl:
+    url = "https://example.com"
+
+    def __init__(self, pages, complete=True, failed_urls=()):
+        self.pages = pages
+        self.complete = complete
+        self.failed_urls = set(failed_urls)
+
+    async def crawl(self):
+        for url, content in self.pages.items():
+            yield CrawledPage(url=url, depth=0, content=content)
+
+
+def store_pages(fake_supabase, brain_id, pages):
+    vector_ids = {}
+    for url, content in pages.items():
+        vector_ids[url] = str(uuid.uuid4())
+        fake_supabase.tables["vectors"].append(
+            {
+                "id": vector_ids[url],
+                "content": content,
+                "metadata": {
+                    "file_name": "https://example.com",
+                    "page_url": url,
+                    "page_sha1": compute_sha1_from_content(content.encode("utf-8")),
+                },
+            }
+        )
+        fake_supabase.tables["brains_vectors"].append(
+            {"brain_id": brain_id, "vector_id": vector_ids[url]}
+        )
+    return vector_ids
+
+
+def recrawl(monkeypatch, brain_id, crawl):
+    queued = []
+    monkeypatch.setattr(
+        parsers.website,
+        "create_embedding_for_documents_batch",
+        SimpleNamespace(delay=lambda brain_id, docs, *args: queued.extend(docs)),
+    )
+    asyncio.run(process_website(crawl, False, brain_id, None))
+    return {doc["metadata"]["page_url"] for doc in queued}
+
+
+def test_recrawl_replaces_changed_pages_and_removes_missing_ones(
+    fake_supabase, monkeypatch
+):
+    brain_id = str(uuid.uuid4())
+    vector_ids = store_pages(
+        fake_supabase,
+        brain_id,
+        {
+            "https://example.com": "Home",
+            "https://example.com/a": "Page A",
+            "https://example.com/b": "Page B",
+            "https://example.com/gone": "Gone",
+            "https://example.com/down": "Down",
+        },
+    )
+
+    queued_urls = recrawl(
+        monkeypatch,
+        brain_id,
+        FakeCrawl(
+            {
+                "https://example.com": "Home",
+                "https://example.com/a": "Page A",
+                # Its new content is the one of another stored page
+                "https://example.com/b": "Page A",
+            },
+            failed_urls={"https://example.com/down"},
+        ),
+    )
+
+    assert queued_urls == {"https://example.com/b"}
+    remaining = {vector["id"] for vector in fake_supabase.tables["vectors"]}
+    assert remaining == {
+        vector_ids["https://example.com"],
+        vector_ids["https://example.com/a"],
+        vector_ids["https://example.com/down"],
+    }
+
+
+def test_incomplete_recrawl_keeps_the_pages_it_did_not_reach(
+    fake_supabase, monkeypatch
+):
+    brain_id = str(uuid.uuid4())
+    vector_ids = store_pages(
+        fake_supabase,
+        brain_id,
+        {"https://example.com": "Home", "https://example.com/a": "Page A"},
+    )
+
+    recrawl(
+        monkeypatch,
+        brain_id,
+        FakeCrawl({"https://example.com": "Home"}, complete=False),
+    )
+
+    remaining = {vector["id"] for vector in fake_supabase.tables["vectors"]}
+    assert remaining == set(vector_ids.values())
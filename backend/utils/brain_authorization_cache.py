@@ -0,0 +1,55 @@
+import os
+import threading
+from typing import Optional, Tuple
+from uuid import UUID
+
+from cachetools import TTLCache
+
+BRAIN_AUTHORIZATION_CACHE_TTL = float(os.getenv("BRAIN_AUTHORIZATION_CACHE_TTL", 30))
+BRAIN_AUTHORIZATION_CACHE_MAX_SIZE = int(
+    os.getenv("BRAIN_AUTHORIZATION_CACHE_MAX_SIZE", 10000)
+)
+
+# (is the brain public, rights of the user on the brain or None)
+BrainAuthorization = Tuple[bool, Optional[str]]
+
+_brain_authorization_cache: TTLCache = TTLCache(
+    maxsize=BRAIN_AUTHORIZATION_CACHE_MAX_SIZE, ttl=BRAIN_AUTHORIZATION_CACHE_TTL
+)
+_lock = threading.Lock()
+
+
+def get_cached_brain_authorization(
+    user_id: UUID, brain_id: UUID
+) -> Optional[BrainAuthorization]:
+    with _lock:
+        return _brain_authorization_cache.get((str(user_id), str(brain_id)))
+
+
+def set_cached_brain_authorization(
+    user_id: UUID, brain_id: UUID, authorization: BrainAuthorization
+) -> None:
+    with _lock:
+        _brain_authorization_cache[(str(user_id), str(brain_id))] = authorization
+
+
+def invalidate_brain_authorization(
+    brain_id: UUID, user_id: Optional[UUID] = None
+) -> None:
+    """
+    Forget the authorizations of `user_id` on the brain, or of every user
+    when no user is given (the brain status changed or the brain is gone).
+
+    The cache is local to the process: other workers see the change once
+    their entry expires, after at most BRAIN_AUTHORIZATION_CACHE_TTL seconds.
+    """
+    with _lock:
+        if user_id is not None:
+            _brain_authorization_cache.pop((str(user_id), str(brain_id)), None)
+            return
+
+        brain_keys = [
+            key for key in _brain_authorization_cache if key[1] == str(brain_id)
+        ]
+        for key in brain_keys:
+            _brain_authorization_cache.pop(key, None)
@@ -0,0 +1,34 @@
+import functools
+import os
+from typing import Callable, Optional, TypeVar
+
+import anyio
+from anyio import to_thread
+
+T = TypeVar("T")
+
+# Blocking calls (database round trips through the sync supabase client,
+# synchronous LLM calls) running at once in a worker
+BLOCKING_THREADPOOL_SIZE = int(os.getenv("BLOCKING_THREADPOOL_SIZE", 40))
+
+_limiter: Optional[anyio.CapacityLimiter] = None
+
+
+def _get_limiter() -> anyio.CapacityLimiter:
+    # Created on first use, it has to be made inside the event loop
+    global _limiter
+    if _limiter is None:
+        _limiter = anyio.CapacityLimiter(BLOCKING_THREADPOOL_SIZE)
+    return _limiter
+
+
+async def run_blocking(func: Callable[..., T], *args, **kwargs) -> T:
+    """
+    Run the blocking `func` in a worker thread and wait for it, so the event
+    loop keeps serving the other requests (and SSE streams) meanwhile. At
+    most BLOCKING_THREADPOOL_SIZE calls run at once, the others wait for a
+    thread.
+    """
+    return await to_thread.run_sync(
+        functools.partial(func, *args, **kwargs), limiter=_get_limiter()
+    )
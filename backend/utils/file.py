@@ -2,6 +2,8 @@ import hashlib
 
 from fastapi import UploadFile
 
+FILE_READ_CHUNK_SIZE = 1024 * 1024
+
 
 def convert_bytes(bytes, precision=2):
     """Converts bytes into a human-friendly format."""
@@ -29,10 +31,11 @@ def get_file_size(file: UploadFile):
 
 
 def compute_sha1_from_file(file_path):
+    sha1 = hashlib.sha1()
     with open(file_path, "rb") as file:
-        bytes = file.read()
-        readable_hash = compute_sha1_from_content(bytes)
-    return readable_hash
+        for chunk in iter(lambda: file.read(FILE_READ_CHUNK_SIZE), b""):
+            sha1.update(chunk)
+    return sha1.hexdigest()
 
 
 def compute_sha1_from_content(content):
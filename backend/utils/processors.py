@@ -50,9 +50,36 @@ async def filter_file(
     brain_id,
     openai_api_key,
     original_file_name=None,
+    incremental=False,
 ):
+    """
+    With `incremental`, a file whose name is already known to the brain is
+    diffed chunk by chunk against its stored vectors instead of being ingested
+    from scratch.
+    """
     await file.compute_file_sha1()
 
+    try:
+        return await _process_spooled_file(
+            file=file,
+            enable_summarization=enable_summarization,
+            brain_id=brain_id,
+            openai_api_key=openai_api_key,
+            original_file_name=original_file_name,
+            incremental=incremental,
+        )
+    finally:
+        file.remove_tmp_file()
+
+
+async def _process_spooled_file(
+    file: File,
+    enable_summarization: bool,
+    brain_id,
+    openai_api_key,
+    original_file_name=None,
+    incremental=False,
+):
     file_exists = file.file_already_exists()
     print('file_exists',file_exists)
     file_exists_in_brain = file.file_already_exists_in_brain(brain_id)
@@ -90,6 +117,7 @@ async def filter_file(
                 enable_summarization=enable_summarization,
                 brain_id=brain_id,
                 user_openai_api_key=openai_api_key,
+                incremental=incremental,
             )
             return create_response(
                 f"✅ {using_file_name} has been uploaded to brain {brain.name}.",  # pyright: ignore reportPrivateUsage=none
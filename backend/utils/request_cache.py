@@ -0,0 +1,82 @@
+from typing import Callable, Optional, TypeVar
+from uuid import UUID
+
+from models import BrainEntity, MinimalBrainEntity, UserIdentity, UserUsage
+from models.prompt import Prompt
+from repository.brain import get_brain_details, get_brain_for_user
+from repository.prompt import get_prompt_by_id
+from repository.user_identity import get_user_identity
+
+T = TypeVar("T")
+
+
+class RequestCache:
+    """
+    Entities looked up while serving one request, each fetched at most once.
+
+    A new instance is created for every request (see `get_request_cache`), so
+    nothing is ever served to another request or outlives the one it was
+    fetched for.
+    """
+
+    def __init__(self):
+        self._values: dict = {}
+
+    def _get_or_fetch(self, key: tuple, fetch: Callable[[], T]) -> T:
+        if key not in self._values:
+            self._values[key] = fetch()
+        return self._values[key]
+
+    def get_brain(self, brain_id: Optional[UUID]) -> Optional[BrainEntity]:
+        if brain_id is None:
+            return None
+        return self._get_or_fetch(
+            ("brain", str(brain_id)), lambda: get_brain_details(brain_id)
+        )
+
+    def get_brain_for_user(
+        self, user_id: UUID, brain_id: UUID
+    ) -> Optional[MinimalBrainEntity]:
+        return self._get_or_fetch(
+            ("brain_for_user", str(user_id), str(brain_id)),
+            lambda: get_brain_for_user(user_id, brain_id),
+        )
+
+    def get_prompt_to_use_id(
+        self, brain_id: Optional[UUID], prompt_id: Optional[UUID]
+    ) -> Optional[UUID]:
+        if prompt_id:
+            return prompt_id
+        brain = self.get_brain(brain_id)
+        return brain.prompt_id if brain else None
+
+    def get_prompt_to_use(
+        self, brain_id: Optional[UUID], prompt_id: Optional[UUID]
+    ) -> Optional[Prompt]:
+        prompt_to_use_id = self.get_prompt_to_use_id(brain_id, prompt_id)
+        if prompt_to_use_id is None:
+            return None
+        return self._get_or_fetch(
+            ("prompt", str(prompt_to_use_id)),
+            lambda: get_prompt_by_id(prompt_to_use_id),
+        )
+
+    def get_user_identity(self, user_id: UUID) -> UserIdentity:
+        return self._get_or_fetch(
+            ("user_identity", str(user_id)), lambda: get_user_identity(user_id)
+        )
+
+    def get_user_settings(self, user: UserIdentity) -> dict:
+        return self._get_or_fetch(
+            ("user_settings", str(user.id)),
+            lambda: UserUsage(
+                id=user.id, email=user.email, openai_api_key=user.openai_api_key
+            ).get_user_settings(),
+        )
+
+
+def get_request_cache() -> RequestCache:
+    """
+    FastAPI dependency giving each request its own cache
+    """
+    return RequestCache()
@@ -1,14 +1,82 @@
-from concurrent.futures import ThreadPoolExecutor
-from typing import List
-from uuid import UUID
+import os
 
 from langchain.embeddings.openai import OpenAIEmbeddings
 from logger import get_logger
-from models.settings import get_documents_vector_store, get_embeddings, get_supabase_db
+from models.settings import (
+    get_documents_vector_store,
+    get_embeddings,
+    get_ingestion_settings,
+    get_retrieval_settings,
+    get_supabase_db,
+)
 from pydantic import BaseModel
+from vectorstore.embeddings_cache import (
+    CachedEmbeddings,
+    ChunkEmbeddingCache,
+    get_embeddings_model,
+)
+from vectorstore.query_embedding_cache import (
+    CachedQueryEmbeddings,
+    QueryEmbeddingCache,
+)
 
 logger = get_logger(__name__)
 
+_chunk_embedding_cache: ChunkEmbeddingCache | None = None
+_query_embedding_cache: QueryEmbeddingCache | None = None
+
+
+def get_chunk_embedding_cache() -> ChunkEmbeddingCache | None:
+    """
+    Process-wide chunk embedding cache, None when disabled
+    """
+    global _chunk_embedding_cache
+    settings = get_ingestion_settings()
+    if not settings.embedding_cache_enabled:
+        return None
+    if _chunk_embedding_cache is None:
+        _chunk_embedding_cache = ChunkEmbeddingCache(
+            max_size=settings.embedding_cache_max_size,
+            disk_path=settings.embedding_cache_disk_path,
+            disk_max_size=settings.embedding_cache_disk_max_size,
+            get_database=get_supabase_db
+            if settings.embedding_cache_use_database
+            else None,
+        )
+    return _chunk_embedding_cache
+
+
+def get_query_embedding_cache() -> QueryEmbeddingCache | None:
+    """
+    Process-wide query embedding cache, None when disabled
+    """
+    global _query_embedding_cache
+    settings = get_retrieval_settings()
+    if not settings.query_embedding_cache_enabled:
+        return None
+    if _query_embedding_cache is None:
+        broker_url = os.getenv("CELERY_BROKER_URL", "")
+        _query_embedding_cache = QueryEmbeddingCache(
+            max_size=settings.query_embedding_cache_max_size,
+            ttl=settings.query_embedding_cache_ttl,
+            redis_url=broker_url
+            if settings.query_embedding_cache_use_redis
+            and broker_url.startswith("redis")
+            else None,
+        )
+    return _query_embedding_cache
+
+
+def get_query_embeddings(embeddings=None):
+    """
+    Embeddings to use for questions, answered from the query cache when enabled
+    """
+    embeddings = embeddings or get_embeddings()
+    query_embedding_cache = get_query_embedding_cache()
+    if query_embedding_cache:
+        return CachedQueryEmbeddings(embeddings, query_embedding_cache)
+    return embeddings
+
 
 class Neurons(BaseModel):
     def create_vector(self, doc, user_openai_api_key=None):
@@ -27,8 +95,54 @@ class Neurons(BaseModel):
         except Exception as e:
             logger.error(f"Error creating vector for document {e}")
 
+    def create_vectors(self, brain_id, docs, user_openai_api_key=None):
+        """
+        Embed a batch of documents with a single embeddings call and write the
+        vectors and their brain links in bulk. The vectors' file_sha1 comes
+        from the documents' metadata.
+        """
+        logger.info(f"Creating vectors for {len(docs)} documents")
+        embeddings = (
+            OpenAIEmbeddings(openai_api_key=user_openai_api_key)  # pyright: ignore reportPrivateUsage=none
+            if user_openai_api_key
+            else get_embeddings()
+        )
+        embedding_model = get_embeddings_model(embeddings)
+        chunk_embedding_cache = get_chunk_embedding_cache()
+        if chunk_embedding_cache:
+            embeddings = CachedEmbeddings(embeddings, chunk_embedding_cache)
+
+        supabase_db = get_supabase_db()
+        try:
+            vectors = embeddings.embed_documents([doc.page_content for doc in docs])
+            vector_ids = supabase_db.create_vectors(
+                brain_id,
+                [
+                    {
+                        "content": doc.page_content,
+                        # The model lets the embeddings cache reuse the vector
+                        # for the same chunk and model only
+                        "metadata": {
+                            **doc.metadata,
+                            "embedding_model": embedding_model,
+                        },
+                        "embedding": embedding,
+                        "file_sha1": doc.metadata.get("file_sha1"),
+                    }
+                    for doc, embedding in zip(docs, vectors)
+                ],
+            )
+        except Exception as e:
+            logger.error(f"Error creating vectors for documents {e}")
+            return None
+
+        # Only now is the new knowledge searchable: bumping the brain version
+        # here expires the answers cached before it, not just when it is queued
+        supabase_db.update_brain_last_update_time(brain_id)
+        return vector_ids
+
     def create_embedding(self, content):
-        embeddings = get_embeddings()
+        embeddings = get_query_embeddings()
         return embeddings.embed_query(content)
 
     def similarity_search(self, query, table="match_summaries", top_k=5, threshold=0.5):
@@ -42,39 +156,3 @@ class Neurons(BaseModel):
 
 def error_callback(exception):
     print("An exception occurred:", exception)
-
-
-def process_batch(batch_ids: List[str]):
-    supabase_db = get_supabase_db()
-
-    try:
-        if len(batch_ids) == 1:
-            return (supabase_db.get_vectors_by_batch(UUID(batch_ids[0]))).data
-        else:
-            return (supabase_db.get_vectors_in_batch(batch_ids)).data
-    except Exception as e:
-        logger.error("Error retrieving batched vectors", e)
-
-
-def get_unique_files_from_vector_ids(vectors_ids: List[str]):
-    # Move into Vectors class
-    """
-    Retrieve unique user data vectors.
-    """
-
-    # constants
-    BATCH_SIZE = 5
-
-    with ThreadPoolExecutor() as executor:
-        futures = []
-        for i in range(0, len(vectors_ids), BATCH_SIZE):
-            batch_ids = vectors_ids[i : i + BATCH_SIZE]
-            future = executor.submit(process_batch, batch_ids)
-            futures.append(future)
-
-        # Retrieve the results
-        vectors_responses = [future.result() for future in futures]
-
-    documents = [item for sublist in vectors_responses for item in sublist]
-    unique_files = [dict(t) for t in set(tuple(d.items()) for d in documents)]
-    return unique_files
@@ -0,0 +1,218 @@
+import json
+import sqlite3
+import threading
+import time
+from typing import Callable, Dict, List, Optional
+
+from cachetools import LRUCache
+from langchain.embeddings.base import Embeddings
+from logger import get_logger
+from utils.file import compute_sha1_from_content
+
+logger = get_logger(__name__)
+
+
+def compute_chunk_sha1(text: str) -> str:
+    return compute_sha1_from_content(text.encode("utf-8"))
+
+
+def get_embeddings_model(embeddings: Embeddings) -> str:
+    """
+    Name of the model behind `embeddings`, cached embeddings are only ever
+    reused for the same model
+    """
+    return getattr(embeddings, "model", embeddings.__class__.__name__)
+
+
+class ChunkEmbeddingCache:
+    """
+    Content-addressed cache of chunk embeddings.
+
+    Lookups go through an in-process LRU, then an optional on-disk sqlite store,
+    then the vectors already stored in the database (matched on the chunk_sha1
+    and embedding_model written in their metadata).
+    """
+
+    def __init__(
+        self,
+        max_size: int = 10000,
+        disk_path: Optional[str] = None,
+        disk_max_size: int = 100000,
+        get_database: Optional[Callable] = None,
+    ):
+        self._memory: LRUCache = LRUCache(maxsize=max_size)
+        self._lock = threading.Lock()
+        self._disk_path = disk_path
+        self._disk_max_size = disk_max_size
+        # Rows written since the last count, the table is only counted and
+        # trimmed once they may have taken it above its limit
+        self._disk_size = 0
+        self._get_database = get_database
+        self.hits = {"memory": 0, "disk": 0, "database": 0}
+        self.misses = 0
+
+        if self._disk_path:
+            with self._disk_connection() as connection:
+                connection.execute(
+                    "CREATE TABLE IF NOT EXISTS embeddings "
+                    "(key TEXT PRIMARY KEY, embedding TEXT, last_access REAL)"
+                )
+                connection.execute(
+                    "CREATE INDEX IF NOT EXISTS embeddings_last_access "
+                    "ON embeddings (last_access)"
+                )
+                (self._disk_size,) = connection.execute(
+                    "SELECT COUNT(*) FROM embeddings"
+                ).fetchone()
+
+    def _disk_connection(self):
+        return sqlite3.connect(self._disk_path, timeout=30)  # type: ignore
+
+    def get_many(self, model: str, chunk_sha1s: List[str]) -> Dict[str, List[float]]:
+        found: Dict[str, List[float]] = {}
+
+        with self._lock:
+            for chunk_sha1 in chunk_sha1s:
+                embedding = self._memory.get(f"{model}:{chunk_sha1}")
+                if embedding is not None:
+                    found[chunk_sha1] = embedding
+            self.hits["memory"] += len(found)
+
+        missing = [chunk_sha1 for chunk_sha1 in chunk_sha1s if chunk_sha1 not in found]
+        if missing and self._disk_path:
+            from_disk = self._get_from_disk(model, missing)
+            self.hits["disk"] += len(from_disk)
+            self._set_in_memory(model, from_disk)
+            found.update(from_disk)
+
+        missing = [chunk_sha1 for chunk_sha1 in chunk_sha1s if chunk_sha1 not in found]
+        if missing and self._get_database:
+            from_database = self._get_from_database(model, missing)
+            self.hits["database"] += len(from_database)
+            self.set_many(model, from_database)
+            found.update(from_database)
+
+        self.misses += len(set(chunk_sha1s) - set(found))
+        return found
+
+    def set_many(self, model: str, embeddings: Dict[str, List[float]]):
+        if not embeddings:
+            return
+        self._set_in_memory(model, embeddings)
+        if self._disk_path:
+            self._set_on_disk(model, embeddings)
+
+    def stats(self) -> dict:
+        return {"hits": dict(self.hits), "misses": self.misses}
+
+    def _set_in_memory(self, model: str, embeddings: Dict[str, List[float]]):
+        with self._lock:
+            for chunk_sha1, embedding in embeddings.items():
+                self._memory[f"{model}:{chunk_sha1}"] = embedding
+
+    def _get_from_disk(self, model: str, chunk_sha1s: List[str]):
+        keys = {f"{model}:{chunk_sha1}": chunk_sha1 for chunk_sha1 in chunk_sha1s}
+        placeholders = ",".join("?" for _ in keys)
+        try:
+            with self._disk_connection() as connection:
+                rows = connection.execute(
+                    f"SELECT key, embedding FROM embeddings WHERE key IN ({placeholders})",
+                    list(keys),
+                ).fetchall()
+                connection.execute(
+                    f"UPDATE embeddings SET last_access = ? WHERE key IN ({placeholders})",
+                    [time.time(), *keys],
+                )
+        except sqlite3.Error as e:
+            logger.error(f"Error reading the embeddings disk cache {e}")
+            return {}
+        return {keys[key]: json.loads(embedding) for key, embedding in rows}
+
+    def _set_on_disk(self, model: str, embeddings: Dict[str, List[float]]):
+        now = time.time()
+        try:
+            with self._disk_connection() as connection:
+                connection.executemany(
+                    "INSERT OR REPLACE INTO embeddings (key, embedding, last_access) VALUES (?, ?, ?)",
+                    [
+                        (f"{model}:{chunk_sha1}", json.dumps(embedding), now)
+                        for chunk_sha1, embedding in embeddings.items()
+                    ],
+                )
+                self._disk_size += len(embeddings)
+                if self._disk_size > self._disk_max_size:
+                    self._evict_from_disk(connection)
+        except sqlite3.Error as e:
+            logger.error(f"Error writing the embeddings disk cache {e}")
+
+    def _evict_from_disk(self, connection: sqlite3.Connection):
+        """
+        Evict the least recently used entries once the table is above its size
+        limit, down to 90% of it so the next writes don't evict again
+        """
+        (self._disk_size,) = connection.execute(
+            "SELECT COUNT(*) FROM embeddings"
+        ).fetchone()
+        if self._disk_size <= self._disk_max_size:
+            return
+
+        to_evict = self._disk_size - self._disk_max_size * 9 // 10
+        connection.execute(
+            "DELETE FROM embeddings WHERE key IN (SELECT key FROM embeddings "
+            "ORDER BY last_access LIMIT ?)",
+            (to_evict,),
+        )
+        self._disk_size -= to_evict
+
+    def _get_from_database(self, model: str, chunk_sha1s: List[str]):
+        try:
+            rows = self._get_database().get_embeddings_by_chunk_sha1s(  # type: ignore
+                chunk_sha1s, model
+            )
+        except Exception as e:
+            logger.error(f"Error retrieving cached embeddings from database {e}")
+            return {}
+
+        embeddings = {}
+        for row in rows:
+            embedding = row["embedding"]
+            # pgvector columns are returned by PostgREST as a string
+            embeddings[row["chunk_sha1"]] = (
+                json.loads(embedding) if isinstance(embedding, str) else embedding
+            )
+        return embeddings
+
+
+class CachedEmbeddings(Embeddings):
+    """
+    Embeddings wrapper that only sends the chunks missing from the cache to the
+    underlying provider, in a single call.
+    """
+
+    def __init__(self, embeddings: Embeddings, cache: ChunkEmbeddingCache):
+        self.embeddings = embeddings
+        self.cache = cache
+        self.model = get_embeddings_model(embeddings)
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        chunk_sha1s = [compute_chunk_sha1(text) for text in texts]
+        cached = self.cache.get_many(self.model, list(dict.fromkeys(chunk_sha1s)))
+
+        to_embed = {}
+        for chunk_sha1, text in zip(chunk_sha1s, texts):
+            if chunk_sha1 not in cached and chunk_sha1 not in to_embed:
+                to_embed[chunk_sha1] = text
+
+        if to_embed:
+            new_embeddings = self.embeddings.embed_documents(list(to_embed.values()))
+            computed = dict(zip(to_embed.keys(), new_embeddings))
+            self.cache.set_many(self.model, computed)
+            cached.update(computed)
+
+        logger.info(
+            f"Embedded {len(to_embed)} of {len(texts)} chunks, cache stats: {self.cache.stats()}"
+        )
+        return [cached[chunk_sha1] for chunk_sha1 in chunk_sha1s]
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.embeddings.embed_query(text)
@@ -0,0 +1,104 @@
+import json
+import threading
+from typing import List, Optional
+
+from cachetools import TTLCache
+from langchain.embeddings.base import Embeddings
+from logger import get_logger
+from utils.file import compute_sha1_from_content
+
+logger = get_logger(__name__)
+
+
+def normalize_query(text: str) -> str:
+    """
+    Questions differing only by case or whitespace share their embedding
+    """
+    return " ".join(text.split()).lower()
+
+
+class QueryEmbeddingCache:
+    """
+    Cache of query embeddings keyed by model and normalized query.
+
+    Entries live in an in-process LRU with a TTL and, when a redis url is
+    given, in redis as well so that every worker shares them.
+    """
+
+    def __init__(
+        self, max_size: int = 10000, ttl: int = 86400, redis_url: Optional[str] = None
+    ):
+        self._memory: TTLCache = TTLCache(maxsize=max_size, ttl=ttl)
+        self._lock = threading.Lock()
+        self._ttl = ttl
+        self._redis = None
+        self.hits = {"memory": 0, "redis": 0}
+        self.misses = 0
+
+        if redis_url:
+            import redis
+
+            self._redis = redis.Redis.from_url(redis_url)
+
+    def _key(self, model: str, query: str) -> str:
+        query_sha1 = compute_sha1_from_content(normalize_query(query).encode("utf-8"))
+        return f"query_embedding:{model}:{query_sha1}"
+
+    def get(self, model: str, query: str) -> Optional[List[float]]:
+        key = self._key(model, query)
+        with self._lock:
+            embedding = self._memory.get(key)
+        if embedding is not None:
+            self.hits["memory"] += 1
+            return embedding
+
+        if self._redis is not None:
+            try:
+                value = self._redis.get(key)
+            except Exception as e:
+                logger.error(f"Error reading the query embedding cache: {e}")
+                value = None
+            if value is not None:
+                embedding = json.loads(value)
+                with self._lock:
+                    self._memory[key] = embedding
+                self.hits["redis"] += 1
+                return embedding
+
+        self.misses += 1
+        return None
+
+    def set(self, model: str, query: str, embedding: List[float]):
+        key = self._key(model, query)
+        with self._lock:
+            self._memory[key] = embedding
+
+        if self._redis is not None:
+            try:
+                self._redis.set(key, json.dumps(embedding), ex=self._ttl)
+            except Exception as e:
+                logger.error(f"Error writing the query embedding cache: {e}")
+
+    def stats(self):
+        return {"hits": dict(self.hits), "misses": self.misses}
+
+
+class CachedQueryEmbeddings(Embeddings):
+    """
+    Embeddings wrapper answering repeated queries from the cache
+    """
+
+    def __init__(self, embeddings: Embeddings, cache: QueryEmbeddingCache):
+        self.embeddings = embeddings
+        self.cache = cache
+        self.model = getattr(embeddings, "model", embeddings.__class__.__name__)
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return self.embeddings.embed_documents(texts)
+
+    def embed_query(self, text: str) -> List[float]:
+        embedding = self.cache.get(self.model, text)
+        if embedding is None:
+            embedding = self.embeddings.embed_query(text)
+            self.cache.set(self.model, text, embedding)
+        return embedding
@@ -1,4 +1,4 @@
-from typing import Any, List
+from typing import Any, List, Optional, Tuple
 
 from langchain.docstore.document import Document
 from langchain.embeddings.base import Embeddings
@@ -17,11 +17,15 @@ class CustomSupabaseVectorStore(SupabaseVectorStore):
         embedding: Embeddings,
         table_name: str,
         brain_id: str = "none",
+        database: Optional[Any] = None,
     ):
         super().__init__(client, embedding, table_name)
         self.brain_id = brain_id
+        # Repository running the match query, e.g. over a pooled direct
+        # connection, the supabase client is used when not given
+        self.database = database
 
-    def similarity_search( # type: ignore
+    def similarity_search_with_score(  # type: ignore
         self,
         query: str,
         file_names: list,
@@ -29,18 +33,22 @@ class CustomSupabaseVectorStore(SupabaseVectorStore):
         table: str = "match_vectors_filtering",
         threshold: float = 0.5,
         **kwargs: Any
-    ) -> List[Document]:
-        vectors = self._embedding.embed_documents([query])
-        query_embedding = vectors[0]
-        res = self._client.rpc(
-            table,
-            {
-                "query_embedding": query_embedding,
-                "match_count": k,
-                "p_brain_id": str(self.brain_id),
-                "p_file_names": file_names
-            },
-        ).execute()
+    ) -> List[Tuple[Document, float]]:
+        query_embedding = self._embedding.embed_query(query)
+        if self.database is not None:
+            res = self.database.match_brain_vectors(
+                query_embedding, self.brain_id, file_names, k, table=table
+            )
+        else:
+            res = self._client.rpc(
+                table,
+                {
+                    "query_embedding": query_embedding,
+                    "match_count": k,
+                    "p_brain_id": str(self.brain_id),
+                    "p_file_names": file_names
+                },
+            ).execute()
 
         match_result = [
             (
@@ -54,6 +62,21 @@ class CustomSupabaseVectorStore(SupabaseVectorStore):
             if search.get("content")
         ]
 
+        return match_result
+
+    def similarity_search( # type: ignore
+        self,
+        query: str,
+        file_names: list,
+        k: int = 4,
+        table: str = "match_vectors_filtering",
+        threshold: float = 0.5,
+        **kwargs: Any
+    ) -> List[Document]:
+        match_result = self.similarity_search_with_score(
+            query, file_names, k=k, table=table, threshold=threshold, **kwargs
+        )
+
         documents = [doc for doc, _ in match_result]
 
         return documents